@@ -5,6 +5,9 @@ from sqlalchemy import pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import async_engine_from_config
 
+import src.auth.model  # noqa
+import src.db.counts  # noqa
+import src.mail.model  # noqa
 import src.users.model  # noqa
 from alembic import context
 from src.config import settings
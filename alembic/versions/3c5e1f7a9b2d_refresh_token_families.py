@@ -0,0 +1,56 @@
+"""Refresh token families.
+
+Revision ID: 3c5e1f7a9b2d
+Revises: ed29120a5bf7
+Create Date: 2024-06-10 09:12:41.512309
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3c5e1f7a9b2d"
+down_revision: Union[str, None] = "ed29120a5bf7"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "refresh_token_families",
+        sa.Column("family_id", sa.String(length=32), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("generation", sa.Integer(), nullable=False),
+        sa.Column("revoked", sa.Boolean(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"], ondelete="CASCADE"),
+        sa.PrimaryKeyConstraint("family_id"),
+    )
+    op.create_index(
+        op.f("ix_refresh_token_families_user_id"),
+        "refresh_token_families",
+        ["user_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_refresh_token_families_expires_at"),
+        "refresh_token_families",
+        ["expires_at"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        op.f("ix_refresh_token_families_expires_at"),
+        table_name="refresh_token_families",
+    )
+    op.drop_index(
+        op.f("ix_refresh_token_families_user_id"),
+        table_name="refresh_token_families",
+    )
+    op.drop_table("refresh_token_families")
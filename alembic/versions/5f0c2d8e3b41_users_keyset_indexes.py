@@ -0,0 +1,34 @@
+"""Users keyset pagination indexes.
+
+Revision ID: 5f0c2d8e3b41
+Revises: 8d2b6f4e1a7c
+Create Date: 2024-06-24 10:41:08.275614
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5f0c2d8e3b41"
+down_revision: Union[str, None] = "8d2b6f4e1a7c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_users_join_time_id", "users", ["join_time", "id"], unique=False
+    )
+    op.create_index(
+        "ix_users_last_login_time_id",
+        "users",
+        ["last_login_time", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_users_last_login_time_id", table_name="users")
+    op.drop_index("ix_users_join_time_id", table_name="users")
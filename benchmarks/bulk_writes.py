@@ -0,0 +1,145 @@
+"""Compare per-row repository writes with the bulk primitives.
+
+The per-row path is ``_save``, ``_update`` and ``delete`` in a loop, one
+transaction per row. The bulk path is ``save_many``, ``update_many`` and
+``delete_many``, chunked ``executemany`` batches in one transaction.
+
+Usage::
+
+    python -m benchmarks.bulk_writes --rows 10000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from src.db.base import Base
+from src.db.repository import BaseRepository
+from src.db.session import create_engine_and_session
+from src.users.model import User
+
+repository = BaseRepository(User)
+
+
+def payload(i: int) -> dict:
+    """User row of the benchmark.
+
+    Args:
+        i (int): Row number
+
+    Returns:
+        dict: Column values
+    """
+    return {
+        "email": f"user{i}@example.com",
+        "username": f"user{i}",
+        "password": "hashed",
+        "first_name": "Bench",
+        "last_name": str(i),
+    }
+
+
+async def per_row(session, rows: int) -> dict[str, float]:
+    """Insert, update and delete one row per transaction.
+
+    Args:
+        session (AsyncSession): database session
+        rows (int): Number of rows
+
+    Returns:
+        dict[str, float]: Seconds per operation
+    """
+    timings = {}
+    start = time.perf_counter()
+    ids = [
+        (await repository._save(session, payload(i))).id for i in range(rows)
+    ]
+    timings["insert"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for id_ in ids:
+        await repository._update(session, "id", id_, {"last_name": "updated"})
+    timings["update"] = time.perf_counter() - start
+    start = time.perf_counter()
+    for id_ in ids:
+        await repository.delete(session, id_)
+    timings["delete"] = time.perf_counter() - start
+    return timings
+
+
+async def bulk(session, rows: int, chunk_size: int) -> dict[str, float]:
+    """Insert, update and delete every row with the bulk primitives.
+
+    Args:
+        session (AsyncSession): database session
+        rows (int): Number of rows
+        chunk_size (int): Rows per batch
+
+    Returns:
+        dict[str, float]: Seconds per operation
+    """
+    timings = {}
+    start = time.perf_counter()
+    ids = await repository.save_many(
+        session, [payload(i) for i in range(rows)], chunk_size
+    )
+    timings["insert"] = time.perf_counter() - start
+    start = time.perf_counter()
+    await repository.update_many(
+        session,
+        [{"id": id_, "last_name": "updated"} for id_ in ids],
+        "id",
+        chunk_size,
+    )
+    timings["update"] = time.perf_counter() - start
+    start = time.perf_counter()
+    await repository.delete_many(session, ids, "id", chunk_size)
+    timings["delete"] = time.perf_counter() - start
+    return timings
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run both paths for every row count.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            for name in ("per-row", "bulk"):
+                if name == "per-row" and rows > args.per_row_max:
+                    continue
+                engine, session_factory = create_engine_and_session(
+                    f"sqlite+aiosqlite:///{os.path.join(tmp, f'{name}{rows}.db')}"
+                )
+                async with engine.begin() as conn:
+                    await conn.run_sync(Base.metadata.create_all)
+                try:
+                    async with session_factory() as session:
+                        if name == "bulk":
+                            timings = await bulk(session, rows, args.chunk_size)
+                        else:
+                            timings = await per_row(session, rows)
+                finally:
+                    await engine.dispose()
+                print(  # noqa: T201
+                    f"rows={rows:<7} {name:<8} "
+                    + " ".join(
+                        f"{operation}={seconds:7.2f}s ({rows / seconds:9.0f}/s)"
+                        for operation, seconds in timings.items()
+                    )
+                )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument(
+        "--per-row-max",
+        type=int,
+        default=100000,
+        help="skip the per-row path above this row count",
+    )
+    asyncio.run(main(parser.parse_args()))
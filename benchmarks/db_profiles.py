@@ -0,0 +1,125 @@
+"""Compare the database tuning profiles on a session per operation workload.
+
+Each profile gets a fresh SQLite file. Concurrent workers open a session
+per operation, like request handlers do, and either insert a user in its
+own transaction or read one by primary key.
+
+Usage::
+
+    python -m benchmarks.db_profiles --workers 16 --operations 2000
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy import insert, select
+
+from benchmarks.login_latency import percentile
+from src.db.base import Base
+from src.db.session import create_engine_and_session
+from src.db.tuning import PROFILES
+from src.users.model import User
+
+_users = User.__table__
+
+
+async def timed_workers(workers: int, operations: int, operation) -> tuple:
+    """Run an operation concurrently and time each call.
+
+    Args:
+        workers (int): Concurrent workers
+        operations (int): Total number of calls
+        operation (Callable[[int], Awaitable]): Operation taking a sequence number
+
+    Returns:
+        tuple: Latencies in milliseconds and elapsed seconds
+    """
+    latencies: list[float] = []
+    counter = iter(range(operations))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            await operation(i)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    return latencies, time.perf_counter() - start
+
+
+async def bench_profile(path: str, profile: str, args: argparse.Namespace):
+    """Measure writes then reads with one profile.
+
+    Args:
+        path (str): SQLite file
+        profile (str): Tuning profile name
+        args (argparse.Namespace): Command line arguments
+    """
+    engine, session_factory = create_engine_and_session(
+        f"sqlite+aiosqlite:///{path}", profile=profile
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    now = datetime.now()
+
+    async def write(i: int):
+        async with session_factory() as session, session.begin():
+            await session.execute(
+                insert(_users).values(
+                    email=f"user{i}@example.com",
+                    username=f"user{i}",
+                    first_name="Bench",
+                    last_name=str(i),
+                    is_superuser=False,
+                    is_active=True,
+                    join_time=now,
+                    created_time=now,
+                )
+            )
+
+    async def read(i: int):  # pylint: disable=unused-argument
+        user_id = random.randint(1, args.operations)  # noqa: S311
+        async with session_factory() as session:
+            await session.scalar(select(_users).where(_users.c.id == user_id))
+
+    for name, operation in (("write", write), ("read", read)):
+        latencies, elapsed = await timed_workers(
+            args.workers, args.operations, operation
+        )
+        print(  # noqa: T201
+            f"{profile:<11} {name:<5} "
+            f"throughput={len(latencies) / elapsed:8.1f}/s "
+            f"p50={statistics.median(latencies):7.2f}ms "
+            f"p99={percentile(latencies, 99):7.2f}ms"
+        )
+    await engine.dispose()
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run every selected profile.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        for profile in args.profiles:
+            await bench_profile(
+                os.path.join(tmp, f"{profile}.db"), profile, args
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--operations", type=int, default=2000)
+    parser.add_argument(
+        "--profiles", nargs="+", choices=list(PROFILES), default=list(PROFILES)
+    )
+    asyncio.run(main(parser.parse_args()))
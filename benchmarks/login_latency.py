@@ -0,0 +1,168 @@
+"""Measure ``/login/test-token`` latency while ``/login`` is hammered.
+
+Password hashing runs in a worker pool, so token checks served by the same
+event loop should keep a flat p99 while logins are in flight.
+
+Usage::
+
+    python -m benchmarks.login_latency --logins 200 --probes 300
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from src.auth.hashing import password_hasher
+from src.auth.passwords import get_password_hash
+from src.config import settings
+from src.db.base import Base
+from src.db.session import create_engine_and_session, get_db
+from src.main import app
+from src.users.model import User
+
+USERNAME = "bench"
+PASSWORD = "bench-password"
+
+
+def percentile(values: list[float], pct: float) -> float:
+    """Nearest rank percentile.
+
+    Args:
+        values (list[float]): Samples
+        pct (float): Percentile between 0 and 100
+
+    Returns:
+        float: Percentile value
+    """
+    ordered = sorted(values)
+    index = max(0, round(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+async def setup_database(url: str):
+    """Create tables and the benchmark user.
+
+    Args:
+        url (str): Database url
+
+    Returns:
+        async_sessionmaker: Session factory
+    """
+    engine, session_factory = create_engine_and_session(url)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with session_factory() as session:
+        session.add(
+            User(
+                email="bench@example.com",
+                username=USERNAME,
+                password=get_password_hash(PASSWORD),
+                first_name="Bench",
+                last_name="User",
+            )
+        )
+        await session.commit()
+
+    async def override_get_db():
+        async with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+
+
+async def probe(client: httpx.AsyncClient, token: str, count: int) -> list:
+    """Time sequential token checks.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the app
+        token (str): Access token
+        count (int): Number of requests
+
+    Returns:
+        list: Latencies in milliseconds
+    """
+    headers = {"Authorization": f"Bearer {token}"}
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        await client.post(
+            f"{settings.base.API_V1_STR}/login/test-token", headers=headers
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+async def hammer(client: httpx.AsyncClient, count: int, concurrency: int):
+    """Send login requests with bounded concurrency.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the app
+        count (int): Number of logins
+        concurrency (int): Logins in flight at once
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    data = {"username": USERNAME, "password": PASSWORD}
+
+    async def one():
+        async with semaphore:
+            await client.post(f"{settings.base.API_V1_STR}/login", data=data)
+
+    await asyncio.gather(*(one() for _ in range(count)))
+
+
+def report(label: str, latencies: list[float]) -> None:
+    """Print latency summary.
+
+    Args:
+        label (str): Scenario name
+        latencies (list[float]): Samples in milliseconds
+    """
+    print(  # noqa: T201
+        f"{label:<12} n={len(latencies):<5} "
+        f"p50={statistics.median(latencies):7.2f}ms "
+        f"p99={percentile(latencies, 99):7.2f}ms "
+        f"max={max(latencies):7.2f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the idle and loaded scenarios.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        await setup_database(
+            f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            response = await client.post(
+                f"{settings.base.API_V1_STR}/login",
+                data={"username": USERNAME, "password": PASSWORD},
+            )
+            token = response.json()["data"]["access_token"]
+
+            report("idle", await probe(client, token, args.probes))
+
+            load = asyncio.create_task(
+                hammer(client, args.logins, args.concurrency)
+            )
+            report("under load", await probe(client, token, args.probes))
+            await load
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--probes", type=int, default=300)
+    asyncio.run(main(parser.parse_args()))
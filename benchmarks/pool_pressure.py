@@ -0,0 +1,97 @@
+"""Measure connection pool usage of ``/login`` and ``/login/test-token``.
+
+Logins read the user, verify the password and write the login time. The
+session returns its connection to the pool while the password is
+verified, ``--hold`` keeps it for comparison. Token checks served from the
+user cache should not check out any connection.
+
+Usage::
+
+    python -m benchmarks.pool_pressure --logins 200 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+
+import httpx
+
+from benchmarks.login_latency import PASSWORD, USERNAME, hammer, setup_database
+from src.auth.hashing import password_hasher
+from src.config import settings
+from src.db.pool import pool_monitor
+from src.db.transaction import UnitOfWorkSession
+from src.main import app
+
+
+def report(label: str, before: dict, requests: int) -> None:
+    """Print pool usage since a snapshot.
+
+    Args:
+        label (str): Scenario name
+        before (dict): Pool counters before the scenario
+        requests (int): Number of requests sent
+    """
+    after = pool_monitor.stats()
+    checkouts = after["checkouts"] - before["checkouts"]
+    print(  # noqa: T201
+        f"{label:<12} checkouts/request={checkouts / requests:5.2f} "
+        f"peak_in_use={after['peak_in_use']:<3} "
+        f"mean_hold={after['mean_hold_ms']:7.2f}ms"
+    )
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run the login and token check scenarios.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    if args.hold:
+
+        async def release(self) -> None:  # pylint: disable=unused-argument
+            return None
+
+        UnitOfWorkSession.release = release
+    with tempfile.TemporaryDirectory() as tmp:
+        await setup_database(
+            f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            response = await client.post(
+                f"{settings.base.API_V1_STR}/login",
+                data={"username": USERNAME, "password": PASSWORD},
+            )
+            token = response.json()["data"]["access_token"]
+
+            before = pool_monitor.stats()
+            await hammer(client, args.logins, args.concurrency)
+            report("login", before, args.logins)
+
+            headers = {"Authorization": f"Bearer {token}"}
+            await client.post(
+                f"{settings.base.API_V1_STR}/login/test-token", headers=headers
+            )
+            before = pool_monitor.stats()
+            for _ in range(args.probes):
+                await client.post(
+                    f"{settings.base.API_V1_STR}/login/test-token",
+                    headers=headers,
+                )
+            report("test-token", before, args.probes)
+    password_hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--probes", type=int, default=100)
+    parser.add_argument(
+        "--hold", action="store_true", help="keep connections while hashing"
+    )
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,115 @@
+"""Measure the Python overhead of a lookup with and without prebuilt statements.
+
+The ad hoc path builds ``select(User).where(User.username == value)`` per
+call, as ``_get`` did, the prebuilt path is ``_get`` reading the statement
+from the registry. Both run against an in-memory SQLite database holding a
+single row, so the time is dominated by statement handling rather than
+I/O.
+
+Usage::
+
+    python -m benchmarks.statement_cache --lookups 20000
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import bindparam, select
+
+from src.db.base import Base
+from src.db.session import create_engine_and_session
+from src.db.statements import statement_registry
+from src.users.model import User
+from src.users.repository import UsersRepository
+
+repository = UsersRepository()
+
+
+async def ad_hoc(session, username: str) -> User | None:
+    """Build the lookup statement for this call.
+
+    Args:
+        session (AsyncSession): database session
+        username (str): User name
+
+    Returns:
+        User | None: User
+    """
+    query = (
+        select(User)
+        .where(User.username == username)
+        .options(*repository.default_options)
+    )
+    return (await session.execute(query)).scalars().one_or_none()
+
+
+async def prebuilt(session, username: str) -> User | None:
+    """Run the registered lookup statement.
+
+    Args:
+        session (AsyncSession): database session
+        username (str): User name
+
+    Returns:
+        User | None: User
+    """
+    return await repository.get_by_username(session, username)
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Time both lookups.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    engine, session_factory = create_engine_and_session("sqlite+aiosqlite://")
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        async with session_factory() as session:
+            await repository.save_many(
+                session,
+                [
+                    {
+                        "email": "bench@example.com",
+                        "username": "bench",
+                        "password": "hashed",
+                        "first_name": "Bench",
+                        "last_name": "Mark",
+                    }
+                ],
+            )
+            for name, lookup in (("ad hoc", ad_hoc), ("prebuilt", prebuilt)):
+                await lookup(session, "bench")
+                start = time.perf_counter()
+                for _ in range(args.lookups):
+                    await lookup(session, "bench")
+                elapsed = time.perf_counter() - start
+                print(  # noqa: T201
+                    f"{name:<9} {elapsed / args.lookups * 1e6:8.1f}us/lookup"
+                )
+    finally:
+        await engine.dispose()
+
+    # Statement construction and cache key generation alone
+    username = User.username
+    start = time.perf_counter()
+    for _ in range(args.lookups):
+        select(User).where(username == "bench")._generate_cache_key()
+    build = (time.perf_counter() - start) / args.lookups
+    query = select(User).where(username == bindparam("value"))
+    start = time.perf_counter()
+    for _ in range(args.lookups):
+        query._generate_cache_key()
+    reuse = (time.perf_counter() - start) / args.lookups
+    print(  # noqa: T201
+        f"cache key build={build * 1e6:.1f}us prebuilt={reuse * 1e6:.2f}us"
+    )
+    print(statement_registry.stats())  # noqa: T201
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lookups", type=int, default=20000)
+    asyncio.run(main(parser.parse_args()))
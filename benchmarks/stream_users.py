@@ -0,0 +1,113 @@
+"""Compare the peak memory of a buffered and a streamed full table read.
+
+The buffered read loads every user with ``scalars().all()`` before
+iterating, the streamed read is ``BaseRepository._all`` fetching batches
+from a cursor.
+
+Usage::
+
+    python -m benchmarks.stream_users --rows 10000 100000
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+
+from sqlalchemy import select
+
+from src.db.base import Base
+from src.db.repository import BaseRepository
+from src.db.session import create_engine_and_session
+from src.users.model import User
+
+repository = BaseRepository(User)
+
+
+async def buffered(session) -> int:
+    """Read every user at once.
+
+    Args:
+        session (AsyncSession): database session
+
+    Returns:
+        int: Number of users read
+    """
+    users = (await session.scalars(select(User))).all()
+    return sum(1 for _ in users)
+
+
+async def streamed(session, yield_per: int, projected: bool) -> int:
+    """Stream every user in batches.
+
+    Args:
+        session (AsyncSession): database session
+        yield_per (int): Rows per fetched batch
+        projected (bool): Read the id and email only
+
+    Returns:
+        int: Number of users read
+    """
+    columns = ("id", "email") if projected else None
+    count = 0
+    async for _ in repository._all(session, yield_per, columns):
+        count += 1
+    return count
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run every read for every row count.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            engine, session_factory = create_engine_and_session(
+                f"sqlite+aiosqlite:///{os.path.join(tmp, f'users{rows}.db')}"
+            )
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                async with session_factory() as session:
+                    await repository.save_many(
+                        session,
+                        [
+                            {
+                                "email": f"user{i}@example.com",
+                                "username": f"user{i}",
+                                "password": "hashed",
+                                "first_name": "Bench",
+                                "last_name": str(i),
+                            }
+                            for i in range(rows)
+                        ],
+                    )
+                reads = {
+                    "buffered": buffered,
+                    "streamed": lambda s: streamed(s, args.yield_per, False),
+                    "projected": lambda s: streamed(s, args.yield_per, True),
+                }
+                for name, read in reads.items():
+                    async with session_factory() as session:
+                        tracemalloc.start()
+                        start = time.perf_counter()
+                        count = await read(session)
+                        elapsed = time.perf_counter() - start
+                        _, peak = tracemalloc.get_traced_memory()
+                        tracemalloc.stop()
+                    print(  # noqa: T201
+                        f"rows={count:<7} {name:<9} time={elapsed:6.2f}s "
+                        f"peak={peak / 2**20:8.1f}MiB"
+                    )
+            finally:
+                await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--yield-per", type=int, default=500)
+    asyncio.run(main(parser.parse_args()))
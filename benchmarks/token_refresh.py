@@ -0,0 +1,118 @@
+"""Measure ``/token/new`` throughput with refresh token rotation.
+
+Each client logs in once and then keeps rotating its own refresh token,
+so every request advances a token family with one indexed write.
+
+Usage::
+
+    python -m benchmarks.token_refresh --clients 8 --refreshes 200
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+from benchmarks.login_latency import (
+    PASSWORD,
+    USERNAME,
+    percentile,
+    setup_database,
+)
+from src.auth.hashing import password_hasher
+from src.config import settings
+from src.main import app
+
+
+async def login(client: httpx.AsyncClient) -> dict:
+    """Start a new token family.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the app
+
+    Returns:
+        dict: Login token data
+    """
+    response = await client.post(
+        f"{settings.base.API_V1_STR}/login",
+        data={"username": USERNAME, "password": PASSWORD},
+    )
+    return response.json()["data"]
+
+
+async def refresh_loop(
+    client: httpx.AsyncClient, tokens: dict, count: int
+) -> list[float]:
+    """Rotate the refresh token of one family sequentially.
+
+    Args:
+        client (httpx.AsyncClient): Client bound to the app
+        tokens (dict): Login token data
+        count (int): Number of refreshes
+
+    Raises:
+        RuntimeError: If a refresh is rejected
+
+    Returns:
+        list[float]: Latencies in milliseconds
+    """
+    latencies = []
+    for _ in range(count):
+        start = time.perf_counter()
+        response = await client.post(
+            f"{settings.base.API_V1_STR}/token/new",
+            params={"refresh_token": tokens["refresh_token"]},
+            headers={"Authorization": f"Bearer {tokens['access_token']}"},
+        )
+        latencies.append((time.perf_counter() - start) * 1000)
+        body = response.json()
+        if body["code"] != 200:
+            raise RuntimeError(f"Refresh failed {body}")
+        tokens = body["data"]
+    return latencies
+
+
+async def main(args: argparse.Namespace) -> None:
+    """Run concurrent refresh loops and print the throughput.
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        await setup_database(
+            f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        )
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            # Logins are sequential, only the refreshes are measured
+            families = [await login(client) for _ in range(args.clients)]
+            start = time.perf_counter()
+            results = await asyncio.gather(
+                *(
+                    refresh_loop(client, tokens, args.refreshes)
+                    for tokens in families
+                )
+            )
+            elapsed = time.perf_counter() - start
+    password_hasher.shutdown()
+
+    latencies = [value for result in results for value in result]
+    print(  # noqa: T201
+        f"refreshes={len(latencies)} clients={args.clients} "
+        f"throughput={len(latencies) / elapsed:8.1f}/s "
+        f"p50={statistics.median(latencies):7.2f}ms "
+        f"p99={percentile(latencies, 99):7.2f}ms"
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--refreshes", type=int, default=200)
+    asyncio.run(main(parser.parse_args()))
@@ -7,9 +7,10 @@ from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.security.utils import get_authorization_scheme_param
 
 from src.api.deps import CurrentUser, get_current_user
-from src.auth.service import login, new_token
+from src.auth.service import login, logout, new_token
 from src.common.response.response_schema import ResponseModel, response_base
 from src.db.session import CurrentSession
+from src.db.transaction import transaction
 
 router = APIRouter()
 
@@ -19,20 +20,27 @@ router = APIRouter()
     summary="User login",
     description="Generate reusable access token.",
 )
+@transaction
 async def user_login(
+    request: Request,
     form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
     session: CurrentSession,
 ) -> ResponseModel:
     """User authentication.
 
     Args:
+        request (Request): Current app request
         form_data (AuthSchemaBase): User login data
         session (CurrentSession): database session
 
     Returns:
         ResponseModel: User token data if succeed
     """
-    data = await login(db=session, form_data=form_data)
+    data = await login(
+        db=session,
+        form_data=form_data,
+        client_ip=request.client.host if request.client else None,
+    )
     return await response_base.success(data=data)
 
 
@@ -69,12 +77,31 @@ async def create_new_token(
     Returns:
         ResponseModel: Token data
     """
-    authorization = request.headers.get("Authorization")
-    _, token = get_authorization_scheme_param(authorization)
     data = await new_token(
-        request=request,
-        db=session,
-        refresh_token=refresh_token,
-        current_token=token,
+        request=request, db=session, refresh_token=refresh_token
     )
     return await response_base.success(data=data)
+
+
+@router.post(
+    "/logout",
+    summary="User logout",
+    dependencies=[Depends(get_current_user)],
+)
+async def user_logout(
+    request: Request,
+    all_sessions: Annotated[bool, Query()] = False,
+) -> ResponseModel:
+    """Revoke the current access token.
+
+    Args:
+        request (Request): Current app request
+        all_sessions (Annotated[bool, Query): Revoke the tokens of every session of the user
+
+    Returns:
+        ResponseModel: Empty response
+    """
+    authorization = request.headers.get("Authorization")
+    _, token = get_authorization_scheme_param(authorization)
+    await logout(token=token, all_sessions=all_sessions)
+    return await response_base.success()
@@ -0,0 +1,34 @@
+"""Module to publish the token verification keys."""
+
+from fastapi import APIRouter, Request, Response
+
+from src.auth.keys import key_ring
+from src.config import settings
+
+router = APIRouter()
+
+
+@router.get(
+    "/jwks.json",
+    summary="JSON Web Key Set",
+    description="Public keys to verify access tokens without calling us.",
+)
+async def jwks(request: Request) -> Response:
+    """Serve the pre-serialized public key set.
+
+    Args:
+        request (Request): Current app request
+
+    Returns:
+        Response: Key set, or 304 if the client copy is current
+    """
+    body = key_ring.jwks
+    headers = {
+        "Cache-Control": f"public, max-age={settings.base.JWKS_MAX_AGE_SECONDS}",
+        "ETag": key_ring.jwks_etag,
+    }
+    if request.headers.get("if-none-match") == key_ring.jwks_etag:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=body, media_type="application/json", headers=headers
+    )
@@ -1,14 +1,15 @@
 """Dependencies for API."""
 from typing import Annotated
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from fastapi.security import OAuth2PasswordBearer
 
 from src.auth.security import decode_token
-from src.common.exception.errors import HTTPError
+from src.common.exception.errors import HTTPError, TokenError
 from src.config.base import settings
 from src.db.session import CurrentSession
-from src.users.model import User
+from src.users.repository import UsersCRUD
+from src.users.schemas import CurrentUserInfo
 
 reusable_oauth2 = OAuth2PasswordBearer(
     tokenUrl=f"{settings.base.API_V1_STR}/login"
@@ -17,12 +18,17 @@ TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
 async def get_current_user(
+    request: Request,
     session: CurrentSession,
     token: TokenDep,
-) -> User:
+) -> CurrentUserInfo:
     """Check current user credentials.
 
+    The user is resolved once per request and kept in ``request.state``,
+    users are served from the per worker snapshot cache.
+
     Args:
+        request (Request): Current app request
         session (CurrentSession): Current db session
         token (str): Get the Bearer token
 
@@ -30,15 +36,23 @@ async def get_current_user(
         HTTPException: _description_
 
     Returns:
-        User: Current user details
+        CurrentUserInfo: Current user details
     """
+    user = getattr(request.state, "current_user", None)
+    if user is not None:
+        return user
+
     token_data = decode_token(token)
-    user = await session.get(User, token_data.sub)
-    if not user:
+    if token_data.fam is not None:
+        raise TokenError(msg="Refresh tokens cannot authenticate requests")
+    user = await UsersCRUD.get_cached(session, token_data.sub)
+    if user is None:
         raise HTTPError(code=404, msg="User not found")
     if not user.is_active:
         raise HTTPError(code=400, msg="Inactive user")
+
+    request.state.current_user = user
     return user
 
 
-CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentUser = Annotated[CurrentUserInfo, Depends(get_current_user)]
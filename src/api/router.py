@@ -3,6 +3,7 @@
 from fastapi import APIRouter
 
 from src.api.auth.auth import router as auth_router
+from src.api.auth.jwks import router as jwks_router
 from src.api.user.user import router as user_router
 from src.config import settings
 
@@ -10,3 +11,7 @@ v1 = APIRouter(prefix=settings.base.API_V1_STR)
 
 v1.include_router(user_router)
 v1.include_router(auth_router)
+
+well_known = APIRouter(prefix="/.well-known")
+
+well_known.include_router(jwks_router)
@@ -1,9 +1,15 @@
 """Module to register users routes."""
 
-from fastapi import APIRouter
+from typing import Literal
 
+from fastapi import APIRouter, Depends, Query
+from fastapi_pagination.cursor import CursorParams
+
+from src.api.deps import CurrentUser
 from src.common.response.response_schema import ResponseModel, response_base
+from src.db.counts import CountMode
 from src.db.session import CurrentSession
+from src.db.transaction import transaction
 from src.users.schemas import UserCreateOpen
 from src.users.service import user_service
 
@@ -11,6 +17,7 @@ router = APIRouter()
 
 
 @router.post("/register", summary="Register user")
+@transaction
 async def register_user(
     obj: UserCreateOpen, session: CurrentSession
 ) -> ResponseModel:
@@ -25,3 +32,43 @@ async def register_user(
     """
     user_data = await user_service.register(user_data=obj, db=session)
     return await response_base.success(data=user_data)
+
+
+@router.get("/users", summary="List users")
+async def list_users(
+    current_user: CurrentUser,
+    session: CurrentSession,
+    params: CursorParams = Depends(),
+    sort: Literal["id", "join_time", "last_login_time"] = "id",
+    descending: bool = False,
+    total: CountMode | None = None,
+    total_max_age: float | None = Query(default=None, ge=0),
+) -> ResponseModel:
+    """List users page by page, for superusers.
+
+    Pages are read with keyset pagination, pass ``next_page`` or
+    ``previous_page`` of a page as ``cursor`` to move. The total is only
+    counted on request, ``estimated`` and ``cached`` totals avoid a scan.
+
+    Args:
+        current_user (CurrentUser): Authenticated user
+        session (CurrentSession): db session
+        params (CursorParams, optional): Cursor and page size. Defaults to Depends().
+        sort (str, optional): Sort column. Defaults to "id".
+        descending (bool, optional): Sort in descending order. Defaults to False.
+        total (CountMode | None, optional): How to count every user. Defaults to None.
+        total_max_age (float | None, optional): Accepted age in seconds of a cached total. Defaults to None.
+
+    Returns:
+        ResponseModel: Page of users
+    """
+    page = await user_service.list_users(
+        current_user=current_user,
+        db=session,
+        params=params,
+        sort=sort,
+        descending=descending,
+        total=total,
+        total_max_age=total_max_age,
+    )
+    return await response_base.success(data=page)
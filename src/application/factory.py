@@ -1,6 +1,7 @@
 """Module."""
 
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
@@ -8,9 +9,24 @@ from fastapi_pagination import add_pagination
 from starlette.middleware.cors import CORSMiddleware
 
 from src.api.router import v1 as route
+from src.api.router import well_known
+from src.auth.families import refresh_families
+from src.auth.hashing import password_hasher
+from src.auth.revocation import revocation_store
+from src.auth.security import token_cache
 from src.common.exception.exception_handler import register_exception
+from src.common.kv import kv_store
+from src.common.log import log
 from src.config import settings
 from src.config.path_conf import STATIC_DIR
+from src.db.pool import pool_monitor
+from src.db.session import async_db_router, async_engine
+from src.db.statements import statement_registry
+from src.db.tuning import tuning_report
+from src.mail.outbox import email_outbox
+from src.mail.templates import email_templates
+from src.users.cache import current_user_cache
+from src.users.login_time import login_time_buffer
 
 # from src.utils.openapi import simplify_operation_ids
 
@@ -31,7 +47,7 @@ def create(
         FastAPI: FastAPI application.
     """
     # Initialize the base FastAPI application
-    app = FastAPI(**kwargs)
+    app = FastAPI(lifespan=register_init, **kwargs)
 
     register_static_file(app)
     register_middleware(app)
@@ -43,6 +59,40 @@ def create(
     return app
 
 
+@asynccontextmanager
+async def register_init(app: FastAPI):  # pylint: disable=unused-argument
+    """Startup and shutdown hooks.
+
+    Args:
+        app (FastAPI): _description_
+    """
+    await tuning_report(async_engine, settings.database.DB_TUNING_PROFILE)
+    await revocation_store.start()
+    await login_time_buffer.start()
+    await refresh_families.start()
+    if settings.email.EMAILS_ENABLED:
+        email_templates.load()
+        await email_outbox.start()
+
+    yield
+
+    await email_outbox.stop()
+    await refresh_families.stop()
+    await login_time_buffer.stop()
+    await revocation_store.stop()
+    await kv_store.close()
+    log.info(f"Statement cache {statement_registry.stats()}")
+    log.info(f"Connection pool {pool_monitor.stats()}")
+    log.info(f"User cache {current_user_cache.stats()}")
+    log.info(f"Token cache {token_cache.stats()}")
+    log.info(f"Email template renders {email_templates.stats()}")
+    if async_db_router is not None:
+        await async_db_router.dispose()
+    else:
+        await async_engine.dispose()
+    password_hasher.shutdown()
+
+
 def register_static_file(app: FastAPI):
     """Static file interactive development mode, production uses nginx static resource service.
 
@@ -82,6 +132,7 @@ def register_router(app: FastAPI):
     """
     # API
     app.include_router(route)
+    app.include_router(well_known)
 
     # Extra
     # simplify_operation_ids(app)
@@ -0,0 +1,109 @@
+"""Pick password hash costs that meet a target verify latency on this host.
+
+Usage::
+
+    python -m src.auth.calibrate --target-ms 250
+    python -m src.auth.calibrate --scheme argon2 --target-ms 300
+
+The result is printed as environment variables for ``src/.env``.
+"""
+
+import argparse
+import statistics
+import time
+
+from passlib.context import CryptContext
+
+from src.auth.policy import build_crypt_context
+from src.config import settings
+
+# Costs below these are considered too weak regardless of the host speed
+MIN_BCRYPT_ROUNDS = 10
+MIN_ARGON2_TIME_COST = 2
+
+
+def measure_verify(context: CryptContext, samples: int) -> float:
+    """Median verify time of a freshly created hash.
+
+    Args:
+        context (CryptContext): Context configured with the candidate cost
+        samples (int): Number of timed verifications
+
+    Returns:
+        float: Median verify time in milliseconds
+    """
+    hashed = context.hash("calibration-password")
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify("calibration-password", hashed)
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings)
+
+
+def calibrate_bcrypt(target_ms: float, samples: int) -> int:
+    """Find the highest bcrypt cost verifying within the target.
+
+    Args:
+        target_ms (float): Target verify latency in milliseconds
+        samples (int): Timed verifications per candidate
+
+    Returns:
+        int: bcrypt rounds
+    """
+    best = MIN_BCRYPT_ROUNDS
+    for rounds in range(MIN_BCRYPT_ROUNDS, 20):
+        context = build_crypt_context(["bcrypt"], bcrypt_rounds=rounds)
+        elapsed = measure_verify(context, samples)
+        print(f"bcrypt rounds={rounds:<3} verify={elapsed:8.2f}ms")  # noqa: T201
+        if elapsed > target_ms:
+            break
+        best = rounds
+    return best
+
+
+def calibrate_argon2(target_ms: float, samples: int) -> int:
+    """Find the highest argon2 time cost verifying within the target.
+
+    Memory cost and parallelism are kept at their configured values.
+
+    Args:
+        target_ms (float): Target verify latency in milliseconds
+        samples (int): Timed verifications per candidate
+
+    Returns:
+        int: argon2 time cost
+    """
+    best = MIN_ARGON2_TIME_COST
+    for time_cost in range(MIN_ARGON2_TIME_COST, 64):
+        context = build_crypt_context(["argon2"], argon2_time_cost=time_cost)
+        elapsed = measure_verify(context, samples)
+        print(f"argon2 time_cost={time_cost:<3} verify={elapsed:8.2f}ms")  # noqa: T201
+        if elapsed > target_ms:
+            break
+        best = time_cost
+    return best
+
+
+def main() -> None:
+    """Run the calibration and print the chosen settings."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scheme",
+        choices=["bcrypt", "argon2"],
+        default=settings.base.PASSWORD_HASH_SCHEMES[0],
+    )
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--samples", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.scheme == "bcrypt":
+        cost = calibrate_bcrypt(args.target_ms, args.samples)
+        print(f"\nPASSWORD_BCRYPT_ROUNDS={cost}")  # noqa: T201
+    else:
+        cost = calibrate_argon2(args.target_ms, args.samples)
+        print(f"\nPASSWORD_ARGON2_TIME_COST={cost}")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,186 @@
+"""Refresh token rotation with token families.
+
+Every login starts a family, each refresh token carries the family id and
+its generation. Rotating a refresh token moves the family to the next
+generation with a single compare-and-set write, so presenting an older
+generation again means the token was stolen or replayed, and the whole
+family is revoked.
+
+Families that were never rotated have no row, the first rotation inserts
+it. Generations only grow and revocation is final, so the per worker
+cache of recent families stays correct without invalidation and rejects
+replays of hot families without touching the database.
+"""
+
+import asyncio
+from contextlib import suppress
+from datetime import datetime
+from uuid import uuid4
+
+from sqlalchemy import delete, insert, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.auth.model import RefreshTokenFamily
+from src.common.cache import TTLCache
+from src.common.exception.errors import TokenError
+from src.common.log import log
+from src.config import settings
+from src.db.session import async_db_session
+from src.users.schemas import TokenPayload
+from src.utils.timezone import timezone
+
+_families = RefreshTokenFamily.__table__
+
+
+class RefreshTokenFamilies:
+    """Tracks the current generation of every refresh token family."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        cache_maxsize: int,
+        cache_ttl: float,
+        purge_interval: float,
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            session_factory (async_sessionmaker[AsyncSession]): Sessions used to purge expired families
+            cache_maxsize (int): Maximum number of cached families
+            cache_ttl (float): Seconds a family stays cached
+            purge_interval (float): Seconds between expired family purges
+        """
+        self.session_factory = session_factory
+        self.purge_interval = purge_interval
+        # family id -> (generation, revoked)
+        self.cache: TTLCache[str, tuple[int, bool]] = TTLCache(
+            maxsize=cache_maxsize, ttl=cache_ttl
+        )
+        self._task: asyncio.Task | None = None
+
+    @staticmethod
+    def new_family() -> str:
+        """Id of a new family.
+
+        Returns:
+            str: Family id
+        """
+        return uuid4().hex
+
+    async def rotate(
+        self, session: AsyncSession, token: TokenPayload, expires_at: datetime
+    ) -> int:
+        """Move a family past the generation of a presented refresh token.
+
+        Args:
+            session (AsyncSession): database session
+            token (TokenPayload): Presented refresh token
+            expires_at (datetime): Expiry of the next refresh token
+
+        Raises:
+            TokenError: If the token is not the newest of a live family
+
+        Returns:
+            int: Generation of the next refresh token
+        """
+        family, generation = token.fam, token.gen or 0
+        cached = self.cache.get(family)
+        if cached is not None and (cached[1] or cached[0] > generation):
+            await self.revoke(session, family)
+            raise TokenError(msg="Refresh token reuse detected")
+
+        if generation == 0:
+            query = insert(_families).values(
+                family_id=family,
+                user_id=token.sub,
+                generation=1,
+                revoked=False,
+                expires_at=expires_at,
+            )
+        else:
+            query = (
+                update(_families)
+                .where(
+                    _families.c.family_id == family,
+                    _families.c.generation == generation,
+                    _families.c.revoked.is_(False),
+                )
+                .values(generation=generation + 1, expires_at=expires_at)
+            )
+        try:
+            result = await session.execute(query)
+            await session.commit()
+            rotated = result.rowcount == 1
+        except IntegrityError:
+            # The first generation of this family was already rotated
+            await session.rollback()
+            rotated = False
+
+        if not rotated:
+            await self.revoke(session, family)
+            raise TokenError(msg="Refresh token reuse detected")
+        self.cache.set(family, (generation + 1, False))
+        return generation + 1
+
+    async def revoke(self, session: AsyncSession, family: str) -> None:
+        """Revoke every refresh token of a family.
+
+        Args:
+            session (AsyncSession): database session
+            family (str): Family id
+        """
+        cached = self.cache.get(family)
+        if cached is not None and cached[1]:
+            return
+        await session.execute(
+            update(_families)
+            .where(_families.c.family_id == family)
+            .values(revoked=True)
+        )
+        await session.commit()
+        self.cache.set(family, (cached[0] if cached else 0, True))
+        log.warning(f"Refresh token family {family} revoked")
+
+    async def purge(self) -> int:
+        """Delete the families whose last refresh token expired.
+
+        Returns:
+            int: Number of deleted families
+        """
+        async with self.session_factory() as session, session.begin():
+            result = await session.execute(
+                delete(_families).where(
+                    _families.c.expires_at < timezone.now_utc()
+                )
+            )
+        return result.rowcount
+
+    async def _run(self) -> None:
+        """Purge expired families until cancelled."""
+        while True:
+            await asyncio.sleep(self.purge_interval)
+            try:
+                await self.purge()
+            except SQLAlchemyError as e:
+                log.error(f"Refresh token family purge failed {e}")
+
+    async def start(self) -> None:
+        """Start the background purge."""
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background purge."""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+
+refresh_families = RefreshTokenFamilies(
+    session_factory=async_db_session,
+    cache_maxsize=settings.base.REFRESH_FAMILY_CACHE_MAXSIZE,
+    cache_ttl=settings.base.REFRESH_FAMILY_CACHE_TTL_SECONDS,
+    purge_interval=settings.base.REFRESH_FAMILY_PURGE_SECONDS,
+)
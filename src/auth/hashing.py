@@ -0,0 +1,198 @@
+"""Password hashing service running outside of the event loop."""
+
+import asyncio
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable
+
+from src.auth.passwords import (
+    get_password_hash,
+    is_password_hashed,
+    verify_and_update_password,
+    verify_password,
+)
+from src.common.exception import errors
+from src.common.log import log
+from src.common.response.response_code import CustomResponseCode
+from src.config import settings
+
+
+class PasswordHasher:
+    """Run password hashing and verification in a bounded worker pool.
+
+    Hashing is CPU bound and takes hundreds of milliseconds, running it
+    inline blocks every other request served by the same event loop.
+    """
+
+    def __init__(
+        self, pool_size: int, max_pending: int, timeout: float
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            pool_size (int): Worker processes, 0 uses the default thread pool
+            max_pending (int): Jobs allowed to be queued or running at once
+            timeout (float): Seconds to wait for a single job
+        """
+        self.pool_size = pool_size
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pending = 0
+        self._executor: ProcessPoolExecutor | None = None
+
+    @property
+    def pending(self) -> int:
+        """Number of jobs currently queued or running."""
+        return self._pending
+
+    def _get_executor(self) -> Executor | None:
+        """Lazily start the worker processes.
+
+        Returns:
+            Executor | None: Process pool or None for the default executor
+        """
+        if self.pool_size <= 0:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.pool_size,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _finished(self, future: asyncio.Future) -> None:
+        """Count a job as done once its worker is free again.
+
+        Args:
+            future (asyncio.Future): Job future
+        """
+        self._pending -= 1
+        if not future.cancelled():
+            # Retrieved here as well for jobs nobody waits on anymore
+            future.exception()
+
+    async def _submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Run a job in the pool and wait for its result.
+
+        A job that times out keeps its worker busy, it stays pending until
+        it actually ends so ``max_pending`` bounds the work of the pool.
+
+        Args:
+            func (Callable[..., Any]): Picklable module level function
+            *args (Any): Function arguments
+
+        Raises:
+            errors.CustomError: If the job timed out
+            BrokenProcessPool: If a worker process died, the pool is dropped
+
+        Returns:
+            Any: Function result
+        """
+        executor = self._get_executor()
+        try:
+            # A pool broken while nobody waited on it refuses new jobs
+            future = asyncio.get_running_loop().run_in_executor(
+                executor, func, *args
+            )
+            self._pending += 1
+            future.add_done_callback(self._finished)
+            return await asyncio.wait_for(
+                asyncio.shield(future), timeout=self.timeout
+            )
+        except asyncio.TimeoutError as e:
+            raise errors.CustomError(error=CustomResponseCode.HTTP_503) from e
+        except BrokenProcessPool:
+            # Concurrent jobs fail together, only the first one replaces the pool
+            if self._executor is executor:
+                self.shutdown()
+            raise
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Submit a job to the pool, once more if a worker process died.
+
+        Args:
+            func (Callable[..., Any]): Picklable module level function
+            *args (Any): Function arguments
+
+        Raises:
+            errors.CustomError: If the queue is full, the job timed out or the pool broke twice
+
+        Returns:
+            Any: Function result
+        """
+        if self._pending >= self.max_pending:
+            raise errors.CustomError(error=CustomResponseCode.HTTP_503)
+        try:
+            return await self._submit(func, *args)
+        except BrokenProcessPool as e:
+            log.warning(f"Password hashing pool broken, restarting it {e}")
+        try:
+            return await self._submit(func, *args)
+        except BrokenProcessPool as e:
+            raise errors.CustomError(error=CustomResponseCode.HTTP_503) from e
+
+    async def hash(self, password: str) -> str:
+        """Hash a plain password.
+
+        Args:
+            password (str): Plain password
+
+        Returns:
+            str: Password hash
+        """
+        return await self._run(get_password_hash, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verify a plain password against its hash.
+
+        Args:
+            plain_password (str): Plain password
+            hashed_password (str): Stored password hash
+
+        Returns:
+            bool: True if the password matches
+        """
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        """Verify a password and return an upgraded hash when needed.
+
+        Args:
+            plain_password (str): Plain password
+            hashed_password (str): Stored password hash
+
+        Returns:
+            tuple[bool, str | None]: Verification result and the new hash
+        """
+        return await self._run(
+            verify_and_update_password, plain_password, hashed_password
+        )
+
+    async def ensure_hashed(self, password: str | None) -> str | None:
+        """Hash the password unless it is empty or already hashed.
+
+        Args:
+            password (str | None): Plain or hashed password
+
+        Returns:
+            str | None: Password hash
+        """
+        if not password or is_password_hashed(password):
+            return password
+        return await self.hash(password)
+
+    def shutdown(self) -> None:
+        """Stop the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+password_hasher = PasswordHasher(
+    pool_size=settings.base.PASSWORD_HASH_POOL_SIZE,
+    max_pending=settings.base.PASSWORD_HASH_MAX_PENDING,
+    timeout=settings.base.PASSWORD_HASH_TIMEOUT_SECONDS,
+)
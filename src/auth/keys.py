@@ -0,0 +1,350 @@
+"""JWT signing key ring with ``kid`` based rotation.
+
+Keys are read from ``JWT_KEYS_FILE``, a JSON document such as::
+
+    {
+        "active_kid": "2024-06",
+        "keys": [
+            {"kid": "2024-06", "alg": "EdDSA", "private_key_file": "ed25519.pem"},
+            {"kid": "2024-01", "alg": "RS256", "public_key_file": "old.pub.pem"},
+            {"kid": "legacy", "alg": "HS256", "secret": "..."}
+        ]
+    }
+
+Keys without private material only verify tokens, which lets a retired key
+keep validating the tokens it signed until they expire. The file is checked
+for changes while the app runs, so keys rotate without a restart. Without a
+keys file a single HMAC key is derived from ``SECRET_KEY``, or from a secret
+generated once per host and shared by all workers.
+"""
+
+import hashlib
+import json
+import os
+import secrets
+import time
+from dataclasses import dataclass
+from typing import Any, Callable
+
+import jwt
+
+from src.common.log import log
+from src.config import settings
+from src.config.path_conf import KEYS_DIR
+
+HMAC_ALGORITHMS = {"HS256", "HS384", "HS512"}
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    """Pre-parsed key, reused for every token it signs or verifies."""
+
+    kid: str
+    algorithm: str
+    signing_key: Any | None
+    verifying_key: Any
+    public_jwk: dict[str, Any] | None = None
+
+
+def _read_material(spec: dict[str, Any], name: str, base_dir: str) -> str:
+    """Return inline key material or the content of the referenced file.
+
+    Args:
+        spec (dict[str, Any]): Key entry from the keys file
+        name (str): Material name, ``private_key`` or ``public_key``
+        base_dir (str): Directory relative file paths are resolved from
+
+    Returns:
+        str: PEM encoded key or an empty string
+    """
+    if spec.get(name):
+        return spec[name]
+    path = spec.get(f"{name}_file")
+    if not path:
+        return ""
+    with open(os.path.join(base_dir, path), encoding="utf-8") as f:
+        return f.read()
+
+
+def load_key(spec: dict[str, Any], base_dir: str = "") -> SigningKey:
+    """Parse one key entry.
+
+    Args:
+        spec (dict[str, Any]): Key entry with ``kid``, ``alg`` and material
+        base_dir (str, optional): Directory of the keys file. Defaults to "".
+
+    Raises:
+        ValueError: If the entry has no key material
+
+    Returns:
+        SigningKey: Parsed key
+    """
+    kid, alg = spec["kid"], spec["alg"]
+    algorithm = jwt.get_algorithm_by_name(alg)
+
+    if alg in HMAC_ALGORITHMS:
+        key = algorithm.prepare_key(spec["secret"])
+        return SigningKey(
+            kid=kid, algorithm=alg, signing_key=key, verifying_key=key
+        )
+
+    private_pem = _read_material(spec, "private_key", base_dir)
+    public_pem = _read_material(spec, "public_key", base_dir)
+    if private_pem:
+        private_key = algorithm.prepare_key(private_pem)
+        public_key = private_key.public_key()
+    elif public_pem:
+        private_key = None
+        public_key = algorithm.prepare_key(public_pem)
+    else:
+        raise ValueError(f"Signing key {kid} has no key material")
+
+    jwk = algorithm.to_jwk(public_key, as_dict=True)
+    jwk.update(kid=kid, alg=alg, use="sig")
+    return SigningKey(
+        kid=kid,
+        algorithm=alg,
+        signing_key=private_key,
+        verifying_key=public_key,
+        public_jwk=jwk,
+    )
+
+
+def shared_secret(path: str) -> str:
+    """Return the host wide secret, creating it on first use.
+
+    The file is created exclusively, so concurrently starting workers end
+    up with the same secret.
+
+    Args:
+        path (str): Secret file path
+
+    Returns:
+        str: Secret
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        for _ in range(50):
+            with open(path, encoding="utf-8") as f:
+                secret = f.read().strip()
+            if secret:
+                return secret
+            # Another worker created the file but has not written it yet
+            time.sleep(0.01)
+        raise
+    secret = secrets.token_urlsafe(32)
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        f.write(secret)
+    return secret
+
+
+class KeyRing:
+    """Signing keys indexed by ``kid`` and the published key set."""
+
+    def __init__(
+        self,
+        keys_file: str | None,
+        secret_key: str | None,
+        algorithm: str,
+        reload_interval: float,
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            keys_file (str | None): JSON keys file path
+            secret_key (str | None): HMAC secret used without a keys file
+            algorithm (str): HMAC algorithm used without a keys file
+            reload_interval (float): Seconds between keys file change checks
+        """
+        self.keys_file = keys_file
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+        self.reload_interval = reload_interval
+        self._keys: dict[str, SigningKey] = {}
+        self._active: SigningKey | None = None
+        self._jwks = b'{"keys":[]}'
+        self._jwks_etag = ""
+        self._mtime: int | None = None
+        self._checked_at = 0.0
+        self._listeners: list[Callable[[], None]] = []
+        self.load()
+
+    def _fallback_keys(self) -> tuple[dict[str, SigningKey], str]:
+        """Single HMAC key when no keys file is configured.
+
+        Returns:
+            tuple[dict[str, SigningKey], str]: Keys and the active kid
+        """
+        secret = self.secret_key or shared_secret(
+            os.path.join(KEYS_DIR, "secret_key")
+        )
+        kid = "hs-" + hashlib.sha256(secret.encode()).hexdigest()[:12]
+        key = load_key({"kid": kid, "alg": self.algorithm, "secret": secret})
+        return {kid: key}, kid
+
+    def _file_keys(self) -> tuple[dict[str, SigningKey], str]:
+        """Keys declared in the keys file.
+
+        Raises:
+            ValueError: If no key can sign tokens
+
+        Returns:
+            tuple[dict[str, SigningKey], str]: Keys and the active kid
+        """
+        with open(self.keys_file, encoding="utf-8") as f:
+            document = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(self.keys_file))
+        keys = {
+            spec["kid"]: load_key(spec, base_dir) for spec in document["keys"]
+        }
+        active_kid = document.get("active_kid") or next(
+            (kid for kid, key in keys.items() if key.signing_key), None
+        )
+        if active_kid not in keys or keys[active_kid].signing_key is None:
+            raise ValueError("JWT keys file has no usable active signing key")
+        return keys, active_kid
+
+    def load(self) -> None:
+        """Parse the keys and rebuild the published key set."""
+        if self.keys_file and os.path.exists(self.keys_file):
+            self._mtime = os.stat(self.keys_file).st_mtime_ns
+            keys, active_kid = self._file_keys()
+        else:
+            keys, active_kid = self._fallback_keys()
+
+        jwks = json.dumps(
+            {"keys": [k.public_jwk for k in keys.values() if k.public_jwk]},
+            separators=(",", ":"),
+        ).encode()
+        self._keys, self._active = keys, keys[active_kid]
+        self._jwks = jwks
+        self._jwks_etag = f'"{hashlib.sha256(jwks).hexdigest()[:16]}"'
+        log.info(f"JWT key ring loaded, active kid {active_kid}")
+
+    def maybe_reload(self, force: bool = False) -> bool:
+        """Reload the keys if the keys file changed.
+
+        Args:
+            force (bool, optional): Check now instead of waiting for the interval. Defaults to False.
+
+        Returns:
+            bool: True if the keys were reloaded
+        """
+        now = time.monotonic()
+        if not self.keys_file or (
+            not force and now - self._checked_at < self.reload_interval
+        ):
+            return False
+        self._checked_at = now
+        try:
+            mtime = os.stat(self.keys_file).st_mtime_ns
+        except FileNotFoundError:
+            return False
+        if mtime == self._mtime:
+            return False
+
+        removed = set(self._keys)
+        try:
+            self.load()
+        except (OSError, KeyError, ValueError) as e:
+            # Keep signing with the previous keys until the file is fixed
+            log.error(f"JWT keys file reload failed {e}")
+            return False
+        removed -= set(self._keys)
+        if removed:
+            for listener in self._listeners:
+                listener()
+        return True
+
+    def add_listener(self, listener: Callable[[], None]) -> None:
+        """Register a callback run when keys are removed from the ring.
+
+        Args:
+            listener (Callable[[], None]): Callback
+        """
+        self._listeners.append(listener)
+
+    @property
+    def active(self) -> SigningKey:
+        """Key used to sign new tokens."""
+        self.maybe_reload()
+        return self._active
+
+    def get(self, kid: str | None) -> SigningKey | None:
+        """Find the key that signed a token.
+
+        Args:
+            kid (str | None): Key id from the token header, tokens without one use the active key
+
+        Returns:
+            SigningKey | None: Key or None if unknown
+        """
+        self.maybe_reload()
+        if kid is None:
+            return self._active
+        key = self._keys.get(kid)
+        if key is None and self.maybe_reload(force=True):
+            key = self._keys.get(kid)
+        return key
+
+    @property
+    def jwks(self) -> bytes:
+        """Serialized public key set."""
+        self.maybe_reload()
+        return self._jwks
+
+    @property
+    def jwks_etag(self) -> str:
+        """Entity tag of the public key set."""
+        return self._jwks_etag
+
+    def encode(
+        self, payload: dict[str, Any], headers: dict[str, Any] | None = None
+    ) -> str:
+        """Sign a payload with the active key.
+
+        Args:
+            payload (dict[str, Any]): Token claims
+            headers (dict[str, Any] | None, optional): Extra JOSE headers. Defaults to None.
+
+        Returns:
+            str: Encoded token
+        """
+        key = self.active
+        return jwt.encode(
+            payload,
+            key.signing_key,
+            algorithm=key.algorithm,
+            headers={**(headers or {}), "kid": key.kid},
+        )
+
+    def decode(self, token: str, **kwargs: Any) -> dict[str, Any]:
+        """Verify a token with the key named by its ``kid`` header.
+
+        Args:
+            token (str): Encoded token
+            **kwargs (Any): Extra ``jwt.decode`` options
+
+        Raises:
+            jwt.InvalidTokenError: If the key is unknown or the token is invalid
+
+        Returns:
+            dict[str, Any]: Token claims
+        """
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self.get(kid)
+        if key is None:
+            raise jwt.InvalidTokenError(f"Unknown signing key {kid}")
+        return jwt.decode(
+            token, key.verifying_key, algorithms=[key.algorithm], **kwargs
+        )
+
+
+key_ring = KeyRing(
+    keys_file=settings.base.JWT_KEYS_FILE,
+    secret_key=settings.base.SECRET_KEY,
+    algorithm=settings.base.JWT_ALGORITHM,
+    reload_interval=settings.base.JWT_KEYS_RELOAD_SECONDS,
+)
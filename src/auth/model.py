@@ -0,0 +1,29 @@
+"""Module."""
+# pylint: disable=unsubscriptable-object
+
+from datetime import datetime
+
+from sqlalchemy import ForeignKey, String
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.db.base import DataClassBase
+
+
+class RefreshTokenFamily(DataClassBase):
+    """Refresh tokens descending from one login.
+
+    Only the generation of the newest refresh token is stored, a family
+    without a row has not been rotated yet and is at generation 0.
+    """
+
+    __tablename__ = "refresh_token_families"
+
+    family_id: Mapped[str] = mapped_column(String(32), primary_key=True)
+    user_id: Mapped[int] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"), index=True
+    )
+    generation: Mapped[int] = mapped_column(default=0)
+    revoked: Mapped[bool] = mapped_column(default=False)
+    expires_at: Mapped[datetime | None] = mapped_column(
+        default=None, index=True
+    )
@@ -0,0 +1,59 @@
+"""Password hashing functions run by the hashing worker processes.
+
+Worker processes are spawned and import this module on start, it only
+depends on the hash policy so starting or restarting a worker stays fast.
+"""
+
+from src.auth.policy import pwd_context
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """_summary_.
+
+    Args:
+        plain_password (str): _description_
+        hashed_password (str): _description_
+
+    Returns:
+        bool: _description_
+    """
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """Verify a password and rehash it if the policy considers it weak.
+
+    Args:
+        plain_password (str): Plain password
+        hashed_password (str): Stored password hash
+
+    Returns:
+        tuple[bool, str | None]: Verification result and the upgraded hash
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def get_password_hash(password: str) -> str:
+    """_summary_.
+
+    Args:
+        password (str): _description_
+
+    Returns:
+        str: _description_
+    """
+    return pwd_context.hash(password)
+
+
+def is_password_hashed(password: str) -> bool:
+    """_summary_.
+
+    Args:
+        password (str): _description_
+
+    Returns:
+        bool: _description_
+    """
+    return bool(pwd_context.identify(password))
@@ -0,0 +1,62 @@
+"""Password hash policy shared by the API and the hashing workers."""
+
+from passlib.context import CryptContext
+from passlib.hash import argon2
+
+from src.config import settings
+
+
+def build_crypt_context(
+    schemes: list[str] | None = None,
+    bcrypt_rounds: int | None = None,
+    argon2_time_cost: int | None = None,
+    argon2_memory_cost: int | None = None,
+    argon2_parallelism: int | None = None,
+) -> CryptContext:
+    """Build the passlib context for the configured hash policy.
+
+    Hashes created with a deprecated scheme or a lower cost than the
+    configured one are reported by ``needs_update`` so they can be upgraded
+    on the next successful login.
+
+    Args:
+        schemes (list[str] | None, optional): Accepted schemes, the first one is used for new hashes. Defaults to None.
+        bcrypt_rounds (int | None, optional): bcrypt log2 cost. Defaults to None.
+        argon2_time_cost (int | None, optional): argon2 iterations. Defaults to None.
+        argon2_memory_cost (int | None, optional): argon2 memory in KiB. Defaults to None.
+        argon2_parallelism (int | None, optional): argon2 lanes. Defaults to None.
+
+    Raises:
+        RuntimeError: If argon2 is requested without an installed backend
+
+    Returns:
+        CryptContext: Configured context
+    """
+    schemes = schemes or settings.base.PASSWORD_HASH_SCHEMES
+    bcrypt_rounds = bcrypt_rounds or settings.base.PASSWORD_BCRYPT_ROUNDS
+    argon2_time_cost = (
+        argon2_time_cost or settings.base.PASSWORD_ARGON2_TIME_COST
+    )
+    argon2_memory_cost = (
+        argon2_memory_cost or settings.base.PASSWORD_ARGON2_MEMORY_COST
+    )
+    argon2_parallelism = (
+        argon2_parallelism or settings.base.PASSWORD_ARGON2_PARALLELISM
+    )
+
+    if "argon2" in schemes and not argon2.has_backend():
+        raise RuntimeError("argon2 hashing requires the argon2-cffi package")
+
+    return CryptContext(
+        schemes=schemes,
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        bcrypt__min_rounds=bcrypt_rounds,
+        argon2__rounds=argon2_time_cost,
+        argon2__min_rounds=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+        argon2__parallelism=argon2_parallelism,
+    )
+
+
+pwd_context = build_crypt_context()
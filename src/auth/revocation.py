@@ -0,0 +1,253 @@
+"""Revoked token store.
+
+Revoked token ids (``jti``) and per user "revoked before" timestamps live
+in a local SQLite file shared by every worker on the host. Each worker
+keeps the revoked ids that have not expired yet, behind a Bloom filter,
+and a copy of the user timestamps in memory, so checking a token never
+touches the database from the event loop. The in-memory view is rebuilt
+periodically to pick up revocations made by other workers, and expired
+rows are purged at the same time.
+
+User timestamps keep sub-second precision, like token ``iat`` claims, so a
+token issued right after a user wide revocation stays valid.
+"""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from contextlib import suppress
+
+from src.common.bloom import BloomFilter
+from src.common.log import log
+from src.config import settings
+from src.users.schemas import TokenPayload
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    jti TEXT PRIMARY KEY,
+    expires_at INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_revoked_tokens_expires_at
+    ON revoked_tokens (expires_at);
+CREATE TABLE IF NOT EXISTS revoked_users (
+    user_id INTEGER PRIMARY KEY,
+    revoked_before REAL NOT NULL,
+    expires_at INTEGER NOT NULL
+);
+"""
+
+
+class RevocationStore:
+    """Revoked tokens backed by SQLite with an in-memory Bloom filter."""
+
+    def __init__(
+        self,
+        path: str,
+        capacity: int,
+        error_rate: float,
+        refresh_interval: float,
+        user_ttl: int,
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            path (str): SQLite database file
+            capacity (int): Minimum Bloom filter capacity
+            error_rate (float): Bloom filter false positive rate
+            refresh_interval (float): Seconds between filter rebuilds
+            user_ttl (int): Seconds a user wide revocation is kept, at least the longest token lifetime
+        """
+        self.path = path
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.refresh_interval = refresh_interval
+        self.user_ttl = user_ttl
+        self._bloom = BloomFilter(capacity, error_rate)
+        # Revoked ids and their expiry, confirming Bloom filter hits
+        self._revoked_jtis: dict[str, int] = {}
+        self._revoked_users: dict[int, float] = {}
+        # Local revocations not yet covered by a completed refresh
+        self._recent_jtis: dict[str, int] = {}
+        self._recent_users: dict[int, float] = {}
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._task: asyncio.Task | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use.
+
+        Returns:
+            sqlite3.Connection: Connection shared by the store
+        """
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(
+                self.path, timeout=5, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _execute(self, sql: str, params: tuple = ()) -> list[tuple]:
+        """Run a statement and commit.
+
+        Args:
+            sql (str): SQL statement
+            params (tuple, optional): Statement parameters. Defaults to ().
+
+        Returns:
+            list[tuple]: Fetched rows
+        """
+        with self._lock:
+            conn = self._connection()
+            rows = conn.execute(sql, params).fetchall()
+            conn.commit()
+            return rows
+
+    def is_revoked(self, token: TokenPayload) -> bool:
+        """Check a verified token against the in-memory view, without I/O.
+
+        Args:
+            token (TokenPayload): Token data
+
+        Returns:
+            bool: True if the token was revoked
+        """
+        revoked_before = self._revoked_users.get(token.sub)
+        if revoked_before is not None and (token.iat or 0) <= revoked_before:
+            return True
+        if token.jti is None or token.jti not in self._bloom:
+            return False
+        expires_at = self._revoked_jtis.get(token.jti)
+        return expires_at is not None and expires_at >= time.time()
+
+    async def revoke_token(self, jti: str, expires_at: int) -> None:
+        """Revoke a single token until it expires.
+
+        Args:
+            jti (str): Token id
+            expires_at (int): Token expiry as a unix timestamp
+        """
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO revoked_tokens (jti, expires_at) "
+            "VALUES (?, ?)",
+            (jti, expires_at),
+        )
+        self._bloom.add(jti)
+        self._revoked_jtis[jti] = expires_at
+        self._recent_jtis[jti] = expires_at
+
+    async def revoke_user(
+        self, user_id: int, before: float | None = None
+    ) -> None:
+        """Revoke every token of a user issued up to a point in time.
+
+        Args:
+            user_id (int): User identifier
+            before (float | None, optional): Unix timestamp, defaults to now. Defaults to None.
+        """
+        before = time.time() if before is None else before
+        await asyncio.to_thread(
+            self._execute,
+            "INSERT OR REPLACE INTO revoked_users "
+            "(user_id, revoked_before, expires_at) VALUES (?, ?, ?)",
+            (user_id, before, int(before) + self.user_ttl),
+        )
+        self._revoked_users[user_id] = before
+        self._recent_users[user_id] = before
+
+    def _load(
+        self,
+    ) -> tuple[BloomFilter, dict[str, int], dict[int, float]]:
+        """Purge expired rows and build a fresh in-memory view.
+
+        Returns:
+            tuple[BloomFilter, dict[str, int], dict[int, float]]: Filter, revoked ids and user timestamps
+        """
+        now = int(time.time())
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "DELETE FROM revoked_tokens WHERE expires_at < ?", (now,)
+            )
+            conn.execute(
+                "DELETE FROM revoked_users WHERE expires_at < ?", (now,)
+            )
+            conn.commit()
+            jtis = dict(
+                conn.execute("SELECT jti, expires_at FROM revoked_tokens")
+            )
+            users = dict(
+                conn.execute(
+                    "SELECT user_id, revoked_before FROM revoked_users"
+                )
+            )
+        bloom = BloomFilter(max(self.capacity, len(jtis) * 2), self.error_rate)
+        for jti in jtis:
+            bloom.add(jti)
+        return bloom, jtis, users
+
+    async def refresh(self) -> None:
+        """Rebuild the in-memory view from the table."""
+        # Revocations recorded before the load started are committed and
+        # part of it, the ones recorded meanwhile are applied on top
+        loaded_jtis = set(self._recent_jtis)
+        loaded_users = dict(self._recent_users)
+        bloom, jtis, users = await asyncio.to_thread(self._load)
+        for jti, expires_at in self._recent_jtis.items():
+            if jti not in loaded_jtis:
+                bloom.add(jti)
+                jtis[jti] = expires_at
+        for user_id, before in self._recent_users.items():
+            users[user_id] = max(users.get(user_id, 0), before)
+        self._bloom, self._revoked_jtis = bloom, jtis
+        self._revoked_users = users
+
+        for jti in loaded_jtis:
+            self._recent_jtis.pop(jti, None)
+        for user_id, before in loaded_users.items():
+            if self._recent_users.get(user_id) == before:
+                del self._recent_users[user_id]
+
+    async def _run(self) -> None:
+        """Refresh the in-memory view until cancelled."""
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except sqlite3.Error as e:
+                log.error(f"Token revocation refresh failed {e}")
+
+    async def start(self) -> None:
+        """Load the revocations and start the background refresh."""
+        await self.refresh()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background refresh and close the database."""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+revocation_store = RevocationStore(
+    path=settings.base.TOKEN_REVOCATION_DB,
+    capacity=settings.base.TOKEN_REVOCATION_BLOOM_CAPACITY,
+    error_rate=settings.base.TOKEN_REVOCATION_BLOOM_ERROR_RATE,
+    refresh_interval=settings.base.TOKEN_REVOCATION_REFRESH_SECONDS,
+    user_ttl=max(
+        settings.base.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        settings.base.TOKEN_EXPIRE_MINUTES * 60,
+    ),
+)
@@ -1,28 +1,53 @@
 """Auth security operation module."""
 
+import hashlib
+import time
 from datetime import datetime, timedelta
 from typing import Any, Optional, Union
+from uuid import uuid4
 
 import jwt
 from jwt.exceptions import InvalidTokenError
-from passlib.context import CryptContext
 
+from src.auth.keys import key_ring
+from src.auth.revocation import revocation_store
+from src.common.cache import TTLCache
 from src.common.exception.errors import TokenError
 from src.config import settings
 from src.users.schemas import TokenPayload
 from src.utils.timezone import timezone
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+token_cache: TTLCache[bytes, TokenPayload] = TTLCache(
+    maxsize=settings.base.TOKEN_CACHE_MAXSIZE,
+    ttl=settings.base.TOKEN_CACHE_TTL_SECONDS,
+)
+# Payloads verified with a key that was rotated out must be checked again
+key_ring.add_listener(token_cache.clear)
+
+
+def _token_digest(token: str) -> bytes:
+    """Cache key of a token, the raw token is never kept in memory.
+
+    Args:
+        token (str): JWT token
+
+    Returns:
+        bytes: SHA-256 digest
+    """
+    return hashlib.sha256(token.encode()).digest()
 
 
 def create_access_token(
-    subject: Union[str, Any], expires_delta: Optional[timedelta] = None
+    subject: Union[str, Any],
+    expires_delta: Optional[timedelta] = None,
+    jti: Optional[str] = None,
 ) -> tuple[str, datetime]:
     """Generate encryption JWT token.
 
     Args:
         subject (Union[str, Any]): User identifier
         expires_delta (Optional[timedelta], optional): Time in token will expire. Defaults to None.
+        jti (Optional[str], optional): Token id, generated if not given. Defaults to None.
 
     Returns:
         tuple[str, datetime]: JWT token and expire delta
@@ -33,12 +58,13 @@ def create_access_token(
         expire = timezone.now_utc() + timedelta(
             minutes=settings.base.ACCESS_TOKEN_EXPIRE_MINUTES
         )
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.base.SECRET_KEY,
-        algorithm=settings.base.JWT_ALGORITHM,
-    )
+    to_encode = {
+        "exp": expire,
+        "sub": str(subject),
+        "iat": time.time(),
+        "jti": jti or uuid4().hex,
+    }
+    encoded_jwt = key_ring.encode(to_encode)
     return encoded_jwt, expire
 
 
@@ -60,7 +86,7 @@ def create_refresh_token(
     """
     if expire_time:
         expire = expire_time + timedelta(
-            seconds=settings.base.TOKEN_EXPIRE_MINUTES
+            minutes=settings.base.TOKEN_EXPIRE_MINUTES
         )
         expire_datetime = timezone.f_datetime(expire_time)
         current_datetime = timezone.now_utc()
@@ -68,15 +94,17 @@ def create_refresh_token(
             raise TokenError(msg="Refresh token expired.")
     else:
         expire = timezone.now_utc() + timedelta(
-            seconds=settings.base.TOKEN_EXPIRE_MINUTES
+            minutes=settings.base.TOKEN_EXPIRE_MINUTES
         )
 
-    to_encode = {"exp": expire, "sub": sub, **kwargs}
-    refresh_token = jwt.encode(
-        to_encode,
-        settings.base.SECRET_KEY,
-        algorithm=settings.base.JWT_ALGORITHM,
-    )
+    to_encode = {
+        "exp": expire,
+        "sub": sub,
+        "iat": time.time(),
+        "jti": uuid4().hex,
+        **kwargs,
+    }
+    refresh_token = key_ring.encode(to_encode)
 
     return refresh_token, expire
 
@@ -88,17 +116,20 @@ def decode_token(token: str) -> TokenPayload:
         token (str): JWT token
 
     Raises:
-        TokenError: If token is not valid
+        TokenError: If token is not valid or was revoked
 
     Returns:
         TokenPayload: Token data
     """
+    key = _token_digest(token)
+    token_data = token_cache.get(key)
+    if token_data is not None:
+        if revocation_store.is_revoked(token_data):
+            raise TokenError(msg="Token has been revoked")
+        return token_data
+
     try:
-        payload = jwt.decode(
-            token,
-            settings.base.SECRET_KEY,
-            algorithms=[settings.base.JWT_ALGORITHM],
-        )
+        payload = key_ring.decode(token)
         token_data = TokenPayload(**payload)
     except jwt.DecodeError as e:
         raise TokenError(msg="Token decode error") from e
@@ -107,31 +138,41 @@ def decode_token(token: str) -> TokenPayload:
     except (InvalidTokenError, Exception) as e:
         raise TokenError(msg="Could not validate credentials") from e
 
+    if revocation_store.is_revoked(token_data):
+        raise TokenError(msg="Token has been revoked")
+    if token_data.exp is not None:
+        token_cache.set(key, token_data, ttl=token_data.exp - time.time())
     return token_data
 
 
-async def update_refresh_token(
-    sub: str,
-    token: str,
-    refresh_token: str,
-    **kwargs,  # pylint: disable=unused-argument
+def evict_token(token: str) -> None:
+    """Drop a token from the verified payload cache, e.g. on revocation.
+
+    Args:
+        token (str): JWT token
+    """
+    token_cache.pop(_token_digest(token))
+
+
+def update_refresh_token(
+    sub: str, family: str, generation: int, jti: str | None = None
 ) -> tuple[str, str, datetime, datetime]:
-    """Update refresh and current token timedelta.
+    """Create the next access and refresh token of a refresh token family.
 
     Args:
         sub (str): User id / Token data
-        token (str): Current token
-        refresh_token (str): Refresh token
-        **kwargs: Dynamic params
+        family (str): Refresh token family id
+        generation (int): Generation of the new refresh token
+        jti (str | None, optional): Access token id, generated if not given. Defaults to None.
 
     Returns:
         tuple[str, str, datetime, datetime]: token data
     """
     new_access_token, new_access_token_expire_time = create_access_token(
-        sub, **kwargs
+        sub, jti=jti
     )
     new_refresh_token, new_refresh_token_expire_time = create_refresh_token(
-        sub, **kwargs
+        sub, new_access_token_expire_time, fam=family, gen=generation
     )
     return (
         new_access_token,
@@ -9,17 +9,29 @@
 #     password_verify,
 # )
 from datetime import timedelta
+from uuid import uuid4
 
 from fastapi.security import HTTPBasicCredentials
 
+from src.auth.families import refresh_families
+from src.auth.hashing import password_hasher
+from src.auth.revocation import revocation_store
 from src.auth.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
+    evict_token,
     update_refresh_token,
 )
-from src.auth.utils import verify_password
+from src.auth.sessions import (
+    add_session,
+    end_session,
+    end_sessions,
+    session_key,
+)
+from src.auth.throttle import login_throttle
 from src.common.exception import errors
+from src.common.kv import kv_store
 from src.config import settings
 from src.db.session import CurrentSession
 from src.users.repository import UsersCRUD
@@ -27,46 +39,81 @@ from src.users.schemas import GetLoginToken, GetNewToken
 
 
 async def login(
-    *, db: CurrentSession, form_data: HTTPBasicCredentials
+    *,
+    db: CurrentSession,
+    form_data: HTTPBasicCredentials,
+    client_ip: str | None = None,
 ) -> GetLoginToken:
     """Generate login token by validating credentials.
 
     Args:
         db (CurrentSession): Current database session
         form_data (HTTPBasicCredentials): User form details
+        client_ip (str | None, optional): Client address, throttled with the user name. Defaults to None.
 
     Raises:
         errors.NotFoundError: If user id not present in database
         errors.AuthorizationError: If credentials are invalid
+        errors.CustomError: If the user name or the client is throttled
 
     Returns:
         GetLoginToken: JWT token
     """
+    throttled = settings.base.LOGIN_THROTTLE_ENABLED
+    if throttled:
+        await login_throttle.check(form_data.username, client_ip)
     try:
-        current_user = await UsersCRUD.get_by_username(db, form_data.username)
+        current_user = await UsersCRUD.get_by_username(
+            db, form_data.username, projection="auth"
+        )
         if not current_user:
             raise errors.NotFoundError(msg="User does not exist")
-        elif not verify_password(form_data.password, current_user.password):
+        # Hashing is slow, the connection goes back to the pool meanwhile
+        await db.release()
+        valid, new_password_hash = await password_hasher.verify_and_update(
+            form_data.password, current_user.password
+        )
+        if not valid:
             raise errors.AuthorizationError(msg="Invalid Username or Password")
         elif not current_user.is_active:
             raise errors.AuthorizationError(msg="User is locked, login failed")
+        if new_password_hash:
+            # The stored hash uses a deprecated scheme or a lower cost
+            await UsersCRUD.update_password_hash(
+                db, current_user, new_password_hash
+            )
         access_token_expires = timedelta(
             minutes=settings.base.ACCESS_TOKEN_EXPIRE_MINUTES
         )
+        jti = uuid4().hex
         access_token, access_token_expire_time = create_access_token(
-            str(current_user.id), expires_delta=access_token_expires
+            str(current_user.id), expires_delta=access_token_expires, jti=jti
+        )
+        if not settings.base.TOKEN_MULTI_LOGIN:
+            await end_sessions(current_user.id)
+        await add_session(
+            current_user.id, jti, int(access_token_expire_time.timestamp())
         )
         refresh_token, refresh_token_expire_time = create_refresh_token(
-            str(current_user.id), access_token_expire_time
+            str(current_user.id),
+            access_token_expire_time,
+            fam=refresh_families.new_family(),
+            gen=0,
         )
         await UsersCRUD.update_login_time(db, current_user)
     except errors.NotFoundError as e:
+        if throttled:
+            await login_throttle.failure(form_data.username, client_ip)
         raise errors.NotFoundError(msg=e.msg)
-    except (errors.AuthorizationError, errors.CustomError) as e:
+    except errors.AuthorizationError as e:
+        if throttled:
+            await login_throttle.failure(form_data.username, client_ip)
         raise errors.AuthorizationError(msg=e.msg)
     except Exception as e:
         raise e
     else:
+        if throttled:
+            await login_throttle.success(form_data.username)
         data = GetLoginToken(
             access_token=access_token,
             refresh_token=refresh_token,
@@ -78,7 +125,7 @@ async def login(
 
 
 async def new_token(
-    *, request, db: CurrentSession, refresh_token: str, current_token: str
+    *, request, db: CurrentSession, refresh_token: str
 ) -> GetNewToken:
     """Create a new token.
 
@@ -86,35 +133,36 @@ async def new_token(
         request (_type_): Current app request
         db (CurrentSession): Current app db session
         refresh_token (str): refresh token
-        current_token (str): Current user token
 
     Raises:
         errors.TokenError: If token is invalid
-        errors.NotFoundError: If user is not available
-        errors.AuthorizationError: If token data mismatched
+        errors.AuthorizationError: If the user is locked
 
     Returns:
         GetNewToken: Token data
     """
-    user_id = await decode_token(refresh_token)
-    if request.user.id != user_id:
+    # Resolved once for this request by the get_current_user dependency
+    current_user = request.state.current_user
+    token_data = decode_token(refresh_token)
+    if token_data.sub != current_user.id or token_data.fam is None:
         raise errors.TokenError(msg="Refresh token is invalid")
-
-    current_user = await UsersCRUD.get(db, user_id)
-    if not current_user:
-        raise errors.NotFoundError(msg="User does not exist")
-    elif not current_user.status:
+    elif not current_user.is_active:
         raise errors.AuthorizationError(msg="User is locked, operation failed")
+    jti = uuid4().hex
     (
         new_access_token,
         new_refresh_token,
         new_access_token_expire_time,
         new_refresh_token_expire_time,
-    ) = await update_refresh_token(
+    ) = update_refresh_token(
         str(current_user.id),
-        current_token,
-        refresh_token,
-        multi_login=current_user.is_multi_login,
+        token_data.fam,
+        (token_data.gen or 0) + 1,
+        jti=jti,
+    )
+    await refresh_families.rotate(db, token_data, new_refresh_token_expire_time)
+    await add_session(
+        current_user.id, jti, int(new_access_token_expire_time.timestamp())
     )
 
     data = GetNewToken(
@@ -126,18 +174,18 @@ async def new_token(
     return data
 
 
-# async def logout(*, request: Request) -> None:
-#     """_summary_.
-#
-#     Args:
-#         request (Request): _description_
-#     """
-#     # TODO implement logout
-#     pass
-# token = await get_token(request)
-# if request.user.is_multi_login:
-#     key = f'{settings.base.TOKEN_REDIS_PREFIX}:{request.user.id}:{token}'
-#     await redis_client.delete(key)
-# else:
-#     prefix = f'{settings.base.TOKEN_REDIS_PREFIX}:{request.user.id}:'
-#     await redis_client.delete_prefix(prefix)
+async def logout(*, token: str, all_sessions: bool = False) -> None:
+    """Revoke the current token, or every token of its user.
+
+    Args:
+        token (str): Current access token
+        all_sessions (bool, optional): Also revoke the tokens of the other sessions. Defaults to False.
+    """
+    token_data = decode_token(token)
+    if all_sessions:
+        # Also covers refresh tokens and sessions that were never tracked
+        await revocation_store.revoke_user(token_data.sub)
+        await kv_store.delete_prefix(session_key(token_data.sub))
+    elif token_data.jti is not None:
+        await end_session(token_data.sub, token_data.jti, token_data.exp)
+    evict_token(token)
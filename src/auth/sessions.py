@@ -0,0 +1,96 @@
+"""Login sessions of a user, tracked in the key-value store.
+
+Each session is the ``jti`` of an access token, stored under
+``{TOKEN_REDIS_PREFIX}:{user_id}:{jti}`` until the token expires. Ending a
+session revokes its token, so the check on every request stays in the
+revocation store and never reaches the key-value store.
+"""
+
+import time
+
+from src.auth.revocation import revocation_store
+from src.common.kv import kv_store
+from src.config import settings
+
+
+def session_key(user_id: int, jti: str = "") -> str:
+    """Key of a session, or the prefix of every session of a user.
+
+    Args:
+        user_id (int): User identifier
+        jti (str, optional): Access token id. Defaults to "".
+
+    Returns:
+        str: Key
+    """
+    return f"{settings.base.TOKEN_REDIS_PREFIX}:{user_id}:{jti}"
+
+
+async def add_session(user_id: int, jti: str, expires_at: int) -> None:
+    """Record a new session.
+
+    Args:
+        user_id (int): User identifier
+        jti (str): Access token id
+        expires_at (int): Access token expiry as a unix timestamp
+    """
+    await kv_store.set(
+        session_key(user_id, jti),
+        str(expires_at),
+        ttl=expires_at - time.time(),
+    )
+
+
+async def list_sessions(user_id: int) -> dict[str, int]:
+    """Active sessions of a user.
+
+    Args:
+        user_id (int): User identifier
+
+    Returns:
+        dict[str, int]: Access token expiry by token id
+    """
+    prefix = session_key(user_id)
+    keys = await kv_store.keys(prefix)
+    if not keys:
+        return {}
+    pipe = kv_store.pipeline()
+    for key in keys:
+        pipe.get(key)
+    values = await pipe.execute()
+    return {
+        key[len(prefix) :]: int(value)
+        for key, value in zip(keys, values)
+        if value is not None
+    }
+
+
+async def end_session(user_id: int, jti: str, expires_at: int) -> None:
+    """Revoke one session.
+
+    Args:
+        user_id (int): User identifier
+        jti (str): Access token id
+        expires_at (int): Access token expiry as a unix timestamp
+    """
+    await revocation_store.revoke_token(jti, expires_at)
+    await kv_store.delete(session_key(user_id, jti))
+
+
+async def end_sessions(user_id: int, keep: str | None = None) -> int:
+    """Revoke every session of a user.
+
+    Args:
+        user_id (int): User identifier
+        keep (str | None, optional): Token id of a session to keep. Defaults to None.
+
+    Returns:
+        int: Number of ended sessions
+    """
+    sessions = await list_sessions(user_id)
+    sessions.pop(keep, None)
+    for jti, expires_at in sessions.items():
+        await revocation_store.revoke_token(jti, expires_at)
+    if sessions:
+        await kv_store.delete(*(session_key(user_id, jti) for jti in sessions))
+    return len(sessions)
@@ -0,0 +1,193 @@
+"""Failed login throttling by account and by client IP.
+
+Failures are counted in sliding windows, approximated from the counts of
+the current and the previous fixed window. Past a number of free attempts
+every failure blocks the account or IP for an exponentially growing delay,
+and past the lockout threshold for the lockout period. A blocked login is
+rejected with HTTP 429 before the user is loaded or any password hashed.
+
+Checking a login reads two block keys in one batch, so counters live in
+the process by default and in the shared key-value store with
+``LOGIN_THROTTLE_SHARED``.
+"""
+
+import time
+from dataclasses import dataclass
+
+from src.common.exception import errors
+from src.common.kv import KVStore, MemoryStore, kv_store
+from src.common.response.response_code import CustomResponseCode
+from src.config import settings
+
+
+@dataclass(frozen=True)
+class ThrottleRule:
+    """Limits for one kind of key."""
+
+    scope: str
+    free_attempts: int
+    lockout_attempts: int
+
+
+class LoginThrottle:
+    """Sliding window failure counters with progressive blocking."""
+
+    def __init__(
+        self,
+        store: KVStore,
+        window: float,
+        account: ThrottleRule,
+        ip: ThrottleRule,
+        base_delay: float,
+        max_delay: float,
+        lockout: float,
+        prefix: str = "login",
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            store (KVStore): Store holding the counters
+            window (float): Sliding window length in seconds
+            account (ThrottleRule): Limits per user name
+            ip (ThrottleRule): Limits per client IP
+            base_delay (float): Block after the first failure past the free attempts
+            max_delay (float): Longest progressive block in seconds
+            lockout (float): Block in seconds once the lockout threshold is reached
+            prefix (str, optional): Key prefix. Defaults to "login".
+        """
+        self.store = store
+        self.window = window
+        self.account = account
+        self.ip = ip
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.lockout = lockout
+        self.prefix = prefix
+
+    def _keys(
+        self, username: str, client_ip: str | None
+    ) -> list[tuple[ThrottleRule, str]]:
+        """Throttled keys of a login attempt.
+
+        Args:
+            username (str): Submitted user name
+            client_ip (str | None): Client address
+
+        Returns:
+            list[tuple[ThrottleRule, str]]: Rule and identifier pairs
+        """
+        keys = [(self.account, username.strip().lower())]
+        if client_ip:
+            keys.append((self.ip, client_ip))
+        return keys
+
+    def _block_key(self, rule: ThrottleRule, ident: str) -> str:
+        """Key holding the unix time a key is blocked until."""
+        return f"{self.prefix}:block:{rule.scope}:{ident}"
+
+    def _count_key(self, rule: ThrottleRule, ident: str, window: int) -> str:
+        """Key counting the failures of one fixed window."""
+        return f"{self.prefix}:count:{rule.scope}:{ident}:{window}"
+
+    def block_for(self, rule: ThrottleRule, failures: float) -> float:
+        """Block duration after a failure.
+
+        Args:
+            rule (ThrottleRule): Limits of the key
+            failures (float): Failures in the sliding window
+
+        Returns:
+            float: Seconds, 0 if the key is not blocked
+        """
+        if failures >= rule.lockout_attempts:
+            return self.lockout
+        if failures <= rule.free_attempts:
+            return 0
+        excess = int(failures - rule.free_attempts) - 1
+        return min(self.base_delay * 2 ** min(excess, 32), self.max_delay)
+
+    async def check(self, username: str, client_ip: str | None) -> None:
+        """Reject an attempt while the account or the IP is blocked.
+
+        Args:
+            username (str): Submitted user name
+            client_ip (str | None): Client address
+
+        Raises:
+            errors.CustomError: HTTP 429 with the seconds to wait
+        """
+        pipe = self.store.pipeline()
+        for rule, ident in self._keys(username, client_ip):
+            pipe.get(self._block_key(rule, ident))
+        until = [float(v) for v in await pipe.execute() if v is not None]
+        if until:
+            retry_after = max(until) - time.time()
+            if retry_after > 0:
+                raise errors.CustomError(
+                    error=CustomResponseCode.HTTP_429,
+                    data={"retry_after": int(retry_after) + 1},
+                )
+
+    async def failure(self, username: str, client_ip: str | None) -> None:
+        """Count a failed attempt and block the keys past their limits.
+
+        Args:
+            username (str): Submitted user name
+            client_ip (str | None): Client address
+        """
+        now = time.time()
+        current, elapsed = divmod(now, self.window)
+        weight = 1 - elapsed / self.window
+        keys = self._keys(username, client_ip)
+
+        pipe = self.store.pipeline()
+        for rule, ident in keys:
+            pipe.incr(
+                self._count_key(rule, ident, int(current)), ttl=self.window * 2
+            )
+            pipe.get(self._count_key(rule, ident, int(current) - 1))
+        counts = await pipe.execute()
+
+        pipe = self.store.pipeline()
+        for i, (rule, ident) in enumerate(keys):
+            failures = counts[2 * i] + int(counts[2 * i + 1] or 0) * weight
+            block = self.block_for(rule, failures)
+            if block:
+                pipe.set(
+                    self._block_key(rule, ident), str(now + block), ttl=block
+                )
+        if len(pipe):
+            await pipe.execute()
+
+    async def success(self, username: str) -> None:
+        """Clear the failures of an account after a successful login.
+
+        Args:
+            username (str): User name
+        """
+        current = int(time.time() // self.window)
+        ident = username.strip().lower()
+        await self.store.delete(
+            self._block_key(self.account, ident),
+            self._count_key(self.account, ident, current),
+            self._count_key(self.account, ident, current - 1),
+        )
+
+
+login_throttle = LoginThrottle(
+    store=kv_store if settings.base.LOGIN_THROTTLE_SHARED else MemoryStore(),
+    window=settings.base.LOGIN_THROTTLE_WINDOW_SECONDS,
+    account=ThrottleRule(
+        scope="account",
+        free_attempts=settings.base.LOGIN_THROTTLE_ACCOUNT_FREE_ATTEMPTS,
+        lockout_attempts=settings.base.LOGIN_THROTTLE_ACCOUNT_LOCKOUT_ATTEMPTS,
+    ),
+    ip=ThrottleRule(
+        scope="ip",
+        free_attempts=settings.base.LOGIN_THROTTLE_IP_FREE_ATTEMPTS,
+        lockout_attempts=settings.base.LOGIN_THROTTLE_IP_LOCKOUT_ATTEMPTS,
+    ),
+    base_delay=settings.base.LOGIN_THROTTLE_BASE_DELAY_SECONDS,
+    max_delay=settings.base.LOGIN_THROTTLE_MAX_DELAY_SECONDS,
+    lockout=settings.base.LOGIN_THROTTLE_LOCKOUT_SECONDS,
+)
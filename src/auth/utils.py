@@ -1,161 +1,125 @@
 """Module."""
 
-import logging
 from datetime import datetime, timedelta
-from pathlib import Path
 from typing import Any, Dict, Optional
 
-import emails
 import jwt
-from emails.template import JinjaTemplate
-from passlib.context import CryptContext
 from pydantic import ValidationError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.auth.keys import key_ring
 from src.config import settings
+from src.mail.outbox import email_outbox
+from src.mail.templates import email_templates
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+async def send_email(
+    session: AsyncSession,
+    email_to: str,
+    subject: str,
+    template_name: str,
+    environment: Optional[Dict[str, Any]] = None,
+) -> int:
+    """Render an email and queue it in the outbox.
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """_summary_.
-
-    Args:
-        plain_password (str): _description_
-        hashed_password (str): _description_
-
-    Returns:
-        bool: _description_
-    """
-    return pwd_context.verify(plain_password, hashed_password)
-
-
-def get_password_hash(password: str) -> str:
-    """_summary_.
-
-    Args:
-        password (str): _description_
-
-    Returns:
-        str: _description_
-    """
-    return pwd_context.hash(password)
-
-
-def is_password_hashed(password: str) -> bool:
-    """_summary_.
+    The message is sent by the outbox dispatcher, so the caller never
+    waits for the SMTP server.
 
     Args:
-        password (str): _description_
+        session (AsyncSession): database session
+        email_to (str): Recipient address
+        subject (str): Subject
+        template_name (str): HTML template file name
+        environment (Optional[Dict[str, Any]], optional): Template variables. Defaults to None.
 
     Returns:
-        bool: _description_
-    """
-    return bool(pwd_context.identify(password))
-
-
-def send_email(
-    email_to: str,
-    subject_template: str = "",
-    html_template: str = "",
-    environment: Optional[Dict[str, Any]] = None,
-) -> None:
-    """_summary_.
-
-    Args:
-        email_to (str): _description_
-        subject_template (str, optional): _description_. Defaults to "".
-        html_template (str, optional): _description_. Defaults to "".
-        environment (Optional[Dict[str, Any]], optional): _description_. Defaults to None.
+        int: Outbox id
     """
     if environment is None:
         environment = {}
     assert (
-        settings.EMAILS_ENABLED
+        settings.email.EMAILS_ENABLED
     ), "no provided configuration for email variables"
-    message = emails.Message(
-        subject=JinjaTemplate(subject_template),
-        html=JinjaTemplate(html_template),
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+    return await email_outbox.enqueue(
+        session,
+        email_to=email_to,
+        subject=subject,
+        html=email_templates.render(template_name, environment),
     )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options["tls"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, render=environment, smtp=smtp_options)
-    logging.info("send email result: %s", response)
-
-
-def send_test_email(email_to: str) -> None:
-    """_summary_.
+
+
+async def send_test_email(session: AsyncSession, email_to: str) -> None:
+    """Queue the test email.
 
     Args:
-        email_to (str): _description_
+        session (AsyncSession): database session
+        email_to (str): Recipient address
     """
-    project_name = settings.PROJECT_NAME
-    subject = f"{project_name} - Test email"
-    with open(Path(settings.EMAIL_TEMPLATES_DIR) / "test_email.html") as f:
-        template_str = f.read()
-    send_email(
+    project_name = settings.base.PROJECT_NAME
+    await send_email(
+        session,
         email_to=email_to,
-        subject_template=subject,
-        html_template=template_str,
-        environment={"project_name": settings.PROJECT_NAME, "email": email_to},
+        subject=f"{project_name} - Test email",
+        template_name="test_email.html",
+        environment={"project_name": project_name, "email": email_to},
     )
 
 
-def send_reset_password_email(email_to: str, email: str, token: str) -> None:
-    """_summary_.
+async def send_reset_password_email(
+    session: AsyncSession, email_to: str, email: str, token: str
+) -> None:
+    """Queue the password recovery email.
 
     Args:
-        email_to (str): _description_
-        email (str): _description_
-        token (str): _description_
+        session (AsyncSession): database session
+        email_to (str): Recipient address
+        email (str): Account email
+        token (str): Password reset token
     """
-    project_name = settings.PROJECT_NAME
-    subject = f"{project_name} - Password recovery for user {email}"
-    with open(Path(settings.EMAIL_TEMPLATES_DIR) / "reset_password.html") as f:
-        template_str = f.read()
-    server_host = settings.SERVER_HOST
+    project_name = settings.base.PROJECT_NAME
+    server_host = settings.email.SERVER_HOST
     link = f"{server_host}/reset-password?token={token}"
-    send_email(
+    await send_email(
+        session,
         email_to=email_to,
-        subject_template=subject,
-        html_template=template_str,
+        subject=f"{project_name} - Password recovery for user {email}",
+        template_name="reset_password.html",
         environment={
-            "project_name": settings.PROJECT_NAME,
+            "project_name": project_name,
             "username": email,
             "email": email_to,
-            "valid_hours": settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS,
+            "valid_hours": settings.email.EMAIL_RESET_TOKEN_EXPIRE_HOURS,
             "link": link,
         },
     )
 
 
-def send_new_account_email(email_to: str, username: str, password: str) -> None:
-    """_summary_.
+async def send_new_account_email(
+    session: AsyncSession, email_to: str, username: str
+) -> None:
+    """Queue the new account email with a link to set the password.
+
+    The password itself is never sent, queued messages are stored in the
+    outbox table.
 
     Args:
-        email_to (str): _description_
-        username (str): _description_
-        password (str): _description_
+        session (AsyncSession): database session
+        email_to (str): Recipient address
+        username (str): Account username
     """
-    project_name = settings.PROJECT_NAME
-    subject = f"{project_name} - New account for user {username}"
-    with open(Path(settings.EMAIL_TEMPLATES_DIR) / "new_account.html") as f:
-        template_str = f.read()
-    link = settings.SERVER_HOST
-    send_email(
+    project_name = settings.base.PROJECT_NAME
+    token = generate_password_reset_token(email_to)
+    link = f"{settings.email.SERVER_HOST}/reset-password?token={token}"
+    await send_email(
+        session,
         email_to=email_to,
-        subject_template=subject,
-        html_template=template_str,
+        subject=f"{project_name} - New account for user {username}",
+        template_name="new_account.html",
         environment={
-            "project_name": settings.PROJECT_NAME,
+            "project_name": project_name,
             "username": username,
-            "password": password,
             "email": email_to,
+            "valid_hours": settings.email.EMAIL_RESET_TOKEN_EXPIRE_HOURS,
             "link": link,
         },
     )
@@ -170,15 +134,11 @@ def generate_password_reset_token(email: str) -> str:
     Returns:
         str: _description_
     """
-    delta = timedelta(hours=settings.EMAIL_RESET_TOKEN_EXPIRE_HOURS)
+    delta = timedelta(hours=settings.email.EMAIL_RESET_TOKEN_EXPIRE_HOURS)
     now = datetime.utcnow()
     expires = now + delta
     exp = expires.timestamp()
-    encoded_jwt = jwt.encode(
-        {"exp": exp, "nbf": now, "email": email},
-        settings.SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM,
-    )
+    encoded_jwt = key_ring.encode({"exp": exp, "nbf": now, "email": email})
     return encoded_jwt
 
 
@@ -192,9 +152,7 @@ def verify_password_reset_token(token: str) -> Optional[str]:
         Optional[str]: _description_
     """
     try:
-        decoded_token = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.JWT_ALGORITHM]
-        )
+        decoded_token = key_ring.decode(token)
         return decoded_token["email"]
     except (jwt.PyJWTError, ValidationError):
         return None
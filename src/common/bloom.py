@@ -0,0 +1,67 @@
+"""Bloom filter for fast negative membership checks."""
+
+import hashlib
+import math
+
+
+class BloomFilter:
+    """Fixed size probabilistic set.
+
+    ``item in bloom`` never returns False for an added item, it returns True
+    for an item that was not added with a probability close to
+    ``error_rate`` while the filter holds at most ``capacity`` items.
+    """
+
+    def __init__(self, capacity: int, error_rate: float) -> None:
+        """Class initializer.
+
+        Args:
+            capacity (int): Expected number of items
+            error_rate (float): Target false positive probability
+        """
+        capacity = max(capacity, 1)
+        self.size = max(
+            8,
+            math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)),
+        )
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str) -> list[int]:
+        """Bit positions of an item, using double hashing.
+
+        Args:
+            item (str): Item
+
+        Returns:
+            list[int]: Bit indexes
+        """
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+    def add(self, item: str) -> None:
+        """Add an item.
+
+        Args:
+            item (str): Item
+        """
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        """Check if an item may have been added.
+
+        Args:
+            item (str): Item
+
+        Returns:
+            bool: False if the item was definitely not added
+        """
+        return all(
+            self._bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(item)
+        )
@@ -0,0 +1,271 @@
+"""In-process LRU caches with per entry expiry."""
+
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Sequence, TypeVar
+
+_K = TypeVar("_K", bound=Hashable)
+_V = TypeVar("_V")
+
+
+class TTLCache(Generic[_K, _V]):
+    """Bounded mapping evicting the least recently used entry when full.
+
+    Every entry carries its own deadline, expired entries are dropped on
+    access. Hit and miss counters are kept for tuning the size.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """Class initializer.
+
+        Args:
+            maxsize (int): Maximum number of entries
+            ttl (float): Default time to live in seconds
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[_K, tuple[float, _V]] = OrderedDict()
+
+    def __len__(self) -> int:
+        """Number of stored entries, including not yet purged expired ones."""
+        return len(self._data)
+
+    def get(self, key: _K, default: Any = None) -> _V | Any:
+        """Return a live entry and mark it as recently used.
+
+        Args:
+            key (_K): Entry key
+            default (Any, optional): Returned on a miss. Defaults to None.
+
+        Returns:
+            _V | Any: Cached value or default
+        """
+        item = self._data.get(key)
+        if item is None:
+            self.misses += 1
+            return default
+        deadline, value = item
+        if deadline <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: _K, value: _V, ttl: float | None = None) -> None:
+        """Store an entry, evicting the least recently used one if full.
+
+        Args:
+            key (_K): Entry key
+            value (_V): Entry value
+            ttl (float | None, optional): Time to live in seconds, capped by the default. Defaults to None.
+        """
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: _K) -> _V | None:
+        """Remove an entry.
+
+        Args:
+            key (_K): Entry key
+
+        Returns:
+            _V | None: Removed value
+        """
+        item = self._data.pop(key, None)
+        return item[1] if item else None
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._data.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Cache counters.
+
+        Returns:
+            dict[str, Any]: Size, hits, misses and hit ratio
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+def approximate_size(value: Any) -> int:
+    """Memory held by an object and its attribute values, not recursing further.
+
+    Args:
+        value (Any): Object
+
+    Returns:
+        int: Size in bytes
+    """
+    size = sys.getsizeof(value)
+    attributes = getattr(value, "__dict__", None)
+    if attributes:
+        size += sys.getsizeof(attributes)
+        size += sum(sys.getsizeof(item) for item in attributes.values())
+    return size
+
+
+class IndexedTTLCache(Generic[_V]):
+    """LRU cache with per entry expiry, reachable by several keys per entry.
+
+    ``keys`` returns every key of a value, the first one is its primary key.
+    Looking up any of them finds the same entry and removing any of them
+    drops the entry with all its keys. Besides the entry count the cache is
+    bounded by the approximate memory of its values.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        max_bytes: int,
+        keys: Callable[[_V], Sequence[Hashable]],
+        sizeof: Callable[[_V], int] = approximate_size,
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            maxsize (int): Maximum number of entries
+            ttl (float): Time to live in seconds
+            max_bytes (int): Memory budget of the values in bytes
+            keys (Callable[[_V], Sequence[Hashable]]): Keys of a value, primary key first
+            sizeof (Callable[[_V], int], optional): Size of a value in bytes. Defaults to approximate_size.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.keys = keys
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+        # Primary key -> (deadline, value, keys, size)
+        self._data: OrderedDict[
+            Hashable, tuple[float, _V, Sequence[Hashable], int]
+        ] = OrderedDict()
+        self._index: dict[Hashable, Hashable] = {}
+
+    def __len__(self) -> int:
+        """Number of stored entries, including not yet purged expired ones."""
+        return len(self._data)
+
+    def _remove(self, primary: Hashable) -> _V | None:
+        """Drop an entry and its keys.
+
+        Args:
+            primary (Hashable): Primary key
+
+        Returns:
+            _V | None: Removed value
+        """
+        item = self._data.pop(primary, None)
+        if item is None:
+            return None
+        _, value, keys, size = item
+        for key in keys:
+            if self._index.get(key) == primary:
+                del self._index[key]
+        self.bytes -= size
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> _V | Any:
+        """Return a live entry by any of its keys and mark it as recently used.
+
+        Args:
+            key (Hashable): Any key of the entry
+            default (Any, optional): Returned on a miss. Defaults to None.
+
+        Returns:
+            _V | Any: Cached value or default
+        """
+        primary = self._index.get(key)
+        item = None if primary is None else self._data.get(primary)
+        if item is None:
+            self.misses += 1
+            return default
+        if item[0] <= time.monotonic():
+            self._remove(primary)
+            self.misses += 1
+            return default
+        self._data.move_to_end(primary)
+        self.hits += 1
+        return item[1]
+
+    def set(self, value: _V) -> None:
+        """Store a value under all its keys, evicting the least recently used entries beyond the bounds.
+
+        Args:
+            value (_V): Entry value
+        """
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        keys = tuple(self.keys(value))
+        primary = keys[0]
+        # Replace the entries holding any of the keys, one of them may be
+        # an outdated version reachable by an old username or email
+        for key in keys:
+            if key in self._index:
+                self._remove(self._index[key])
+        size = self.sizeof(value)
+        self._data[primary] = (time.monotonic() + self.ttl, value, keys, size)
+        for key in keys:
+            self._index[key] = primary
+        self.bytes += size
+        while self._data and (
+            len(self._data) > self.maxsize or self.bytes > self.max_bytes
+        ):
+            self._remove(next(iter(self._data)))
+            self.evictions += 1
+
+    def pop(self, key: Hashable) -> _V | None:
+        """Remove an entry by any of its keys.
+
+        Args:
+            key (Hashable): Any key of the entry
+
+        Returns:
+            _V | None: Removed value
+        """
+        primary = self._index.get(key)
+        return None if primary is None else self._remove(primary)
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        self._data.clear()
+        self._index.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Cache counters.
+
+        Returns:
+            dict[str, Any]: Size, memory, hits, misses, evictions and hit ratio
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,55 @@
+"""Key-value store used for sessions and counters shared by workers.
+
+The backend is chosen by ``KV_STORE_URL``:
+
+- ``memory://`` keeps the data in the process, for one worker and tests
+- ``sqlite:///path/kv.db`` shares a file between the workers of a host
+- ``redis://[[user]:password@]host[:port][/db]`` uses a Redis compatible server
+"""
+
+from urllib.parse import urlparse
+
+from src.common.kv.base import KVError, KVStore, Pipeline
+from src.common.kv.memory import MemoryStore
+from src.common.kv.resp import RESPStore
+from src.common.kv.sqlite import SQLiteStore
+from src.config import settings
+
+__all__ = (
+    "KVError",
+    "KVStore",
+    "MemoryStore",
+    "Pipeline",
+    "RESPStore",
+    "SQLiteStore",
+    "create_store",
+    "kv_store",
+)
+
+
+def create_store(url: str) -> KVStore:
+    """Build a store from its URL.
+
+    Args:
+        url (str): Store URL
+
+    Raises:
+        ValueError: If the URL scheme is not supported
+
+    Returns:
+        KVStore: Store
+    """
+    scheme = urlparse(url).scheme
+    if scheme == "memory":
+        return MemoryStore()
+    if scheme == "sqlite":
+        # Same convention as SQLAlchemy, four slashes for an absolute path
+        return SQLiteStore(url.split("://", 1)[1][1:])
+    if scheme in ("redis", "resp"):
+        return RESPStore.from_url(
+            url, pool_size=settings.base.KV_STORE_POOL_SIZE
+        )
+    raise ValueError(f"Unsupported key-value store URL {url}")
+
+
+kv_store = create_store(settings.base.KV_STORE_URL)
@@ -0,0 +1,233 @@
+"""Key-value store interface shared by the backends.
+
+Every operation is a command, ``(name, args)``. A store runs a list of
+commands with :meth:`KVStore.execute`, so single operations and
+pipelines share the same code path and a backend can batch a whole
+pipeline into one transaction or one network round trip.
+"""
+
+from abc import ABC, abstractmethod
+from typing import Any
+
+Command = tuple[str, tuple]
+
+
+class KVError(Exception):
+    """Backend failure or error reply."""
+
+
+class Pipeline:
+    """Commands queued and sent to the store in one batch.
+
+    Usage::
+
+        pipe = store.pipeline()
+        pipe.set("a", "1", ttl=60)
+        pipe.incr("b")
+        results = await pipe.execute()
+    """
+
+    def __init__(self, store: "KVStore") -> None:
+        """Class initializer.
+
+        Args:
+            store (KVStore): Store running the batch
+        """
+        self._store = store
+        self._commands: list[Command] = []
+
+    def __len__(self) -> int:
+        """Number of queued commands."""
+        return len(self._commands)
+
+    def _queue(self, name: str, *args: Any) -> "Pipeline":
+        """Queue a command.
+
+        Args:
+            name (str): Command name
+            *args (Any): Command arguments
+
+        Returns:
+            Pipeline: This pipeline, for chaining
+        """
+        self._commands.append((name, args))
+        return self
+
+    def get(self, key: str) -> "Pipeline":
+        """Queue :meth:`KVStore.get`."""
+        return self._queue("get", key)
+
+    def set(self, key: str, value: str, ttl: float | None = None) -> "Pipeline":
+        """Queue :meth:`KVStore.set`."""
+        return self._queue("set", key, value, ttl)
+
+    def delete(self, *keys: str) -> "Pipeline":
+        """Queue :meth:`KVStore.delete`."""
+        return self._queue("delete", *keys)
+
+    def delete_prefix(self, prefix: str) -> "Pipeline":
+        """Queue :meth:`KVStore.delete_prefix`."""
+        return self._queue("delete_prefix", prefix)
+
+    def keys(self, prefix: str) -> "Pipeline":
+        """Queue :meth:`KVStore.keys`."""
+        return self._queue("keys", prefix)
+
+    def ttl(self, key: str) -> "Pipeline":
+        """Queue :meth:`KVStore.ttl`."""
+        return self._queue("ttl", key)
+
+    def expire(self, key: str, ttl: float) -> "Pipeline":
+        """Queue :meth:`KVStore.expire`."""
+        return self._queue("expire", key, ttl)
+
+    def incr(
+        self, key: str, amount: int = 1, ttl: float | None = None
+    ) -> "Pipeline":
+        """Queue :meth:`KVStore.incr`."""
+        return self._queue("incr", key, amount, ttl)
+
+    async def execute(self) -> list[Any]:
+        """Run the queued commands in order.
+
+        Returns:
+            list[Any]: One result per command
+        """
+        commands, self._commands = self._commands, []
+        if not commands:
+            return []
+        return await self._store.execute(commands)
+
+
+class KVStore(ABC):
+    """Async key-value store with per key expiry.
+
+    Values are strings. Expiry times are given in seconds, ``None`` means
+    the key never expires.
+    """
+
+    @abstractmethod
+    async def execute(self, commands: list[Command]) -> list[Any]:
+        """Run commands in order.
+
+        Args:
+            commands (list[Command]): Commands to run
+
+        Returns:
+            list[Any]: One result per command
+        """
+
+    async def _one(self, name: str, *args: Any) -> Any:
+        """Run a single command.
+
+        Args:
+            name (str): Command name
+            *args (Any): Command arguments
+
+        Returns:
+            Any: Command result
+        """
+        return (await self.execute([(name, args)]))[0]
+
+    def pipeline(self) -> Pipeline:
+        """Start a batch of commands.
+
+        Returns:
+            Pipeline: Empty pipeline
+        """
+        return Pipeline(self)
+
+    async def get(self, key: str) -> str | None:
+        """Read a key.
+
+        Args:
+            key (str): Key
+
+        Returns:
+            str | None: Value or None if missing or expired
+        """
+        return await self._one("get", key)
+
+    async def set(self, key: str, value: str, ttl: float | None = None) -> None:
+        """Write a key.
+
+        Args:
+            key (str): Key
+            value (str): Value
+            ttl (float | None, optional): Seconds until the key expires. Defaults to None.
+        """
+        await self._one("set", key, value, ttl)
+
+    async def delete(self, *keys: str) -> int:
+        """Remove keys.
+
+        Args:
+            *keys (str): Keys
+
+        Returns:
+            int: Number of removed keys
+        """
+        return await self._one("delete", *keys)
+
+    async def delete_prefix(self, prefix: str) -> int:
+        """Remove every key starting with a prefix.
+
+        Args:
+            prefix (str): Key prefix
+
+        Returns:
+            int: Number of removed keys
+        """
+        return await self._one("delete_prefix", prefix)
+
+    async def keys(self, prefix: str) -> list[str]:
+        """List the live keys starting with a prefix.
+
+        Args:
+            prefix (str): Key prefix
+
+        Returns:
+            list[str]: Keys
+        """
+        return await self._one("keys", prefix)
+
+    async def ttl(self, key: str) -> float | None:
+        """Remaining time to live of a key.
+
+        Args:
+            key (str): Key
+
+        Returns:
+            float | None: Seconds, None if missing or without expiry
+        """
+        return await self._one("ttl", key)
+
+    async def expire(self, key: str, ttl: float) -> bool:
+        """Set the time to live of an existing key.
+
+        Args:
+            key (str): Key
+            ttl (float): Seconds until the key expires
+
+        Returns:
+            bool: False if the key does not exist
+        """
+        return await self._one("expire", key, ttl)
+
+    async def incr(
+        self, key: str, amount: int = 1, ttl: float | None = None
+    ) -> int:
+        """Increment a counter, creating it at zero if missing.
+
+        Args:
+            key (str): Key
+            amount (int, optional): Increment. Defaults to 1.
+            ttl (float | None, optional): Time to live set when the counter is created. Defaults to None.
+
+        Returns:
+            int: New value
+        """
+        return await self._one("incr", key, amount, ttl)
+
+    async def close(self) -> None:
+        """Release the backend resources."""
@@ -0,0 +1,145 @@
+"""In-process key-value store."""
+
+import time
+from typing import Any
+
+from src.common.kv.base import Command, KVError, KVStore
+
+
+class MemoryStore(KVStore):
+    """Store local to the process, for a single worker and tests.
+
+    Expired keys are dropped on access, and swept whenever the number of
+    keys doubles since the last sweep, so keys that are never read again
+    do not accumulate.
+    """
+
+    def __init__(self, sweep_threshold: int = 1024) -> None:
+        """Class initializer.
+
+        Args:
+            sweep_threshold (int, optional): Minimum number of keys before sweeping. Defaults to 1024.
+        """
+        self.sweep_threshold = sweep_threshold
+        self._data: dict[str, tuple[str, float | None]] = {}
+        self._sweep_at = sweep_threshold
+
+    def _sweep(self, now: float) -> None:
+        """Drop every expired key.
+
+        Args:
+            now (float): Current monotonic time
+        """
+        expired = [
+            key
+            for key, (_, deadline) in self._data.items()
+            if deadline is not None and deadline <= now
+        ]
+        for key in expired:
+            del self._data[key]
+        self._sweep_at = max(self.sweep_threshold, len(self._data) * 2)
+
+    def _live(self, key: str, now: float) -> tuple[str, float | None] | None:
+        """Return an entry, dropping it if expired.
+
+        Args:
+            key (str): Key
+            now (float): Current monotonic time
+
+        Returns:
+            tuple[str, float | None] | None: Value and deadline
+        """
+        item = self._data.get(key)
+        if item is not None and item[1] is not None and item[1] <= now:
+            del self._data[key]
+            return None
+        return item
+
+    def _prefixed(self, prefix: str, now: float) -> list[str]:
+        """Live keys starting with a prefix.
+
+        Args:
+            prefix (str): Key prefix
+            now (float): Current monotonic time
+
+        Returns:
+            list[str]: Keys
+        """
+        return [
+            key
+            for key in list(self._data)
+            if key.startswith(prefix) and self._live(key, now) is not None
+        ]
+
+    def _run(self, name: str, args: tuple, now: float) -> Any:
+        """Run one command.
+
+        Args:
+            name (str): Command name
+            args (tuple): Command arguments
+            now (float): Current monotonic time
+
+        Raises:
+            KVError: If a counter holds a non integer value
+
+        Returns:
+            Any: Command result
+        """
+        if name == "get":
+            item = self._live(args[0], now)
+            return item[0] if item else None
+        if name == "set":
+            key, value, ttl = args
+            self._data[key] = (value, None if ttl is None else now + ttl)
+            return None
+        if name == "delete":
+            removed = 0
+            for key in args:
+                if self._live(key, now) is not None:
+                    del self._data[key]
+                    removed += 1
+            return removed
+        if name == "delete_prefix":
+            keys = self._prefixed(args[0], now)
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+        if name == "keys":
+            return self._prefixed(args[0], now)
+        if name == "ttl":
+            item = self._live(args[0], now)
+            return None if item is None or item[1] is None else item[1] - now
+        if name == "expire":
+            key, ttl = args
+            item = self._live(key, now)
+            if item is None:
+                return False
+            self._data[key] = (item[0], now + ttl)
+            return True
+        if name == "incr":
+            key, amount, ttl = args
+            item = self._live(key, now)
+            if item is None:
+                item = ("0", None if ttl is None else now + ttl)
+            try:
+                value = int(item[0]) + amount
+            except ValueError as e:
+                raise KVError(f"Value of {key} is not an integer") from e
+            self._data[key] = (str(value), item[1])
+            return value
+        raise KVError(f"Unknown command {name}")
+
+    async def execute(self, commands: list[Command]) -> list[Any]:
+        """Run commands in order.
+
+        Args:
+            commands (list[Command]): Commands to run
+
+        Returns:
+            list[Any]: One result per command
+        """
+        now = time.monotonic()
+        results = [self._run(name, args, now) for name, args in commands]
+        if len(self._data) >= self._sweep_at:
+            self._sweep(now)
+        return results
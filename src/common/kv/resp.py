@@ -0,0 +1,410 @@
+"""Key-value store speaking the Redis serialization protocol (RESP2).
+
+A small client built on asyncio streams, so any Redis compatible server
+can be used without an extra dependency. Connections are pooled and a
+batch of commands is written at once and its replies read back in order,
+one network round trip per pipeline. Prefix operations scan the keyspace
+with ``SCAN MATCH`` and are the only commands needing more round trips.
+"""
+
+import asyncio
+import math
+from typing import Any
+from urllib.parse import unquote, urlparse
+
+from src.common.kv.base import Command, KVError, KVStore
+
+_GLOB_SPECIAL = "\\*?[]"
+
+
+class ReplyError(KVError):
+    """Error reply, the connection stays usable."""
+
+
+def _escape_glob(prefix: str) -> str:
+    """Escape a prefix for a ``MATCH`` pattern.
+
+    Args:
+        prefix (str): Key prefix
+
+    Returns:
+        str: Pattern matching keys starting with the prefix
+    """
+    return "".join("\\" + c if c in _GLOB_SPECIAL else c for c in prefix) + "*"
+
+
+def _ms(seconds: float) -> str:
+    """Milliseconds argument of ``PX`` and ``PEXPIRE``, at least 1.
+
+    Args:
+        seconds (float): Duration
+
+    Returns:
+        str: Milliseconds
+    """
+    return str(max(1, math.ceil(seconds * 1000)))
+
+
+def encode_command(*args: str) -> bytes:
+    """Serialize a command as an array of bulk strings.
+
+    Args:
+        *args (str): Command name and arguments
+
+    Returns:
+        bytes: RESP message
+    """
+    parts = [f"*{len(args)}\r\n".encode()]
+    for arg in args:
+        data = arg.encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """Parse one reply.
+
+    Error replies are returned as :class:`ReplyError` instances rather than
+    raised, so the remaining replies of a pipeline are still consumed.
+
+    Args:
+        reader (asyncio.StreamReader): Connection reader
+
+    Raises:
+        KVError: If the connection closed or the reply is malformed
+
+    Returns:
+        Any: Decoded reply
+    """
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise KVError("Connection closed by the server")
+    kind, body = line[:1], line[1:-2]
+    if kind == b"+":
+        return body.decode()
+    if kind == b"-":
+        return ReplyError(body.decode())
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        length = int(body)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2].decode()
+    if kind == b"*":
+        length = int(body)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise KVError(f"Malformed reply {line!r}")
+
+
+class RESPStore(KVStore):
+    """Store backed by a Redis compatible server."""
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: str | None = None,
+        username: str | None = None,
+        pool_size: int = 10,
+        timeout: float = 5.0,
+        scan_count: int = 1000,
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            host (str, optional): Server host. Defaults to "localhost".
+            port (int, optional): Server port. Defaults to 6379.
+            db (int, optional): Database index. Defaults to 0.
+            password (str | None, optional): Password. Defaults to None.
+            username (str | None, optional): ACL user name. Defaults to None.
+            pool_size (int, optional): Maximum open connections. Defaults to 10.
+            timeout (float, optional): Seconds to wait for a batch. Defaults to 5.0.
+            scan_count (int, optional): ``SCAN`` page size hint. Defaults to 1000.
+        """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.username = username
+        self.timeout = timeout
+        self.scan_count = scan_count
+        self._idle: list[tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "RESPStore":
+        """Build a store from ``redis://[[user]:password@]host[:port][/db]``.
+
+        Args:
+            url (str): Server URL
+            **kwargs (Any): Extra initializer arguments
+
+        Returns:
+            RESPStore: Store
+        """
+        parsed = urlparse(url)
+        path = parsed.path.strip("/")
+        return cls(
+            host=parsed.hostname or "localhost",
+            port=parsed.port or 6379,
+            db=int(path) if path else 0,
+            password=unquote(parsed.password) if parsed.password else None,
+            username=unquote(parsed.username) if parsed.username else None,
+            **kwargs,
+        )
+
+    async def _connect(
+        self,
+    ) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        """Open and set up a connection.
+
+        Returns:
+            tuple[asyncio.StreamReader, asyncio.StreamWriter]: Connection
+        """
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        setup = []
+        if self.password:
+            auth = (
+                [self.username, self.password]
+                if self.username
+                else [self.password]
+            )
+            setup.append(("AUTH", *auth))
+        if self.db:
+            setup.append(("SELECT", str(self.db)))
+        for reply in await self._roundtrip(reader, writer, setup):
+            if isinstance(reply, ReplyError):
+                writer.close()
+                raise reply
+        return reader, writer
+
+    @staticmethod
+    async def _roundtrip(
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        commands: list[tuple[str, ...]],
+    ) -> list[Any]:
+        """Write commands at once and read their replies.
+
+        Args:
+            reader (asyncio.StreamReader): Connection reader
+            writer (asyncio.StreamWriter): Connection writer
+            commands (list[tuple[str, ...]]): Raw commands
+
+        Returns:
+            list[Any]: Replies, errors included
+        """
+        if not commands:
+            return []
+        writer.write(b"".join(encode_command(*c) for c in commands))
+        await writer.drain()
+        return [await read_reply(reader) for _ in commands]
+
+    def _translate(self, name: str, args: tuple) -> list[tuple[str, ...]]:
+        """Raw commands implementing a store command.
+
+        Args:
+            name (str): Command name
+            args (tuple): Command arguments
+
+        Raises:
+            KVError: If the command is unknown
+
+        Returns:
+            list[tuple[str, ...]]: Raw commands, the last reply is the result
+        """
+        if name == "get":
+            return [("GET", args[0])]
+        if name == "set":
+            key, value, ttl = args
+            if ttl is None:
+                return [("SET", key, value)]
+            return [("SET", key, value, "PX", _ms(ttl))]
+        if name == "delete":
+            return [("DEL", *args)]
+        if name == "ttl":
+            return [("PTTL", args[0])]
+        if name == "expire":
+            return [("PEXPIRE", args[0], _ms(args[1]))]
+        if name == "incr":
+            key, amount, ttl = args
+            raw = [("INCRBY", key, str(amount))]
+            if ttl is not None:
+                # Creates the counter with its expiry, a no-op if it exists
+                raw.insert(0, ("SET", key, "0", "PX", _ms(ttl), "NX"))
+            return raw
+        raise KVError(f"Unknown command {name}")
+
+    @staticmethod
+    def _result(name: str, reply: Any) -> Any:
+        """Convert the reply of a store command.
+
+        Args:
+            name (str): Command name
+            reply (Any): Last raw reply
+
+        Returns:
+            Any: Command result
+        """
+        if name == "set":
+            return None
+        if name == "ttl":
+            return reply / 1000 if reply >= 0 else None
+        if name == "expire":
+            return bool(reply)
+        return reply
+
+    async def _scan(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        prefix: str,
+    ) -> list[str]:
+        """List the keys starting with a prefix.
+
+        Args:
+            reader (asyncio.StreamReader): Connection reader
+            writer (asyncio.StreamWriter): Connection writer
+            prefix (str): Key prefix
+
+        Raises:
+            KVError: If the server rejects the scan
+
+        Returns:
+            list[str]: Keys
+        """
+        pattern, cursor, keys = _escape_glob(prefix), "0", set()
+        while True:
+            (reply,) = await self._roundtrip(
+                reader,
+                writer,
+                [
+                    (
+                        "SCAN",
+                        cursor,
+                        "MATCH",
+                        pattern,
+                        "COUNT",
+                        str(self.scan_count),
+                    )
+                ],
+            )
+            if isinstance(reply, ReplyError):
+                raise reply
+            cursor, page = reply
+            keys.update(page)
+            if cursor == "0":
+                return list(keys)
+
+    async def _batch(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        commands: list[Command],
+    ) -> list[Any]:
+        """Run commands, pipelining every run of non prefix commands.
+
+        Args:
+            reader (asyncio.StreamReader): Connection reader
+            writer (asyncio.StreamWriter): Connection writer
+            commands (list[Command]): Commands to run
+
+        Raises:
+            KVError: If the server returns an error
+
+        Returns:
+            list[Any]: One result per command
+        """
+        results: list[Any] = []
+        pending: list[tuple[str, int]] = []
+        raw: list[tuple[str, ...]] = []
+
+        async def flush() -> None:
+            replies = await self._roundtrip(reader, writer, raw)
+            end = 0
+            for name, count in pending:
+                end += count
+                reply = replies[end - 1]
+                errors = [
+                    r
+                    for r in replies[end - count : end]
+                    if isinstance(r, ReplyError)
+                ]
+                if errors:
+                    raise errors[0]
+                results.append(self._result(name, reply))
+            pending.clear()
+            raw.clear()
+
+        for name, args in commands:
+            if name in ("keys", "delete_prefix"):
+                await flush()
+                keys = await self._scan(reader, writer, args[0])
+                if name == "keys":
+                    results.append(keys)
+                    continue
+                removed = 0
+                for start in range(0, len(keys), self.scan_count):
+                    (reply,) = await self._roundtrip(
+                        reader,
+                        writer,
+                        [("DEL", *keys[start : start + self.scan_count])],
+                    )
+                    if isinstance(reply, ReplyError):
+                        raise reply
+                    removed += reply
+                results.append(removed)
+                continue
+            translated = self._translate(name, args)
+            pending.append((name, len(translated)))
+            raw.extend(translated)
+        await flush()
+        return results
+
+    async def execute(self, commands: list[Command]) -> list[Any]:
+        """Run commands on a pooled connection.
+
+        Args:
+            commands (list[Command]): Commands to run
+
+        Raises:
+            KVError: If the server fails or does not answer in time
+
+        Returns:
+            list[Any]: One result per command
+        """
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(
+                        self._connect(), self.timeout
+                    )
+                results = await asyncio.wait_for(
+                    self._batch(*connection, commands), self.timeout
+                )
+            except ReplyError:
+                # Every reply was read, the connection is still in sync
+                if connection is not None:
+                    self._idle.append(connection)
+                raise
+            except BaseException as e:
+                # Unread replies of a failed batch would be read by the next one
+                if connection is not None:
+                    connection[1].close()
+                if isinstance(e, (OSError, asyncio.TimeoutError)):
+                    raise KVError(f"Key-value server error {e!r}") from e
+                raise
+            self._idle.append(connection)
+            return results
+
+    async def close(self) -> None:
+        """Close the pooled connections."""
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
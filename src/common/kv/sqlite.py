@@ -0,0 +1,220 @@
+"""Key-value store in a SQLite file shared by the workers of a host."""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from src.common.kv.base import Command, KVError, KVStore
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_kv_expires_at ON kv (expires_at);
+"""
+
+_READ_COMMANDS = {"get", "keys", "ttl"}
+
+
+def _prefix_bounds(prefix: str) -> tuple[str, str]:
+    """Key range matching a prefix, so lookups use the primary key index.
+
+    Args:
+        prefix (str): Key prefix
+
+    Returns:
+        tuple[str, str]: Inclusive lower and exclusive upper bound
+    """
+    return prefix, prefix + "\U0010ffff"
+
+
+class SQLiteStore(KVStore):
+    """Store backed by a SQLite file in WAL mode.
+
+    Each batch of commands runs in a worker thread, batches containing a
+    write run in a single ``BEGIN IMMEDIATE`` transaction. Expired rows are
+    skipped on read and purged at most once per ``purge_interval``.
+    """
+
+    def __init__(self, path: str, purge_interval: float = 60) -> None:
+        """Class initializer.
+
+        Args:
+            path (str): Database file
+            purge_interval (float, optional): Seconds between expired row purges. Defaults to 60.
+        """
+        self.path = path
+        self.purge_interval = purge_interval
+        self._conn: sqlite3.Connection | None = None
+        self._lock = threading.Lock()
+        self._purged_at = 0.0
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the database on first use.
+
+        Returns:
+            sqlite3.Connection: Connection shared by the store
+        """
+        if self._conn is None:
+            if os.path.dirname(self.path):
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(
+                self.path,
+                timeout=5,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    @staticmethod
+    def _run(
+        conn: sqlite3.Connection, name: str, args: tuple, now: float
+    ) -> Any:
+        """Run one command.
+
+        Args:
+            conn (sqlite3.Connection): Connection
+            name (str): Command name
+            args (tuple): Command arguments
+            now (float): Current unix time
+
+        Raises:
+            KVError: If a counter holds a non integer value
+
+        Returns:
+            Any: Command result
+        """
+        live = "(expires_at IS NULL OR expires_at > ?)"
+        if name == "get":
+            row = conn.execute(
+                f"SELECT value FROM kv WHERE key = ? AND {live}", (args[0], now)
+            ).fetchone()
+            return row[0] if row else None
+        if name == "set":
+            key, value, ttl = args
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, value, None if ttl is None else now + ttl),
+            )
+            return None
+        if name == "delete":
+            removed = 0
+            for key in args:
+                removed += conn.execute(
+                    f"DELETE FROM kv WHERE key = ? AND {live}", (key, now)
+                ).rowcount
+                conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            return removed
+        if name == "delete_prefix":
+            low, high = _prefix_bounds(args[0])
+            removed = conn.execute(
+                f"DELETE FROM kv WHERE key >= ? AND key < ? AND {live}",
+                (low, high, now),
+            ).rowcount
+            conn.execute(
+                "DELETE FROM kv WHERE key >= ? AND key < ?", (low, high)
+            )
+            return removed
+        if name == "keys":
+            low, high = _prefix_bounds(args[0])
+            rows = conn.execute(
+                f"SELECT key FROM kv WHERE key >= ? AND key < ? AND {live}",
+                (low, high, now),
+            )
+            return [row[0] for row in rows]
+        if name == "ttl":
+            row = conn.execute(
+                f"SELECT expires_at FROM kv WHERE key = ? AND {live}",
+                (args[0], now),
+            ).fetchone()
+            return None if row is None or row[0] is None else row[0] - now
+        if name == "expire":
+            key, ttl = args
+            return bool(
+                conn.execute(
+                    f"UPDATE kv SET expires_at = ? WHERE key = ? AND {live}",
+                    (now + ttl, key, now),
+                ).rowcount
+            )
+        if name == "incr":
+            key, amount, ttl = args
+            row = conn.execute(
+                f"SELECT value, expires_at FROM kv WHERE key = ? AND {live}",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                row = ("0", None if ttl is None else now + ttl)
+            try:
+                value = int(row[0]) + amount
+            except ValueError as e:
+                raise KVError(f"Value of {key} is not an integer") from e
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, str(value), row[1]),
+            )
+            return value
+        raise KVError(f"Unknown command {name}")
+
+    def _execute_sync(self, commands: list[Command]) -> list[Any]:
+        """Run commands in order, in one transaction if any of them writes.
+
+        Args:
+            commands (list[Command]): Commands to run
+
+        Raises:
+            KVError: If the database fails
+
+        Returns:
+            list[Any]: One result per command
+        """
+        now = time.time()
+        writes = any(name not in _READ_COMMANDS for name, _ in commands)
+        with self._lock:
+            conn = self._connection()
+            try:
+                if not writes:
+                    return [self._run(conn, n, a, now) for n, a in commands]
+                conn.execute("BEGIN IMMEDIATE")
+                try:
+                    results = [self._run(conn, n, a, now) for n, a in commands]
+                    if now - self._purged_at >= self.purge_interval:
+                        conn.execute(
+                            "DELETE FROM kv WHERE expires_at <= ?", (now,)
+                        )
+                        self._purged_at = now
+                except BaseException:
+                    conn.execute("ROLLBACK")
+                    raise
+                conn.execute("COMMIT")
+                return results
+            except sqlite3.Error as e:
+                raise KVError(str(e)) from e
+
+    async def execute(self, commands: list[Command]) -> list[Any]:
+        """Run commands in order in a worker thread.
+
+        Args:
+            commands (list[Command]): Commands to run
+
+        Returns:
+            list[Any]: One result per command
+        """
+        return await asyncio.to_thread(self._execute_sync, commands)
+
+    async def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -1,7 +1,6 @@
 """Base app config module."""
 
 import os
-import secrets
 from typing import List, Literal, Optional, Union
 
 from pydantic import AnyHttpUrl, EmailStr, field_validator
@@ -39,11 +38,69 @@ class CoreSettings(BaseConfig):
     REDOCS_URL: str | None = f"{API_V1_STR}/redocs"
     OPENAPI_URL: str | None = f"{API_V1_STR}/openapi"
 
-    SECRET_KEY: str = secrets.token_urlsafe(32)
+    # HMAC secret used when no JWT_KEYS_FILE is configured, without it a
+    # secret is generated once per host and shared by all workers
+    SECRET_KEY: str | None = None
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
     TOKEN_EXPIRE_MINUTES: int = 15
     JWT_ALGORITHM: str = "HS256"
+    # JSON key ring (EdDSA, RS256 and HMAC keys selected by kid)
+    JWT_KEYS_FILE: str | None = None
+    JWT_KEYS_RELOAD_SECONDS: int = 30
+    JWKS_MAX_AGE_SECONDS: int = 300
+    # Verified token payloads, entries never outlive the token expiry
+    TOKEN_CACHE_MAXSIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+    # Revoked tokens, shared by the workers of a host
+    TOKEN_REVOCATION_DB: str = os.path.join(SRC_PATH, "revocations.db")
+    TOKEN_REVOCATION_REFRESH_SECONDS: int = 30
+    TOKEN_REVOCATION_BLOOM_CAPACITY: int = 100000
+    TOKEN_REVOCATION_BLOOM_ERROR_RATE: float = 0.001
+    # Refresh token families, cached per worker to reject replays early
+    REFRESH_FAMILY_CACHE_MAXSIZE: int = 10000
+    REFRESH_FAMILY_CACHE_TTL_SECONDS: int = 3600
+    REFRESH_FAMILY_PURGE_SECONDS: int = 3600
+    # Key-value store, memory://, sqlite:///path or redis://host:port/db
+    KV_STORE_URL: str = "memory://"
+    KV_STORE_POOL_SIZE: int = 10
+    # Sessions of a user are tracked under {TOKEN_REDIS_PREFIX}:{user_id}:
+    TOKEN_REDIS_PREFIX: str = "token"
+    # Without multi login a new login ends the other sessions of the user
+    TOKEN_MULTI_LOGIN: bool = True
+    # Failed login throttling, counters are shared through the key-value
+    # store with LOGIN_THROTTLE_SHARED
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_THROTTLE_SHARED: bool = False
+    LOGIN_THROTTLE_WINDOW_SECONDS: int = 900
+    LOGIN_THROTTLE_ACCOUNT_FREE_ATTEMPTS: int = 5
+    LOGIN_THROTTLE_ACCOUNT_LOCKOUT_ATTEMPTS: int = 20
+    LOGIN_THROTTLE_IP_FREE_ATTEMPTS: int = 20
+    LOGIN_THROTTLE_IP_LOCKOUT_ATTEMPTS: int = 100
+    LOGIN_THROTTLE_BASE_DELAY_SECONDS: float = 1
+    LOGIN_THROTTLE_MAX_DELAY_SECONDS: float = 60
+    LOGIN_THROTTLE_LOCKOUT_SECONDS: int = 900
+    # Login times are buffered and written in batches
+    LOGIN_TIME_FLUSH_INTERVAL_MS: int = 500
+    LOGIN_TIME_FLUSH_MAX_ENTRIES: int = 500
+    # User snapshots by id, username and email, invalidated by user writes
+    CURRENT_USER_CACHE_MAXSIZE: int = 10000
+    CURRENT_USER_CACHE_TTL_SECONDS: int = 60
+    CURRENT_USER_CACHE_MAX_BYTES: int = 16 * 1024 * 1024
+
+    # Password hash policy, the first scheme hashes new passwords and the
+    # others are only verified and upgraded on login. Tune the costs with
+    # `python -m src.auth.calibrate`, argon2 requires argon2-cffi.
+    PASSWORD_HASH_SCHEMES: List[str] = ["bcrypt"]
+    PASSWORD_BCRYPT_ROUNDS: int = 12
+    PASSWORD_ARGON2_TIME_COST: int = 3
+    PASSWORD_ARGON2_MEMORY_COST: int = 65536
+    PASSWORD_ARGON2_PARALLELISM: int = 4
+
+    # Password hashing worker pool, 0 workers runs hashing in threads
+    PASSWORD_HASH_POOL_SIZE: int = 2
+    PASSWORD_HASH_MAX_PENDING: int = 64
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 5.0
 
     # BACKEND_CORS_ORIGINS is a JSON-formatted list of origins
     # e.g: '["http://localhost", "http://localhost:4200", "http://localhost:3000", \
@@ -98,7 +155,16 @@ class DatabaseSettings(BaseConfig):
 
     SQL_DB: str = os.getenv("SQL_DB")
     DATABASE_CONNECTION_URL: str = ""
-    QUERY_ECHO: bool = True
+    QUERY_ECHO: bool = False
+    # Pool sizing and SQLite pragmas, see src/db/tuning.py
+    DB_TUNING_PROFILE: Literal["safe", "balanced", "throughput"] = "safe"
+    # Replicas serving plain reads, DATABASE_CONNECTION_URL is the writer.
+    # A caller reads from the writer for a while after writing, which
+    # must exceed the replication lag.
+    DATABASE_READER_URLS: List[str] = []
+    DATABASE_READ_YOUR_WRITES_SECONDS: float = 5
+    # Default age of the per worker row count snapshots, see src/db/counts.py
+    ROW_COUNT_SNAPSHOT_SECONDS: float = 60
 
     @field_validator("DATABASE_CONNECTION_URL", mode="before")
     def assemble_db_connection(
@@ -130,6 +196,18 @@ class EmailSettings(BaseConfig):
     EMAILS_FROM_EMAIL: Optional[EmailStr]
     EMAILS_FROM_NAME: Optional[str] = None
     EMAIL_TEST_USER: EmailStr = "test@example.com"  # type: ignore
+    # Persistent SMTP connections shared by the outbox dispatcher
+    SMTP_POOL_SIZE: int = 2
+    SMTP_TIMEOUT_SECONDS: float = 10
+    # Outbox retries double the backoff per attempt up to the maximum,
+    # then the message is dead-lettered
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50
+    EMAIL_OUTBOX_POLL_SECONDS: float = 5
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 8
+    EMAIL_OUTBOX_BACKOFF_SECONDS: float = 30
+    EMAIL_OUTBOX_BACKOFF_MAX_SECONDS: float = 3600
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 120
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 7
 
     @field_validator("EMAILS_FROM_NAME")
     def get_project_name(cls, v: Optional[str], info: ValidationInfo) -> str:
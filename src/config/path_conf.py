@@ -13,5 +13,8 @@ SRC_PATH = os.path.join(BASE_PATH, "src")
 # Log file path
 LOG_DIR = os.path.join(BASE_PATH, "log")
 
+# Generated signing secrets
+KEYS_DIR = os.path.join(BASE_PATH, "keys")
+
 # Mount static directory
 STATIC_DIR = os.path.join(BASE_PATH, "static")
@@ -0,0 +1,355 @@
+"""Row counts without a table scan per call.
+
+Three modes are offered per call:
+
+- ``exact`` reads a counter row kept in ``row_counts`` for the tables of
+  repositories with ``count_tracked``. The repository adjusts it in the same
+  transaction as its inserts and deletes, so it is exact across workers. A
+  missing counter is seeded with ``COUNT(*)`` while writes to the table are
+  locked out, as a write running before the counter exists cannot adjust
+  it. While writes are in flight the seed is skipped and the call scans.
+  Writes whose effect on the count is unknown, such as upserts, drop the
+  counter to be seeded again. Untracked tables run ``COUNT(*)``.
+- ``estimated`` reads the planner statistics, ``sqlite_stat1`` on SQLite,
+  ``pg_class.reltuples`` on PostgreSQL or ``information_schema`` on MySQL,
+  as of the last ``ANALYZE``. Without statistics it falls back to the
+  cached snapshot.
+- ``cached`` returns an exact count taken at most ``max_age`` seconds ago
+  by this worker.
+"""
+
+import time
+from typing import Any, Callable, Literal
+
+from sqlalchemy import (
+    String,
+    Table,
+    column,
+    delete,
+    func,
+    literal,
+    select,
+    text,
+    true,
+    update,
+)
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.common.log import log
+from src.config import settings
+from src.db.base import Base
+from src.utils.timezone import timezone
+
+func: Callable
+CountMode = Literal["exact", "estimated", "cached"]
+
+
+class RowCount(Base):
+    """Maintained number of rows of a table."""
+
+    __tablename__ = "row_counts"
+
+    table_name: Mapped[str] = mapped_column(String(64), primary_key=True)
+    row_count: Mapped[int]
+
+
+_row_counts = RowCount.__table__
+
+
+class RowCounter:
+    """Exact, estimated and cached row counts of tables."""
+
+    def __init__(self, snapshot_max_age: float) -> None:
+        """Class initializer.
+
+        Args:
+            snapshot_max_age (float): Default age in seconds of a cached count
+        """
+        self.snapshot_max_age = snapshot_max_age
+        self._tracked: set[str] = set()
+        self._snapshots: dict[str, tuple[float, int]] = {}
+        self._stats = {
+            "scans": 0,
+            "counters": 0,
+            "estimates": 0,
+            "snapshots": 0,
+        }
+
+    def track(self, table: Table) -> None:
+        """Maintain an exact counter for a table.
+
+        Args:
+            table (Table): Counted table
+        """
+        self._tracked.add(table.name)
+
+    def is_tracked(self, table: Table) -> bool:
+        """Check if a table has a maintained counter.
+
+        Args:
+            table (Table): Counted table
+
+        Returns:
+            bool: True if writes must adjust the counter
+        """
+        return table.name in self._tracked
+
+    async def adjust(
+        self, session: AsyncSession, table: Table, delta: int | None
+    ) -> None:
+        """Apply a write to the counter within the pending transaction.
+
+        Args:
+            session (AsyncSession): database session
+            table (Table): Written table
+            delta (int | None): Rows added, negative for deletes, None when unknown to drop the counter
+        """
+        if delta is None:
+            await session.execute(
+                delete(_row_counts).where(
+                    _row_counts.c.table_name == table.name
+                )
+            )
+        elif delta:
+            # A missing counter is left missing, it is seeded on next read
+            await session.execute(
+                update(_row_counts)
+                .where(_row_counts.c.table_name == table.name)
+                .values(row_count=_row_counts.c.row_count + delta)
+            )
+        self._snapshots.pop(table.name, None)
+
+    async def _scan(self, session: AsyncSession, table: Table) -> int:
+        """Count the rows of a table.
+
+        Args:
+            session (AsyncSession): database session
+            table (Table): Counted table
+
+        Returns:
+            int: Number of rows
+        """
+        self._stats["scans"] += 1
+        return await session.scalar(select(func.count()).select_from(table))
+
+    async def _seed(self, session: AsyncSession, table: Table) -> int:
+        """Create the counter of a table from a scan, in one statement.
+
+        A write that ran its counter update before the counter existed is
+        only counted if it committed before the scan, so writes are locked
+        out until the counter is committed: by the write lock on SQLite, a
+        ``SHARE`` table lock on PostgreSQL and the next-key locks of the scan
+        on MySQL under ``REPEATABLE READ``. PostgreSQL and MySQL do not wait
+        for these locks, uncommitted writes fail the seed. The counter is
+        committed on a connection of its own, leaving the transaction of the
+        session alone.
+
+        Args:
+            session (AsyncSession): database session
+            table (Table): Counted table
+
+        Raises:
+            SQLAlchemyError: If the table is being written
+
+        Returns:
+            int: Counter value
+        """
+        self._stats["scans"] += 1
+        dialect = session.bind.dialect.name
+        rows = select(
+            literal(table.name),
+            func.count(),
+            literal(timezone.now_utc(), _row_counts.c.created_time.type),
+        ).select_from(table)
+        if dialect == "sqlite":
+            # Without a WHERE clause SQLite parses ON CONFLICT as a join
+            rows = rows.where(true())
+        columns = ["table_name", "row_count", "created_time"]
+        if dialect in ("sqlite", "postgresql"):
+            dialect_insert = (
+                sqlite.insert if dialect == "sqlite" else postgresql.insert
+            )
+            statement = (
+                dialect_insert(_row_counts)
+                .from_select(columns, rows)
+                .on_conflict_do_nothing(index_elements=["table_name"])
+            )
+        else:
+            statement = (
+                mysql.insert(_row_counts)
+                .from_select(columns, rows.with_for_update(nowait=True))
+                .prefix_with("IGNORE")
+            )
+        async with session.bind.begin() as conn:
+            if dialect == "postgresql":
+                name = conn.dialect.identifier_preparer.format_table(table)
+                await conn.execute(
+                    text(f"LOCK TABLE {name} IN SHARE MODE NOWAIT")
+                )
+            await conn.execute(statement)
+            return await conn.scalar(
+                select(_row_counts.c.row_count).where(
+                    _row_counts.c.table_name == table.name
+                )
+            )
+
+    async def exact(self, session: AsyncSession, table: Table) -> int:
+        """Exact row count, from the counter of tracked tables.
+
+        Args:
+            session (AsyncSession): database session
+            table (Table): Counted table
+
+        Returns:
+            int: Number of rows
+        """
+        if not self.is_tracked(table):
+            value = await self._scan(session, table)
+        else:
+            query = select(_row_counts.c.row_count).where(
+                _row_counts.c.table_name == table.name
+            )
+            value = await session.scalar(query)
+            if value is None:
+                try:
+                    value = await self._seed(session, table)
+                except SQLAlchemyError as e:
+                    # Writes in flight, possibly of this very session
+                    log.warning(f"Row counter of {table.name} not seeded {e}")
+                    value = await self._scan(session, table)
+            else:
+                self._stats["counters"] += 1
+        self._snapshots[table.name] = (time.monotonic(), value)
+        return value
+
+    async def cached(
+        self, session: AsyncSession, table: Table, max_age: float | None = None
+    ) -> int:
+        """Exact row count taken recently by this worker.
+
+        Args:
+            session (AsyncSession): database session
+            table (Table): Counted table
+            max_age (float | None, optional): Accepted age in seconds, or ``snapshot_max_age``. Defaults to None.
+
+        Returns:
+            int: Number of rows
+        """
+        max_age = self.snapshot_max_age if max_age is None else max_age
+        snapshot = self._snapshots.get(table.name)
+        if snapshot is not None and time.monotonic() - snapshot[0] <= max_age:
+            self._stats["snapshots"] += 1
+            return snapshot[1]
+        return await self.exact(session, table)
+
+    async def _statistics(
+        self, session: AsyncSession, table: Table
+    ) -> int | None:
+        """Row count recorded by the last ``ANALYZE``.
+
+        Args:
+            session (AsyncSession): database session
+            table (Table): Counted table
+
+        Returns:
+            int | None: Estimated number of rows, None without statistics
+        """
+        dialect = session.get_bind().dialect.name
+        if dialect == "sqlite":
+            analyzed = await session.scalar(
+                text(
+                    "SELECT 1 AS analyzed FROM sqlite_master "
+                    "WHERE type = 'table' AND name = 'sqlite_stat1'"
+                ).columns(column("analyzed"))
+            )
+            if not analyzed:
+                return None
+            # The first number of every entry is the row count of the index,
+            # or of the table for the entry without one
+            stats = await session.scalars(
+                text("SELECT stat FROM sqlite_stat1 WHERE tbl = :name").columns(
+                    column("stat")
+                ),
+                {"name": table.name},
+            )
+            counts = [int(stat.split()[0]) for stat in stats]
+            return max(counts) if counts else None
+        if dialect == "postgresql":
+            value = await session.scalar(
+                text(
+                    "SELECT reltuples::bigint AS row_count FROM pg_class "
+                    "WHERE oid = to_regclass(:name)"
+                ).columns(column("row_count")),
+                {"name": table.name},
+            )
+            return value if value is not None and value >= 0 else None
+        if dialect in ("mysql", "mariadb"):
+            return await session.scalar(
+                text(
+                    "SELECT table_rows FROM information_schema.tables "
+                    "WHERE table_schema = DATABASE() AND table_name = :name"
+                ).columns(column("table_rows")),
+                {"name": table.name},
+            )
+        return None
+
+    async def estimated(self, session: AsyncSession, table: Table) -> int:
+        """Approximate row count from the planner statistics.
+
+        Args:
+            session (AsyncSession): database session
+            table (Table): Counted table
+
+        Returns:
+            int: Estimated number of rows
+        """
+        value = await self._statistics(session, table)
+        if value is None:
+            return await self.cached(session, table)
+        self._stats["estimates"] += 1
+        return value
+
+    async def count(
+        self,
+        session: AsyncSession,
+        table: Table,
+        mode: CountMode = "exact",
+        max_age: float | None = None,
+    ) -> int:
+        """Row count of a table in the requested mode.
+
+        Args:
+            session (AsyncSession): database session
+            table (Table): Counted table
+            mode (CountMode, optional): ``exact``, ``estimated`` or ``cached``. Defaults to "exact".
+            max_age (float | None, optional): Accepted age in seconds of a cached count. Defaults to None.
+
+        Raises:
+            ValueError: If the mode is unknown
+
+        Returns:
+            int: Number of rows
+        """
+        if mode == "exact":
+            return await self.exact(session, table)
+        if mode == "estimated":
+            return await self.estimated(session, table)
+        if mode == "cached":
+            return await self.cached(session, table, max_age)
+        raise ValueError(f"Unknown count mode {mode}")
+
+    def stats(self) -> dict[str, Any]:
+        """How counts were answered.
+
+        Returns:
+            dict[str, Any]: Table scans, counter reads, estimates and snapshot hits
+        """
+        return {**self._stats, "tracked": sorted(self._tracked)}
+
+
+row_counter = RowCounter(
+    snapshot_max_age=settings.database.ROW_COUNT_SNAPSHOT_SECONDS
+)
@@ -0,0 +1,272 @@
+"""Keyset pagination with signed cursors.
+
+A page is read with ``WHERE (sort_key, id) > (last_sort_key, last_id)
+ORDER BY sort_key, id LIMIT size``, an index range scan whose cost does not
+depend on how deep the page is, unlike ``OFFSET``. The id breaks ties
+between equal sort keys. NULL sort keys order before every value.
+
+Cursors carry the sort order and the boundary key of the page. They are
+signed, so a client cannot craft keys nor replay a cursor with another
+order.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Generic, Sequence, TypeVar
+
+from fastapi_pagination.cursor import CursorPage, CursorParams
+from sqlalchemy import ColumnElement, and_, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+from src.auth.keys import shared_secret
+from src.common.exception import errors
+from src.config import settings
+from src.config.path_conf import KEYS_DIR
+from src.db.counts import CountMode
+
+_Item = TypeVar("_Item")
+
+
+@dataclass
+class KeysetPage(Generic[_Item]):
+    """Rows of a page and the keys bounding it.
+
+    A key is ``(sort value, id)``, or ``(id,)`` when sorting by id.
+    """
+
+    items: list[_Item]
+    next_key: tuple | None
+    previous_key: tuple | None
+
+
+def keyset_after(
+    column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    key: tuple,
+    descending: bool,
+) -> ColumnElement[bool]:
+    """Condition selecting the rows after a key in scan order.
+
+    Args:
+        column (InstrumentedAttribute): Sort column
+        id_column (InstrumentedAttribute): Primary key column
+        key (tuple): Boundary key
+        descending (bool): Scan in descending order
+
+    Returns:
+        ColumnElement[bool]: Filter condition
+    """
+    if column is id_column:
+        return id_column < key[0] if descending else id_column > key[0]
+    value, id_ = key
+    if value is None:
+        if descending:
+            return and_(column.is_(None), id_column < id_)
+        return or_(and_(column.is_(None), id_column > id_), column.is_not(None))
+    if descending:
+        return or_(tuple_(column, id_column) < (value, id_), column.is_(None))
+    return tuple_(column, id_column) > (value, id_)
+
+
+def keyset_order(
+    column: InstrumentedAttribute,
+    id_column: InstrumentedAttribute,
+    descending: bool,
+) -> list[ColumnElement]:
+    """Order by clauses of a scan.
+
+    Args:
+        column (InstrumentedAttribute): Sort column
+        id_column (InstrumentedAttribute): Primary key column
+        descending (bool): Scan in descending order
+
+    Returns:
+        list[ColumnElement]: Order by clauses
+    """
+    order = [id_column.desc() if descending else id_column.asc()]
+    if column is id_column:
+        return order
+    sort = column.desc() if descending else column.asc()
+    if column.nullable:
+        sort = sort.nulls_last() if descending else sort.nulls_first()
+    return [sort, *order]
+
+
+def _encode_value(value: Any) -> Any:
+    """JSON form of a key value.
+
+    Args:
+        value (Any): Key value
+
+    Returns:
+        Any: JSON compatible value
+    """
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    """Key value of its JSON form.
+
+    Args:
+        value (Any): JSON value
+
+    Returns:
+        Any: Key value
+    """
+    if isinstance(value, dict):
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+class CursorCodec:
+    """Serializes page boundaries into tamper proof cursors."""
+
+    def __init__(self, secret: str) -> None:
+        """Class initializer.
+
+        Args:
+            secret (str): Signing secret
+        """
+        self._key = hashlib.sha256(f"keyset-cursor:{secret}".encode()).digest()
+
+    def _sign(self, payload: str) -> str:
+        """Signature of a payload.
+
+        Args:
+            payload (str): Serialized cursor data
+
+        Returns:
+            str: Truncated HMAC-SHA256 in hex
+        """
+        return hmac.new(
+            self._key, payload.encode(), hashlib.sha256
+        ).hexdigest()[:32]
+
+    def encode(self, data: dict[str, Any]) -> str:
+        """Sign a cursor.
+
+        Args:
+            data (dict[str, Any]): Sort order, direction and key of the boundary
+
+        Returns:
+            str: Cursor
+        """
+        data = {**data, "k": [_encode_value(value) for value in data["k"]]}
+        payload = json.dumps(data, separators=(",", ":"), sort_keys=True)
+        return f"{payload}.{self._sign(payload)}"
+
+    def decode(self, cursor: str) -> dict[str, Any]:
+        """Verify and read a cursor.
+
+        Args:
+            cursor (str): Cursor
+
+        Raises:
+            ValueError: If the cursor is malformed or was tampered with
+
+        Returns:
+            dict[str, Any]: Cursor data
+        """
+        payload, _, signature = cursor.rpartition(".")
+        if not hmac.compare_digest(self._sign(payload), signature):
+            raise ValueError("Invalid cursor")
+        try:
+            data = json.loads(payload)
+            data["k"] = tuple(_decode_value(value) for value in data["k"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise ValueError("Invalid cursor") from e
+        return data
+
+
+cursor_codec = CursorCodec(
+    settings.base.SECRET_KEY
+    or shared_secret(os.path.join(KEYS_DIR, "secret_key"))
+)
+
+
+async def paginate_keyset(
+    session: AsyncSession,
+    repository: Any,
+    params: CursorParams,
+    *,
+    sort: str = "id",
+    descending: bool = False,
+    total: CountMode | None = None,
+    total_max_age: float | None = None,
+    projection: str | None = None,
+    transformer: Callable[[Sequence[Any]], Sequence[Any]] | None = None,
+) -> CursorPage:
+    """Read a page of a repository as a ``fastapi_pagination`` cursor page.
+
+    Args:
+        session (AsyncSession): database session
+        repository (BaseRepository): Repository of the listed model
+        params (CursorParams): Cursor and page size of the request
+        sort (str, optional): Sort column. Defaults to "id".
+        descending (bool, optional): Sort in descending order. Defaults to False.
+        total (CountMode | None, optional): How to count every row, not counted if None. Defaults to None.
+        total_max_age (float | None, optional): Accepted age in seconds of a cached total. Defaults to None.
+        projection (str | None, optional): Name of a set of loader options of the repository. Defaults to None.
+        transformer (Callable[[Sequence[Any]], Sequence[Any]] | None, optional): Converts the rows. Defaults to None.
+
+    Raises:
+        errors.RequestError: If the sort column is not paginable or the cursor is invalid
+
+    Returns:
+        CursorPage: Page
+    """
+    if sort not in repository.keyset_columns:
+        raise errors.RequestError(msg=f"Cannot paginate by {sort}")
+    raw = params.to_raw_params()
+    after = before = None
+    if raw.cursor:
+        try:
+            data = cursor_codec.decode(raw.cursor)
+        except ValueError as e:
+            raise errors.RequestError(msg=str(e)) from e
+        if data.get("s") != sort or data.get("d") != descending:
+            raise errors.RequestError(
+                msg="Cursor does not match the sort order"
+            )
+        if data.get("p"):
+            before = data["k"]
+        else:
+            after = data["k"]
+
+    page = await repository.keyset_page(
+        session,
+        size=raw.size,
+        sort=sort,
+        descending=descending,
+        after=after,
+        before=before,
+        projection=projection,
+    )
+
+    def cursor(key: tuple | None, previous: bool) -> str | None:
+        """Cursor of a page boundary."""
+        if key is None:
+            return None
+        return cursor_codec.encode(
+            {"s": sort, "d": descending, "p": previous, "k": key}
+        )
+
+    items = transformer(page.items) if transformer else page.items
+    return CursorPage.create(
+        items,
+        params,
+        next_=cursor(page.next_key, False),
+        previous=cursor(page.previous_key, True),
+        total=(
+            await repository.count(session, total, total_max_age)
+            if total is not None
+            else None
+        ),
+    )
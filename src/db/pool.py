@@ -0,0 +1,81 @@
+"""Connection pool usage counters.
+
+A session only checks out a pooled connection when it runs its first
+statement, and keeps it until its transaction ends. The counters show how
+many checkouts requests cause, how many connections are in use at once and
+how long each one is held.
+"""
+
+import time
+from typing import Any
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class PoolMonitor:
+    """Checkouts and hold times of the watched engines."""
+
+    def __init__(self) -> None:
+        """Class initializer."""
+        self.checkouts = 0
+        self.in_use = 0
+        self.peak_in_use = 0
+        self.held_seconds = 0.0
+
+    def _checkout(self, record: Any) -> None:
+        """Count a connection leaving the pool.
+
+        Args:
+            record (Any): Connection record
+        """
+        record.info["checked_out_at"] = time.monotonic()
+        self.checkouts += 1
+        self.in_use += 1
+        self.peak_in_use = max(self.peak_in_use, self.in_use)
+
+    def _checkin(self, record: Any) -> None:
+        """Count a connection returning to the pool.
+
+        Args:
+            record (Any): Connection record
+        """
+        checked_out_at = record.info.pop("checked_out_at", None)
+        if checked_out_at is None:
+            return
+        self.in_use -= 1
+        self.held_seconds += time.monotonic() - checked_out_at
+
+    def watch(self, engine: AsyncEngine) -> None:
+        """Count the pool usage of an engine.
+
+        Args:
+            engine (AsyncEngine): Engine
+        """
+
+        @event.listens_for(engine.sync_engine, "checkout")
+        def checkout(dbapi_connection, record, proxy):  # pylint: disable=unused-argument
+            self._checkout(record)
+
+        @event.listens_for(engine.sync_engine, "checkin")
+        def checkin(dbapi_connection, record):  # pylint: disable=unused-argument
+            self._checkin(record)
+
+    def stats(self) -> dict[str, Any]:
+        """Pool usage counters.
+
+        Returns:
+            dict[str, Any]: Checkouts, connections in use and mean hold time
+        """
+        returned = self.checkouts - self.in_use
+        return {
+            "checkouts": self.checkouts,
+            "in_use": self.in_use,
+            "peak_in_use": self.peak_in_use,
+            "mean_hold_ms": (
+                self.held_seconds / returned * 1000 if returned else 0.0
+            ),
+        }
+
+
+pool_monitor = PoolMonitor()
@@ -1,17 +1,58 @@
 """Database base repository."""
 
-from typing import Any, AsyncGenerator, Callable, Generic, Type, TypeVar
+import dataclasses
+from typing import (
+    Any,
+    AsyncGenerator,
+    Generic,
+    Iterator,
+    Sequence,
+    Type,
+    TypeVar,
+)
 
 from pydantic import BaseModel
-from sqlalchemy import Result, asc, delete, desc, func, select, update
+from sqlalchemy import (
+    Insert,
+    Result,
+    Row,
+    Select,
+    asc,
+    bindparam,
+    delete,
+    desc,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.base import ExecutableOption
 
 from src.db.base import Base
+from src.db.counts import CountMode, row_counter
+from src.db.pagination import KeysetPage, keyset_after, keyset_order
+from src.db.statements import statement_registry
+from src.utils.timezone import timezone
 
 _Model = TypeVar("_Model")
 _CreateSchema = TypeVar("_CreateSchema", bound=BaseModel)
 _UpdateSchema = TypeVar("_UpdateSchema", bound=BaseModel)
-func: Callable
+
+
+def _chunks(items: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    """Split a sequence in consecutive slices.
+
+    Args:
+        items (Sequence[Any]): Items
+        size (int): Slice length
+
+    Yields:
+        Iterator[Sequence[Any]]: Slices
+    """
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
 
 
 class BaseRepository(Generic[_Model]):
@@ -20,6 +61,20 @@ class BaseRepository(Generic[_Model]):
     """
 
     schema_class: Type[Base]
+    # Rows per executemany batch of the bulk methods
+    bulk_chunk_size: int = 1000
+    # Rows per batch fetched by the streaming reads
+    stream_batch_size: int = 500
+    # Indexed columns, together with id, pages can be sorted by
+    keyset_columns: tuple[str, ...] = ("id",)
+    # Keep an exact row count updated by the inserts and deletes below
+    count_tracked: bool = False
+    # Model of the rows returned by ``_update``, dicts when None
+    update_dto: Type[BaseModel] | None = None
+    # Loader options of reads that neither pass options nor a projection
+    default_options: tuple[ExecutableOption, ...] = ()
+    # Loader options by name, each loading what one code path reads
+    projections: dict[str, tuple[ExecutableOption, ...]] = {}
 
     def __init__(self, model: Type[_Model]) -> None:
         """Class initializer.
@@ -28,6 +83,8 @@ class BaseRepository(Generic[_Model]):
             model (Type[_Model]): SqlAlchemy base class
         """
         self.schema_class = model
+        if self.count_tracked:
+            row_counter.track(model.__table__)
 
     async def _update(
         self,
@@ -35,38 +92,80 @@ class BaseRepository(Generic[_Model]):
         key: str,
         value: Any,
         payload: dict[str, Any],
-    ) -> Base:
-        """Updates an existed instance of the model in the related table.
-        If some data is not exist in the payload then the null value will
-        be passed to the schema class.
+    ) -> Any | None:
+        """Update the rows matching a key in one statement and commit.
 
-        Args:
-            session (AsyncSession): _description_
-            key (str): _description_
-            value (Any): _description_
-            payload (dict[str, Any]): _description_
+        Only the payload columns are written. The updated row comes back
+        through RETURNING, so nothing is read after the commit. Instances
+        of the rows loaded in the session are updated as well.
 
-        Raises:
-            Exception: _description_
+        Args:
+            session (AsyncSession): database session
+            key (str): Column matching the rows
+            value (Any): Value of the column
+            payload (dict[str, Any]): New column values
 
         Returns:
-            Base: _description_
+            Any | None: First updated row as an ``update_dto``, or a dict without one, None if no row matched
         """
-        query = (
-            update(self.schema_class)
-            .where(getattr(self.schema_class, key) == value)
-            .values(payload)
-            .returning(self.schema_class)
-        )
-        result: Result = await session.execute(query)
-        await session.flush()
+        columns = self.schema_class.__table__.c
+        if self.update_dto is None:
+            returned = list(columns)
+        else:
+            returned = [
+                columns[name]
+                for name in self.update_dto.model_fields
+                if name in columns
+            ]
+        condition = getattr(self.schema_class, key) == value
+        query = update(self.schema_class).where(condition).values(payload)
+        if session.get_bind().dialect.update_returning:
+            result: Result = await session.execute(query.returning(*returned))
+        else:
+            # Without RETURNING the row is read back before the commit
+            await session.execute(query)
+            result = await session.execute(select(*returned).where(condition))
+        row = result.mappings().first()
         await session.commit()
-        await session.refresh(payload)
 
-        return result.scalar_one_or_none()
+        if row is None:
+            return None
+        if self.update_dto is None:
+            return dict(row)
+        return self.update_dto.model_validate(dict(row))
+
+    def _options(
+        self,
+        options: Sequence[ExecutableOption] | None = None,
+        projection: str | None = None,
+    ) -> tuple[ExecutableOption, ...]:
+        """Loader options of a read.
+
+        Args:
+            options (Sequence[ExecutableOption] | None, optional): Explicit loader options. Defaults to None.
+            projection (str | None, optional): Set of ``projections``, overrides ``options``. Defaults to None.
+
+        Raises:
+            ValueError: If the projection is unknown
+
+        Returns:
+            tuple[ExecutableOption, ...]: Loader options
+        """
+        if projection is not None:
+            if projection not in self.projections:
+                raise ValueError(
+                    f"Unknown projection {projection} of {self.schema_class}"
+                )
+            return self.projections[projection]
+        return self.default_options if options is None else tuple(options)
 
     async def _get(
-        self, session: AsyncSession, key: str, value: Any
+        self,
+        session: AsyncSession,
+        key: str,
+        value: Any,
+        options: Sequence[ExecutableOption] | None = None,
+        projection: str | None = None,
     ) -> Base | None:
         """Return only one result by filters.
 
@@ -74,31 +173,64 @@ class BaseRepository(Generic[_Model]):
             session (AsyncSession): _description_
             key (str): _description_
             value (Any): _description_
+            options (Sequence[ExecutableOption] | None, optional): Loader options. Defaults to ``default_options``.
+            projection (str | None, optional): Name of a set of ``projections``. Defaults to None.
 
         Returns:
             Base | None: _description_
         """
-        query = select(self.schema_class).where(
-            getattr(self.schema_class, key) == value
+        # Without explicit options the statement is built once per key
+        if options is not None:
+            query = (
+                select(self.schema_class)
+                .where(getattr(self.schema_class, key) == value)
+                .options(*options)
+            )
+            result: Result = await session.execute(query)
+            return result.scalars().one_or_none()
+
+        query = statement_registry.get(
+            (self.schema_class, "get", key, projection),
+            lambda: select(self.schema_class)
+            .where(getattr(self.schema_class, key) == bindparam("value"))
+            .options(*self._options(projection=projection)),
         )
-
-        result: Result = await session.execute(query)
+        result = await session.execute(query, {"value": value})
 
         return result.scalars().one_or_none()
 
-    async def count(self, session: AsyncSession) -> int:
-        """_summary_.
+    async def count(
+        self,
+        session: AsyncSession,
+        mode: CountMode = "exact",
+        max_age: float | None = None,
+    ) -> int:
+        """Number of rows, see ``src.db.counts`` for the modes.
 
         Args:
-            session (AsyncSession): _description_
+            session (AsyncSession): database session
+            mode (CountMode, optional): ``exact``, ``estimated`` or ``cached``. Defaults to "exact".
+            max_age (float | None, optional): Accepted age in seconds of a cached count. Defaults to None.
 
         Returns:
-            int: _description_
+            int: Number of rows
         """
-        result: Result = await session.execute(func.count(self.schema_class.id))
-        value = result.scalar()
+        return await row_counter.count(
+            session, self.schema_class.__table__, mode, max_age
+        )
 
-        return value
+    async def _count_change(
+        self, session: AsyncSession, delta: int | None
+    ) -> None:
+        """Adjust the maintained row count before the write commits.
+
+        Args:
+            session (AsyncSession): database session
+            delta (int | None): Rows added, negative for deletes, None when unknown
+        """
+        table = self.schema_class.__table__
+        if row_counter.is_tracked(table):
+            await row_counter.adjust(session, table, delta)
 
     async def _first(self, session: AsyncSession, by: str = "id") -> Base:
         """_summary_.
@@ -152,27 +284,60 @@ class BaseRepository(Generic[_Model]):
         """
         schema = self.schema_class(**payload)
         session.add(schema)
+        await self._count_change(session, 1)
         await session.commit()
         await session.refresh(schema)
         return schema
 
-    async def _all(self, session: AsyncSession) -> AsyncGenerator[Base, None]:
-        """_summary_.
+    async def _all(
+        self,
+        session: AsyncSession,
+        yield_per: int | None = None,
+        columns: Sequence[str] | None = None,
+        query: Select | None = None,
+        options: Sequence[ExecutableOption] | None = None,
+    ) -> AsyncGenerator[Base | Row, None]:
+        """Stream the rows of the table in batches fetched from a cursor.
 
-        Args:
-            session (AsyncSession): _description_
+        Only one batch is held in memory at a time. Close the generator,
+        for instance with ``contextlib.aclosing``, to stop early and release
+        the cursor at once instead of when it is garbage collected.
 
-        Returns:
-            AsyncGenerator[Base, None]: _description_
+        Args:
+            session (AsyncSession): database session
+            yield_per (int | None, optional): Rows per batch. Defaults to ``stream_batch_size``.
+            columns (Sequence[str] | None, optional): Columns to read instead of whole instances. Defaults to None.
+            query (Select | None, optional): Filtered select, takes precedence over ``columns``. Defaults to None.
+            options (Sequence[ExecutableOption] | None, optional): Loader options. Defaults to ``default_options``.
 
         Yields:
-            Iterator[AsyncGenerator[Base, None]]: _description_
+            Iterator[AsyncGenerator[Base | Row, None]]: Instances, or rows of the selected columns
         """
-        result: Result = await session.execute(select(self.schema_class))
-        schemas = result.scalars().all()
+        if query is not None:
+            statement = query
+        elif columns:
+            statement = select(
+                *(getattr(self.schema_class, column) for column in columns)
+            )
+        else:
+            statement = select(self.schema_class).options(
+                *self._options(options)
+            )
+        statement = statement.execution_options(
+            yield_per=yield_per or self.stream_batch_size
+        )
+        descriptions = statement.column_descriptions
+        scalars = (
+            len(descriptions) == 1
+            and descriptions[0]["expr"] is self.schema_class
+        )
 
-        for schema in schemas:
-            yield schema
+        result = await session.stream(statement)
+        try:
+            async for row in result.scalars() if scalars else result:
+                yield row
+        finally:
+            await result.close()
 
     async def delete(self, session: AsyncSession, id_: int) -> bool:
         """_summary_.
@@ -184,10 +349,343 @@ class BaseRepository(Generic[_Model]):
         Returns:
             bool: _description_
         """
-        await session.execute(
+        result = await session.execute(
             delete(self.schema_class).where(self.schema_class.id == id_)
         )
-        await session.flush()
+        await self._count_change(session, -result.rowcount)
         await session.commit()
 
         return True
+
+    def unique_violation(self, error: IntegrityError) -> str | None:
+        """Name the unique column an insert or update collided on.
+
+        The database error names the column, as ``users.email`` on SQLite,
+        or its unique index, as ``ix_users_email`` on PostgreSQL and MySQL.
+
+        Args:
+            error (IntegrityError): Error raised by the write
+
+        Returns:
+            str | None: Column name, None if the error is not a unique violation of a single column
+        """
+        table = self.schema_class.__table__
+        message = str(error.orig)
+        markers: dict[str, set[str]] = {}
+        for column in table.columns:
+            if column.unique:
+                markers.setdefault(column.name, set()).add(
+                    f"{table.name}.{column.name}"
+                )
+        for index in table.indexes:
+            if index.unique and len(index.columns) == 1:
+                column = next(iter(index.columns))
+                markers.setdefault(column.name, set()).update(
+                    (f"{table.name}.{column.name}", index.name)
+                )
+        for name, names in markers.items():
+            if any(marker in message for marker in names):
+                return name
+        return None
+
+    def _insert_defaults(self) -> dict[str, Any]:
+        """Python side defaults of the columns, applied by bulk inserts.
+
+        Dataclass defaults are only applied when an instance is built, so
+        statements inserting plain dicts have to add them.
+
+        Returns:
+            dict[str, Any]: Default values by column name
+        """
+        columns = self.schema_class.__table__.c
+        defaults = {}
+        for field in dataclasses.fields(self.schema_class):
+            if field.name not in columns or columns[field.name].primary_key:
+                continue
+            if field.default_factory is not dataclasses.MISSING:
+                defaults[field.name] = field.default_factory()
+            elif field.default is not dataclasses.MISSING:
+                defaults[field.name] = field.default
+        return defaults
+
+    async def _insert_many(
+        self,
+        session: AsyncSession,
+        statement: Insert,
+        payloads: Sequence[dict[str, Any]],
+        chunk_size: int | None,
+        new_rows_only: bool = False,
+        inserts_only: bool = False,
+    ) -> list[int]:
+        """Run an insert in chunked batches and commit once.
+
+        Args:
+            session (AsyncSession): database session
+            statement (Insert): Insert statement
+            payloads (Sequence[dict[str, Any]]): Rows, all with the same keys
+            chunk_size (int | None): Rows per batch, defaults to ``bulk_chunk_size``
+            new_rows_only (bool, optional): Every row gets a generated id. Defaults to False.
+            inserts_only (bool, optional): Every row is inserted, none updated. Defaults to False.
+
+        Returns:
+            list[int]: Ids of the rows in payload order, empty if the dialect has no RETURNING
+        """
+        table = self.schema_class.__table__
+        dialect = session.get_bind().dialect
+        returning = dialect.insert_executemany_returning
+        # SQLite allocates rowids in VALUES order, so sorting the returned ids
+        # restores the payload order. Asking SQLAlchemy to keep the order
+        # makes it insert one row per statement there.
+        sort_ids = new_rows_only and dialect.name == "sqlite"
+        if returning:
+            statement = statement.returning(
+                table.c.id,
+                sort_by_parameter_order=not sort_ids
+                and dialect.insert_executemany_returning_sort_by_parameter_order,
+            )
+        defaults = self._insert_defaults()
+        ids: list[int] = []
+        for chunk in _chunks(payloads, chunk_size or self.bulk_chunk_size):
+            result = await session.execute(
+                statement, [{**defaults, **payload} for payload in chunk]
+            )
+            if returning:
+                chunk_ids = result.scalars().all()
+                ids.extend(sorted(chunk_ids) if sort_ids else chunk_ids)
+        await self._count_change(
+            session, len(payloads) if inserts_only else None
+        )
+        await session.commit()
+        return ids
+
+    async def save_many(
+        self,
+        session: AsyncSession,
+        payloads: Sequence[dict[str, Any]],
+        chunk_size: int | None = None,
+    ) -> list[int]:
+        """Insert rows in batches within one transaction.
+
+        Args:
+            session (AsyncSession): database session
+            payloads (Sequence[dict[str, Any]]): Rows, all with the same keys
+            chunk_size (int | None, optional): Rows per batch. Defaults to None.
+
+        Returns:
+            list[int]: Inserted ids in payload order, empty if the dialect has no RETURNING
+        """
+        return await self._insert_many(
+            session,
+            insert(self.schema_class.__table__),
+            payloads,
+            chunk_size,
+            new_rows_only=bool(payloads) and "id" not in payloads[0],
+            inserts_only=True,
+        )
+
+    async def upsert_many(
+        self,
+        session: AsyncSession,
+        payloads: Sequence[dict[str, Any]],
+        key: str | Sequence[str],
+        update_columns: Sequence[str] | None = None,
+        chunk_size: int | None = None,
+    ) -> list[int]:
+        """Insert rows or update the ones conflicting on a unique key.
+
+        Args:
+            session (AsyncSession): database session
+            payloads (Sequence[dict[str, Any]]): Rows, all with the same keys
+            key (str | Sequence[str]): Columns of the unique constraint
+            update_columns (Sequence[str] | None, optional): Columns set on conflict. Defaults to the payload columns.
+            chunk_size (int | None, optional): Rows per batch. Defaults to None.
+
+        Raises:
+            NotImplementedError: If the dialect has no upsert
+
+        Returns:
+            list[int]: Ids of the inserted or updated rows in payload order, empty if the dialect has no RETURNING
+        """
+        if not payloads:
+            return []
+        table = self.schema_class.__table__
+        keys = [key] if isinstance(key, str) else list(key)
+        if update_columns is None:
+            update_columns = [
+                column
+                for column in payloads[0]
+                if column not in keys and column not in ("id", "created_time")
+            ]
+        dialect = session.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            dialect_insert = (
+                sqlite.insert if dialect == "sqlite" else postgresql.insert
+            )
+            statement = dialect_insert(table)
+            changes = {
+                column: statement.excluded[column] for column in update_columns
+            }
+            if "updated_time" in table.c:
+                changes["updated_time"] = timezone.now_utc()
+            statement = statement.on_conflict_do_update(
+                index_elements=keys, set_=changes
+            )
+        elif dialect in ("mysql", "mariadb"):
+            statement = mysql.insert(table)
+            changes = {
+                column: statement.inserted[column] for column in update_columns
+            }
+            if "updated_time" in table.c:
+                changes["updated_time"] = timezone.now_utc()
+            statement = statement.on_duplicate_key_update(changes)
+        else:
+            raise NotImplementedError(f"Upsert is not supported on {dialect}")
+        return await self._insert_many(session, statement, payloads, chunk_size)
+
+    async def update_many(
+        self,
+        session: AsyncSession,
+        payloads: Sequence[dict[str, Any]],
+        key: str = "id",
+        chunk_size: int | None = None,
+    ) -> int:
+        """Update rows matched by a key in batches within one transaction.
+
+        Args:
+            session (AsyncSession): database session
+            payloads (Sequence[dict[str, Any]]): Key value and new column values per row, all with the same keys
+            key (str, optional): Column matching the rows. Defaults to "id".
+            chunk_size (int | None, optional): Rows per batch. Defaults to None.
+
+        Returns:
+            int: Number of updated rows
+        """
+        if not payloads:
+            return 0
+        table = self.schema_class.__table__
+        values = {
+            column: bindparam(f"b_{column}")
+            for column in payloads[0]
+            if column != key
+        }
+        if "updated_time" in table.c and "updated_time" not in values:
+            values["updated_time"] = timezone.now_utc()
+        statement = (
+            update(table)
+            .where(table.c[key] == bindparam(f"b_{key}"))
+            .values(values)
+        )
+        updated = 0
+        for chunk in _chunks(payloads, chunk_size or self.bulk_chunk_size):
+            result = await session.execute(
+                statement,
+                [
+                    {f"b_{column}": value for column, value in payload.items()}
+                    for payload in chunk
+                ],
+            )
+            updated += result.rowcount
+        await session.commit()
+        return updated
+
+    async def delete_many(
+        self,
+        session: AsyncSession,
+        values: Sequence[Any],
+        key: str = "id",
+        chunk_size: int | None = None,
+    ) -> int:
+        """Delete rows matched by a key in batches within one transaction.
+
+        Args:
+            session (AsyncSession): database session
+            values (Sequence[Any]): Key values of the rows
+            key (str, optional): Column matching the rows. Defaults to "id".
+            chunk_size (int | None, optional): Key values per statement. Defaults to None.
+
+        Returns:
+            int: Number of deleted rows
+        """
+        table = self.schema_class.__table__
+        deleted = 0
+        for chunk in _chunks(values, chunk_size or self.bulk_chunk_size):
+            result = await session.execute(
+                delete(table).where(table.c[key].in_(chunk))
+            )
+            deleted += result.rowcount
+        await self._count_change(session, -deleted)
+        await session.commit()
+        return deleted
+
+    async def keyset_page(
+        self,
+        session: AsyncSession,
+        size: int,
+        sort: str = "id",
+        descending: bool = False,
+        after: tuple | None = None,
+        before: tuple | None = None,
+        query: Select | None = None,
+        projection: str | None = None,
+    ) -> KeysetPage:
+        """Read a page following or preceding a key, without OFFSET.
+
+        Args:
+            session (AsyncSession): database session
+            size (int): Page size
+            sort (str, optional): Sort column, one of ``keyset_columns``. Defaults to "id".
+            descending (bool, optional): Sort in descending order. Defaults to False.
+            after (tuple | None, optional): Key the page follows. Defaults to None.
+            before (tuple | None, optional): Key the page precedes, takes precedence over ``after``. Defaults to None.
+            query (Select | None, optional): Filtered select of the model. Defaults to None.
+            projection (str | None, optional): Name of a set of ``projections``. Defaults to None.
+
+        Raises:
+            ValueError: If the sort column is not paginable
+
+        Returns:
+            KeysetPage: Rows and the keys of the next and previous pages
+        """
+        if sort not in self.keyset_columns:
+            raise ValueError(f"Cannot paginate {self.schema_class} by {sort}")
+        column = getattr(self.schema_class, sort)
+        id_column = self.schema_class.id
+        backwards = before is not None
+        key = before if backwards else after
+        # Previous pages are read in reverse order from their boundary
+        scan_descending = descending != backwards
+
+        statement = select(self.schema_class) if query is None else query
+        statement = statement.options(*self._options(projection=projection))
+        if key is not None:
+            statement = statement.where(
+                keyset_after(column, id_column, key, scan_descending)
+            )
+        statement = statement.order_by(
+            *keyset_order(column, id_column, scan_descending)
+        ).limit(size + 1)
+        rows = list((await session.scalars(statement)).all())
+        more = len(rows) > size
+        rows = rows[:size]
+        if backwards:
+            rows.reverse()
+
+        def key_of(row: Any) -> tuple:
+            """Key of a row."""
+            if column is id_column:
+                return (row.id,)
+            return (getattr(row, sort), row.id)
+
+        if not rows:
+            return KeysetPage(items=[], next_key=None, previous_key=None)
+        if backwards:
+            return KeysetPage(
+                items=rows,
+                next_key=key_of(rows[-1]),
+                previous_key=key_of(rows[0]) if more else None,
+            )
+        return KeysetPage(
+            items=rows,
+            next_key=key_of(rows[-1]) if more else None,
+            previous_key=key_of(rows[0]) if after is not None else None,
+        )
@@ -0,0 +1,121 @@
+"""Read/write split between a writer engine and reader replicas.
+
+Sessions route each statement through ``RoutingSession.get_bind``: plain
+``SELECT`` statements go to a reader, picked round robin once per session
+so the reads of a request see the same replica, while flushes, DML,
+locking reads and textual SQL without declared result columns go to the
+writer. Once a session has written, its following reads stay on the
+writer too. Asking for the bind without a statement, to inspect the
+dialect, returns the writer without counting as a write.
+
+Replicas lag behind the writer, so a caller that just wrote would not see
+its own changes on a reader. The router remembers the callers that wrote
+during the last ``window`` seconds and sends their reads to the writer.
+"""
+
+import itertools
+from typing import Any, Hashable, Sequence
+
+from sqlalchemy import Engine, Select, TextualSelect
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from src.common.cache import TTLCache
+
+
+class EngineRouter:
+    """Writer engine, reader engines and the read-your-writes window."""
+
+    def __init__(
+        self,
+        writer: AsyncEngine,
+        readers: Sequence[AsyncEngine],
+        window: float,
+        max_callers: int = 10000,
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            writer (AsyncEngine): Engine of the primary database
+            readers (Sequence[AsyncEngine]): Engines of the replicas
+            window (float): Seconds a caller keeps reading from the writer after a write
+            max_callers (int, optional): Callers tracked in the window. Defaults to 10000.
+        """
+        self.writer = writer
+        self.readers = list(readers)
+        self._next_reader = itertools.cycle(self.readers or [writer])
+        self._recent_writers: TTLCache[Hashable, bool] = TTLCache(
+            max_callers, window
+        )
+
+    def reader(self, caller: Hashable | None = None) -> AsyncEngine:
+        """Engine serving a read.
+
+        Args:
+            caller (Hashable | None, optional): Read-your-writes key of the caller. Defaults to None.
+
+        Returns:
+            AsyncEngine: Reader, or the writer within the caller's window
+        """
+        if caller is not None and self._recent_writers.get(caller):
+            return self.writer
+        return next(self._next_reader)
+
+    def mark_write(self, caller: Hashable | None) -> None:
+        """Start the read-your-writes window of a caller.
+
+        Args:
+            caller (Hashable | None): Read-your-writes key of the caller
+        """
+        if caller is not None:
+            self._recent_writers.set(caller, True)
+
+    async def dispose(self) -> None:
+        """Close the connections of every engine."""
+        for engine in (self.writer, *self.readers):
+            await engine.dispose()
+
+
+class RoutingSession(Session):
+    """Session sending reads to replicas and everything else to the writer.
+
+    The caller key is read from ``session.info["rw_key"]``.
+    """
+
+    def __init__(self, router: EngineRouter, **kwargs: Any) -> None:
+        """Class initializer.
+
+        Args:
+            router (EngineRouter): Engine router
+            **kwargs (Any): ``Session`` arguments
+        """
+        super().__init__(**kwargs)
+        self.router = router
+        self.wrote = False
+        self._reader: AsyncEngine | None = None
+
+    def get_bind(self, mapper=None, clause=None, **kwargs: Any) -> Engine:  # pylint: disable=unused-argument
+        """Pick the engine of a statement.
+
+        Args:
+            mapper (optional): Mapper of the statement. Defaults to None.
+            clause (optional): Statement. Defaults to None.
+            **kwargs (Any): Extra ``Session.get_bind`` arguments
+
+        Returns:
+            Engine: Engine
+        """
+        if clause is None and not self._flushing:
+            return self.router.writer.sync_engine
+        caller = self.info.get("rw_key")
+        is_read = isinstance(clause, TextualSelect) or (
+            isinstance(clause, Select) and clause._for_update_arg is None  # pylint: disable=protected-access
+        )
+        if not self.wrote and not self._flushing and is_read:
+            if self._reader is None:
+                self._reader = self.router.reader(caller)
+            return self._reader.sync_engine
+        if self._flushing or not is_read:
+            self.wrote = True
+            self.router.mark_write(caller)
+        return self.router.writer.sync_engine
@@ -1,11 +1,13 @@
 """Module."""
 
+import hashlib
 import sys
-from typing import Annotated
+from typing import Annotated, Sequence
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlalchemy import URL
 from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
@@ -13,32 +15,99 @@ from sqlalchemy.ext.asyncio import (
 
 from src.common.log import log
 from src.config import settings
+from src.db.pool import pool_monitor
+from src.db.routing import EngineRouter, RoutingSession
+from src.db.statements import statement_registry
+from src.db.transaction import UnitOfWorkSession, transaction_stats
+from src.db.tuning import (
+    PROFILES,
+    TuningProfile,
+    apply_sqlite_pragmas,
+    engine_options,
+)
 
 
-def create_engine_and_session(url: str | URL):
-    """_summary_.
+def _create_engine(url: str | URL, tuning: TuningProfile) -> AsyncEngine:
+    """Create an engine tuned by a profile.
 
     Args:
-        url (str | URL): _description_
+        url (str | URL): Database url
+        tuning (TuningProfile): Tuning profile
 
     Returns:
-        _type_: _description_
+        AsyncEngine: Engine
     """
     try:
         engine = create_async_engine(
             url,
             echo=settings.database.QUERY_ECHO,
             future=True,
-            pool_pre_ping=True,
+            **engine_options(url, tuning),
         )
     except Exception as e:  # pylint: disable=broad-except
         log.error(f"❌ database link failed {e}")
         sys.exit()
-    else:
-        db_session = async_sessionmaker(
-            bind=engine, autoflush=False, expire_on_commit=False
-        )
-        return engine, db_session
+    if engine.dialect.name == "sqlite":
+        apply_sqlite_pragmas(engine, tuning)
+    statement_registry.watch(engine)
+    pool_monitor.watch(engine)
+    return engine
+
+
+def create_engine_and_session(url: str | URL, profile: str | None = None):
+    """Create an engine tuned by a profile and its session factory.
+
+    Args:
+        url (str | URL): Database url
+        profile (str | None, optional): Tuning profile name, defaults to ``DB_TUNING_PROFILE``. Defaults to None.
+
+    Returns:
+        tuple[AsyncEngine, async_sessionmaker[AsyncSession]]: Engine and session factory
+    """
+    engine = _create_engine(
+        url, PROFILES[profile or settings.database.DB_TUNING_PROFILE]
+    )
+    db_session = async_sessionmaker(
+        bind=engine,
+        class_=UnitOfWorkSession,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    return engine, db_session
+
+
+def create_routed_session(
+    writer_url: str | URL,
+    reader_urls: Sequence[str | URL],
+    window: float,
+    profile: str | None = None,
+):
+    """Create writer and reader engines and a session factory routing between them.
+
+    Args:
+        writer_url (str | URL): Primary database url
+        reader_urls (Sequence[str | URL]): Replica urls
+        window (float): Read-your-writes window in seconds
+        profile (str | None, optional): Tuning profile name, defaults to ``DB_TUNING_PROFILE``. Defaults to None.
+
+    Returns:
+        tuple[EngineRouter, async_sessionmaker[AsyncSession]]: Router and session factory
+    """
+    tuning = PROFILES[profile or settings.database.DB_TUNING_PROFILE]
+    router = EngineRouter(
+        _create_engine(writer_url, tuning),
+        [_create_engine(url, tuning) for url in reader_urls],
+        window,
+    )
+    db_session = async_sessionmaker(
+        bind=router.writer,
+        class_=UnitOfWorkSession,
+        sync_session_class=RoutingSession,
+        router=router,
+        autoflush=False,
+        expire_on_commit=False,
+    )
+    return router, db_session
 
 
 # SQLALCHEMY_DATABASE_URL = (
@@ -46,14 +115,44 @@ def create_engine_and_session(url: str | URL):
 #     f'{settings.MYSQL_PORT}/{settings.MYSQL_DATABASE}?charset={settings.MYSQL_CHARSET}'
 # )
 
-async_engine, async_db_session = create_engine_and_session(
-    settings.database.DATABASE_CONNECTION_URL
-)
+if settings.database.DATABASE_READER_URLS:
+    async_db_router, async_db_session = create_routed_session(
+        settings.database.DATABASE_CONNECTION_URL,
+        settings.database.DATABASE_READER_URLS,
+        settings.database.DATABASE_READ_YOUR_WRITES_SECONDS,
+    )
+    async_engine = async_db_router.writer
+else:
+    async_db_router = None
+    async_engine, async_db_session = create_engine_and_session(
+        settings.database.DATABASE_CONNECTION_URL
+    )
 
 
-async def get_db() -> AsyncSession:
+def read_your_writes_key(request: Request) -> str | None:
+    """Identify the caller whose reads must follow its own writes.
+
+    Args:
+        request (Request): Current request
+
+    Returns:
+        str | None: Digest of the credentials of the request, or the client address
+    """
+    authorization = request.headers.get("authorization")
+    if authorization:
+        # Kept in the router window, the token itself must not be
+        return hashlib.blake2b(
+            authorization.encode(), digest_size=16
+        ).hexdigest()
+    return request.client.host if request.client else None
+
+
+async def get_db(request: Request) -> AsyncSession:
     """Session builder.
 
+    The session checks out a pooled connection on its first statement, a
+    request that never reaches the database uses none.
+
     Raises:
         se: _description_
 
@@ -63,7 +162,7 @@ async def get_db() -> AsyncSession:
     Yields:
         Iterator[AsyncSession]: _description_
     """
-    session = async_db_session()
+    session = async_db_session(info={"rw_key": read_your_writes_key(request)})
     try:
         yield session
     except Exception as se:
@@ -71,6 +170,9 @@ async def get_db() -> AsyncSession:
         raise se
     finally:
         await session.close()
+        # Commits and rollbacks issued while serving the request
+        request.state.db_transactions = stats = transaction_stats(session)
+        log.debug(f"{request.method} {request.url.path} {stats}")
 
 
 CurrentSession = Annotated[AsyncSession, Depends(get_db)]
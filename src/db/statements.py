@@ -0,0 +1,91 @@
+"""Prebuilt statements for hot lookups.
+
+Building ``select(Model).where(Model.key == value)`` per call costs a new
+construct and a new cache key, computed by walking it, before SQLAlchemy
+can find the compiled form in the engine's compiled cache. A statement
+built once with a ``bindparam`` memoizes its cache key, so a lookup only
+binds the value. Engines created by ``src.db.session`` report whether each
+execution found its compiled form in the cache.
+"""
+
+from typing import Any, Callable, Hashable
+
+from sqlalchemy import Executable, event
+from sqlalchemy.engine.default import CacheStats, DefaultExecutionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class StatementRegistry:
+    """Statements built once per key and compiled cache counters."""
+
+    def __init__(self) -> None:
+        """Class initializer."""
+        self._statements: dict[Hashable, Executable] = {}
+        self.builds = 0
+        self.reuses = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.uncached = 0
+
+    def get(self, key: Hashable, build: Callable[[], Executable]) -> Executable:
+        """Return the statement of a key, building it on first use.
+
+        Args:
+            key (Hashable): Statement key, everything the statement depends on
+            build (Callable[[], Executable]): Builds the statement with bind parameters for the values
+
+        Returns:
+            Executable: Statement
+        """
+        statement = self._statements.get(key)
+        if statement is None:
+            statement = self._statements[key] = build()
+            self.builds += 1
+        else:
+            self.reuses += 1
+        return statement
+
+    def _record(self, context: DefaultExecutionContext) -> None:
+        """Count the compiled cache outcome of an execution.
+
+        Args:
+            context (DefaultExecutionContext): Execution context
+        """
+        if context.cache_hit == CacheStats.CACHE_HIT:
+            self.cache_hits += 1
+        elif context.cache_hit == CacheStats.CACHE_MISS:
+            self.cache_misses += 1
+        else:
+            self.uncached += 1
+
+    def watch(self, engine: AsyncEngine) -> None:
+        """Count the compiled cache outcomes of an engine.
+
+        Args:
+            engine (AsyncEngine): Engine
+        """
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def after_execute(conn, cursor, statement, parameters, context, many):  # pylint: disable=unused-argument
+            if context is not None and context.compiled is not None:
+                self._record(context)
+
+    def stats(self) -> dict[str, Any]:
+        """Registry and compiled cache counters.
+
+        Returns:
+            dict[str, Any]: Statement reuse and compiled cache hits and misses
+        """
+        lookups = self.cache_hits + self.cache_misses
+        return {
+            "statements": len(self._statements),
+            "builds": self.builds,
+            "reuses": self.reuses,
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "uncached": self.uncached,
+            "cache_hit_ratio": self.cache_hits / lookups if lookups else 0.0,
+        }
+
+
+statement_registry = StatementRegistry()
@@ -0,0 +1,293 @@
+"""Unit of work committing the writes of a request once.
+
+Repository methods commit after every write. While a unit of work is open
+on a session, those commits only flush, so the writes of the whole block
+are committed together when it ends, or rolled back together if it
+raises. A rollback requested inside the block undoes the innermost
+savepoint, or the whole unit outside of one, which then refuses to
+commit. Side effects that must only follow committed writes, such as
+cache updates, are registered with ``on_commit``.
+
+``UnitOfWork.savepoint`` isolates a step, such as one item of a batch,
+whose failure must not abort the rest::
+
+    async with unit_of_work(session) as uow:
+        for item in items:
+            try:
+                async with uow.savepoint():
+                    await repository.create(session, item)
+            except IntegrityError:
+                skipped.append(item)
+
+Endpoints use the ``transaction`` decorator, which opens a unit of work on
+their ``CurrentSession`` argument.
+
+``UnitOfWorkSession.release`` returns the connection of a session that only
+read so far to the pool, for callers about to work without the database.
+"""
+
+import functools
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+_R = TypeVar("_R")
+_UNIT_OF_WORK = "unit_of_work"
+_STATS = "transaction_stats"
+_ON_COMMIT = "on_commit"
+
+
+class RolledBackError(Exception):
+    """Unit of work ending after a rollback discarded its writes."""
+
+
+@dataclass
+class TransactionStats:
+    """Transactions of a session."""
+
+    commits: int = 0
+    rollbacks: int = 0
+    # Commits turned into flushes by a unit of work
+    deferred_commits: int = 0
+    savepoints: int = 0
+    savepoint_rollbacks: int = 0
+    # Read transactions ended early to return their connection
+    releases: int = 0
+
+
+def transaction_stats(session: AsyncSession) -> TransactionStats:
+    """Transaction counters of a session.
+
+    Args:
+        session (AsyncSession): database session
+
+    Returns:
+        TransactionStats: Counters
+    """
+    return session.info.setdefault(_STATS, TransactionStats())
+
+
+def on_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Run a callback once the writes of a session are committed.
+
+    Outside a unit of work the caller has just committed and the callback
+    runs at once. Inside one it runs after the final commit, and is dropped
+    if the unit or the savepoint it was registered in rolls back.
+
+    Args:
+        session (AsyncSession): database session
+        callback (Callable[[], None]): Side effect of the committed writes
+    """
+    if session.info.get(_UNIT_OF_WORK) is None:
+        callback()
+    else:
+        session.info.setdefault(_ON_COMMIT, []).append(callback)
+
+
+@event.listens_for(Session, "after_commit")
+def _run_on_commit(session: Session) -> None:
+    """Run the callbacks of committed writes, savepoints excluded."""
+    if not session.in_nested_transaction():
+        for callback in session.info.pop(_ON_COMMIT, ()):
+            callback()
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_on_commit(session: Session) -> None:
+    """Drop the callbacks of rolled back writes, savepoints excluded."""
+    if not session.in_nested_transaction():
+        session.info.pop(_ON_COMMIT, None)
+
+
+class UnitOfWorkSession(AsyncSession):
+    """Session deferring its commits to the open unit of work."""
+
+    async def commit(self) -> None:
+        """Commit, or only flush inside a unit of work."""
+        stats = transaction_stats(self)
+        unit = self.info.get(_UNIT_OF_WORK)
+        if unit is not None:
+            unit.wrote = True
+            stats.deferred_commits += 1
+            await self.flush()
+            return
+        stats.commits += 1
+        await super().commit()
+
+    async def rollback(self) -> None:
+        """Roll back, only to the innermost savepoint if there is one.
+
+        A full rollback inside a unit of work makes it raise
+        ``RolledBackError`` instead of committing.
+        """
+        unit = self.info.get(_UNIT_OF_WORK)
+        nested = self.get_nested_transaction()
+        if unit is not None and nested is not None:
+            transaction_stats(self).savepoint_rollbacks += 1
+            unit.discard_savepoint_callbacks()
+            await nested.rollback()
+            return
+        if unit is not None:
+            unit.rolled_back = True
+        transaction_stats(self).rollbacks += 1
+        await super().rollback()
+
+    async def release(self) -> None:
+        """Return the connection to the pool until the next statement.
+
+        Ends a transaction that only read, so the connection is not held
+        while the caller works without the database. Loaded objects stay
+        usable since commits do not expire them. A session with pending
+        changes, deferred writes or an open savepoint keeps its connection.
+        Writes executed without committing must not precede the call.
+        """
+        unit = self.info.get(_UNIT_OF_WORK)
+        if (
+            not self.in_transaction()
+            or self.in_nested_transaction()
+            or (unit is not None and unit.wrote)
+            or self.new
+            or self.dirty
+            or self.deleted
+        ):
+            return
+        transaction_stats(self).releases += 1
+        await super().commit()
+
+
+class UnitOfWork:
+    """Writes of a session committed at once."""
+
+    def __init__(self, session: AsyncSession) -> None:
+        """Class initializer.
+
+        Args:
+            session (AsyncSession): database session
+        """
+        self.session = session
+        self.wrote = False
+        self.rolled_back = False
+        # Number of on_commit callbacks registered before each open savepoint
+        self._savepoint_marks: list[int] = []
+
+    @property
+    def stats(self) -> TransactionStats:
+        """Transaction counters of the session."""
+        return transaction_stats(self.session)
+
+    def discard_savepoint_callbacks(self) -> None:
+        """Drop the on_commit callbacks of the innermost savepoint."""
+        if self._savepoint_marks:
+            del self.session.info.get(_ON_COMMIT, [])[
+                self._savepoint_marks[-1] :
+            ]
+
+    async def _begin(self) -> None:
+        """Open the database transaction before a savepoint.
+
+        The SQLite driver only begins a transaction before a data change,
+        a SAVEPOINT issued before one starts its own transaction, which
+        RELEASE then commits.
+        """
+        connection = await self.session.connection()
+        if connection.dialect.name != "sqlite":
+            return
+        raw = await connection.get_raw_connection()
+        if not raw.driver_connection.in_transaction:
+            await connection.exec_driver_sql("BEGIN")
+
+    @asynccontextmanager
+    async def savepoint(self) -> AsyncIterator[None]:
+        """Run a step whose failure only undoes its own writes.
+
+        Yields:
+            Iterator[AsyncIterator[None]]: Nothing
+        """
+        await self._begin()
+        nested = await self.session.begin_nested()
+        self.stats.savepoints += 1
+        self._savepoint_marks.append(len(self.session.info.get(_ON_COMMIT, ())))
+        try:
+            yield
+        except Exception:
+            # A failed flush leaves the savepoint current but inactive
+            current = self.session.sync_session.get_nested_transaction()
+            if current is nested.sync_transaction:
+                self.stats.savepoint_rollbacks += 1
+                self.discard_savepoint_callbacks()
+                await nested.rollback()
+            raise
+        finally:
+            self._savepoint_marks.pop()
+        if nested.is_active:
+            await nested.commit()
+
+
+@asynccontextmanager
+async def unit_of_work(session: AsyncSession) -> AsyncIterator[UnitOfWork]:
+    """Commit the writes of a block once, or roll them all back on error.
+
+    A unit of work opened inside another one joins it.
+
+    Args:
+        session (AsyncSession): database session, created by ``src.db.session``
+
+    Raises:
+        RolledBackError: If a rollback inside the block discarded its writes
+
+    Yields:
+        Iterator[AsyncIterator[UnitOfWork]]: Unit of work
+    """
+    current = session.info.get(_UNIT_OF_WORK)
+    if current is not None:
+        yield current
+        return
+
+    unit = session.info[_UNIT_OF_WORK] = UnitOfWork(session)
+    try:
+        yield unit
+    except BaseException:
+        del session.info[_UNIT_OF_WORK]
+        await session.rollback()
+        raise
+    del session.info[_UNIT_OF_WORK]
+    if unit.rolled_back:
+        # Writes made after the rollback would be committed without the
+        # ones before it
+        await session.rollback()
+        raise RolledBackError("Unit of work was rolled back")
+    await session.commit()
+
+
+def transaction(
+    func: Callable[..., Awaitable[_R]],
+) -> Callable[..., Awaitable[_R]]:
+    """Run an endpoint in a unit of work on its database session argument.
+
+    Args:
+        func (Callable[..., Awaitable[_R]]): Endpoint taking a ``CurrentSession``
+
+    Returns:
+        Callable[..., Awaitable[_R]]: Wrapped endpoint
+    """
+
+    @functools.wraps(func)
+    async def wrapper(*args: Any, **kwargs: Any) -> _R:
+        session = next(
+            (
+                value
+                for value in (*args, *kwargs.values())
+                if isinstance(value, AsyncSession)
+            ),
+            None,
+        )
+        if session is None:
+            raise TypeError(f"{func.__qualname__} takes no database session")
+        async with unit_of_work(session):
+            return await func(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,199 @@
+"""Database engine tuning profiles.
+
+A profile sets the connection pool sizing and, on SQLite, the pragmas
+applied to every new connection. ``DB_TUNING_PROFILE`` picks one:
+
+* ``safe``, the default: durable commits (``synchronous=FULL``), default
+  caches and connections checked before use
+* ``balanced``: WAL with ``synchronous=NORMAL``, plus larger page cache and
+  memory mapped I/O. Opting in costs durability, the last commits can be
+  lost on a power loss
+* ``throughput``: no fsync (``synchronous=OFF``), large caches and no pool
+  pre-ping, for disposable databases and benchmarks. Connections dropped by
+  a database server surface as request errors
+
+Only the pool options apply to other backends, every profile but
+``throughput`` checks connections before use.
+
+File based aiosqlite engines otherwise default to ``NullPool``, which opens
+a connection and its worker thread per session, so the profiles use a
+queue pool. In-memory SQLite keeps its single static connection.
+"""
+
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import URL, event, make_url, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from src.common.log import log
+
+
+@dataclass(frozen=True)
+class TuningProfile:
+    """Pool sizing and SQLite pragmas of an engine."""
+
+    pool_size: int
+    max_overflow: int
+    pool_recycle: int
+    pool_timeout: float
+    pool_pre_ping: bool
+    journal_mode: str
+    synchronous: str
+    # Negative values are KiB, positive values pages
+    cache_size: int
+    mmap_size: int
+    busy_timeout: int
+    temp_store: str
+
+    def pragmas(self) -> dict[str, Any]:
+        """SQLite pragmas of the profile.
+
+        Returns:
+            dict[str, Any]: Pragma values by name
+        """
+        return {
+            "journal_mode": self.journal_mode,
+            "synchronous": self.synchronous,
+            "cache_size": self.cache_size,
+            "mmap_size": self.mmap_size,
+            "busy_timeout": self.busy_timeout,
+            "temp_store": self.temp_store,
+        }
+
+
+PROFILES: dict[str, TuningProfile] = {
+    "safe": TuningProfile(
+        pool_size=5,
+        max_overflow=10,
+        pool_recycle=3600,
+        pool_timeout=30,
+        pool_pre_ping=True,
+        journal_mode="WAL",
+        synchronous="FULL",
+        cache_size=-2000,
+        mmap_size=0,
+        busy_timeout=5000,
+        temp_store="DEFAULT",
+    ),
+    "balanced": TuningProfile(
+        pool_size=5,
+        max_overflow=10,
+        pool_recycle=3600,
+        pool_timeout=30,
+        pool_pre_ping=True,
+        journal_mode="WAL",
+        synchronous="NORMAL",
+        cache_size=-65536,
+        mmap_size=256 * 1024 * 1024,
+        busy_timeout=5000,
+        temp_store="MEMORY",
+    ),
+    "throughput": TuningProfile(
+        pool_size=20,
+        max_overflow=20,
+        pool_recycle=-1,
+        pool_timeout=30,
+        pool_pre_ping=False,
+        journal_mode="WAL",
+        synchronous="OFF",
+        cache_size=-262144,
+        mmap_size=1024 * 1024 * 1024,
+        busy_timeout=10000,
+        temp_store="MEMORY",
+    ),
+}
+
+
+def is_memory_sqlite(url: URL) -> bool:
+    """Check if a url is an in-memory SQLite database.
+
+    Args:
+        url (URL): Database url
+
+    Returns:
+        bool: True for in-memory SQLite
+    """
+    return url.get_backend_name() == "sqlite" and url.database in (
+        None,
+        "",
+        ":memory:",
+    )
+
+
+def engine_options(url: str | URL, profile: TuningProfile) -> dict[str, Any]:
+    """``create_async_engine`` arguments of a profile.
+
+    Args:
+        url (str | URL): Database url
+        profile (TuningProfile): Tuning profile
+
+    Returns:
+        dict[str, Any]: Engine keyword arguments
+    """
+    url = make_url(url)
+    if is_memory_sqlite(url):
+        return {}
+    options = {
+        "pool_size": profile.pool_size,
+        "max_overflow": profile.max_overflow,
+        "pool_recycle": profile.pool_recycle,
+        "pool_timeout": profile.pool_timeout,
+        "pool_pre_ping": profile.pool_pre_ping,
+    }
+    if url.get_backend_name() == "sqlite":
+        options["poolclass"] = AsyncAdaptedQueuePool
+    return options
+
+
+def apply_sqlite_pragmas(engine: AsyncEngine, profile: TuningProfile) -> None:
+    """Set the profile pragmas on every new SQLite connection.
+
+    Args:
+        engine (AsyncEngine): SQLite engine
+        profile (TuningProfile): Tuning profile
+    """
+    pragmas = profile.pragmas()
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):  # pylint: disable=unused-argument
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+async def tuning_report(engine: AsyncEngine, profile: str) -> dict[str, Any]:
+    """Log the effective pool settings and SQLite pragmas of an engine.
+
+    Args:
+        engine (AsyncEngine): Engine
+        profile (str): Name of the profile the engine was created with
+
+    Returns:
+        dict[str, Any]: Settings by name
+    """
+    pool = engine.pool
+    report: dict[str, Any] = {
+        "profile": profile,
+        "pool": type(pool).__name__,
+        "pool_pre_ping": pool._pre_ping,  # pylint: disable=protected-access
+        "pool_recycle": pool._recycle,  # pylint: disable=protected-access
+    }
+    if isinstance(pool, QueuePool):
+        report["pool_size"] = pool.size()
+        report["max_overflow"] = pool._max_overflow  # pylint: disable=protected-access
+    if engine.dialect.name == "sqlite":
+        async with engine.connect() as conn:
+            for name in PROFILES["safe"].pragmas():
+                report[name] = (
+                    await conn.execute(text(f"PRAGMA {name}"))
+                ).scalar()
+    log.info(
+        "Database tuning "
+        + ", ".join(f"{name}={value}" for name, value in report.items())
+    )
+    return report
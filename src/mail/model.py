@@ -0,0 +1,42 @@
+"""Module."""
+# pylint: disable=unsubscriptable-object
+
+from datetime import datetime
+
+from sqlalchemy import Index, String, Text
+from sqlalchemy.orm import Mapped, mapped_column
+
+from src.db.base import Base, id_key
+from src.utils.timezone import timezone
+
+
+class EmailOutbox(Base):
+    """Email waiting to be sent, sent or given up on.
+
+    Pending rows are picked up by the dispatcher once ``next_attempt_at``
+    is reached, claiming a row moves ``next_attempt_at`` forward by a lease
+    so a crashed worker's rows are retried.
+    """
+
+    __tablename__ = "email_outbox"
+    __table_args__ = (
+        Index(
+            "ix_email_outbox_status_next_attempt_at",
+            "status",
+            "next_attempt_at",
+        ),
+    )
+
+    id: Mapped[id_key] = mapped_column(init=False)
+    recipient: Mapped[str] = mapped_column(String(255))
+    subject: Mapped[str] = mapped_column(String(255))
+    html: Mapped[str] = mapped_column(Text)
+    status: Mapped[str] = mapped_column(
+        String(10), default="pending", comment="pending, sent or dead"
+    )
+    attempts: Mapped[int] = mapped_column(default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(
+        default_factory=timezone.now_utc
+    )
+    last_error: Mapped[str | None] = mapped_column(Text, default=None)
+    sent_at: Mapped[datetime | None] = mapped_column(default=None)
@@ -0,0 +1,327 @@
+"""Durable email outbox and its dispatcher.
+
+Request handlers only insert a row in ``email_outbox``. The dispatcher
+claims pending rows in batches, sends them concurrently over the SMTP
+connection pool and records the outcome of the whole batch in one
+transaction. Temporary failures are retried with exponential backoff,
+permanent rejections and messages out of attempts are dead-lettered with
+their last error for inspection. The body of a message, which may hold a
+reset link, is cleared once it is sent or dead-lettered.
+"""
+
+import asyncio
+import random
+import smtplib
+from contextlib import suppress
+from datetime import timedelta
+from email.message import EmailMessage
+from email.utils import formataddr
+from typing import Any
+
+from sqlalchemy import Row, bindparam, case, delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.common.log import log
+from src.config import settings
+from src.db.session import async_db_session
+from src.mail.model import EmailOutbox
+from src.mail.smtp import SMTPPool
+from src.utils.timezone import timezone
+
+_outbox = EmailOutbox.__table__
+
+_RECORD_OUTCOME = (
+    update(_outbox)
+    .where(_outbox.c.id == bindparam("b_id"))
+    .values(
+        status=bindparam("b_status"),
+        attempts=bindparam("b_attempts"),
+        next_attempt_at=bindparam("b_next_attempt_at"),
+        last_error=bindparam("b_last_error"),
+        sent_at=bindparam("b_sent_at"),
+        html=case(
+            (bindparam("b_status") == "pending", _outbox.c.html), else_=""
+        ),
+    )
+)
+
+
+def is_permanent(error: Exception) -> bool:
+    """Check if retrying a failed send cannot succeed.
+
+    Args:
+        error (Exception): Send error
+
+    Returns:
+        bool: True for 5xx rejections and messages that cannot be built
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    # Errors of the message itself, such as a line break in a header, fail
+    # every attempt
+    return not isinstance(error, (smtplib.SMTPException, OSError))
+
+
+class EmailOutboxDispatcher:
+    """Sends the outbox over pooled SMTP connections."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        pool: SMTPPool,
+        sender: tuple[str | None, str | None],
+        batch_size: int,
+        poll_interval: float,
+        max_attempts: int,
+        backoff: float,
+        backoff_max: float,
+        lease: float,
+        retention: timedelta,
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            session_factory (async_sessionmaker[AsyncSession]): Sessions used by the dispatcher
+            pool (SMTPPool): SMTP connection pool
+            sender (tuple[str | None, str | None]): Sender name and address
+            batch_size (int): Messages claimed at once
+            poll_interval (float): Seconds between outbox polls when idle
+            max_attempts (int): Attempts before a message is dead-lettered
+            backoff (float): Delay before the first retry in seconds, doubled per attempt
+            backoff_max (float): Longest retry delay in seconds
+            lease (float): Seconds a claimed message is hidden from other dispatchers
+            retention (timedelta): How long sent messages are kept
+        """
+        self.session_factory = session_factory
+        self.pool = pool
+        self.sender = sender
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.lease = lease
+        self.retention = retention
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+    async def enqueue(
+        self, session: AsyncSession, *, email_to: str, subject: str, html: str
+    ) -> int:
+        """Store a message for delivery.
+
+        Args:
+            session (AsyncSession): database session
+            email_to (str): Recipient address
+            subject (str): Rendered subject
+            html (str): Rendered HTML body
+
+        Returns:
+            int: Outbox id
+        """
+        message = EmailOutbox(recipient=email_to, subject=subject, html=html)
+        session.add(message)
+        await session.commit()
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return message.id
+
+    def build_message(self, row: Row) -> EmailMessage:
+        """MIME message of an outbox row.
+
+        Args:
+            row (Row): Claimed outbox row
+
+        Returns:
+            EmailMessage: Message
+        """
+        message = EmailMessage()
+        message["From"] = formataddr(self.sender)
+        message["To"] = row.recipient
+        message["Subject"] = row.subject
+        message.set_content(row.html, subtype="html")
+        return message
+
+    def retry_delay(self, attempts: int) -> float:
+        """Delay before the next attempt, with jitter.
+
+        Args:
+            attempts (int): Attempts made so far
+
+        Returns:
+            float: Seconds
+        """
+        delay = min(self.backoff * 2 ** min(attempts - 1, 32), self.backoff_max)
+        return delay * random.uniform(0.8, 1.2)  # noqa: S311
+
+    async def _claim(self) -> list[Row]:
+        """Lease a batch of due messages.
+
+        Returns:
+            list[Row]: Claimed rows
+        """
+        now = timezone.now_utc()
+        due = (_outbox.c.status == "pending") & (
+            _outbox.c.next_attempt_at <= now
+        )
+        claimed = (
+            _outbox.c.id,
+            _outbox.c.recipient,
+            _outbox.c.subject,
+            _outbox.c.html,
+            _outbox.c.attempts,
+        )
+        async with self.session_factory() as session, session.begin():
+            returning = session.get_bind().dialect.update_returning
+            query = (
+                select(_outbox.c.id)
+                .where(due)
+                .order_by(_outbox.c.next_attempt_at)
+                .limit(self.batch_size)
+            )
+            if not returning:
+                # Rows are read back after the update, other dispatchers
+                # skip them until the lease is committed
+                query = query.with_for_update(skip_locked=True)
+            ids = (await session.scalars(query)).all()
+            if not ids:
+                return []
+            # Rows leased by another dispatcher meanwhile no longer match
+            lease = (
+                update(_outbox)
+                .where(_outbox.c.id.in_(ids), due)
+                .values(next_attempt_at=now + timedelta(seconds=self.lease))
+            )
+            if returning:
+                result = await session.execute(lease.returning(*claimed))
+            else:
+                await session.execute(lease)
+                result = await session.execute(
+                    select(*claimed).where(_outbox.c.id.in_(ids))
+                )
+            return result.all()
+
+    async def _deliver(self, row: Row) -> dict[str, Any]:
+        """Send one message.
+
+        Args:
+            row (Row): Claimed outbox row
+
+        Returns:
+            dict[str, Any]: Outcome parameters of the row
+        """
+        now = timezone.now_utc()
+        attempts = row.attempts + 1
+        outcome = {
+            "b_id": row.id,
+            "b_attempts": attempts,
+            "b_status": "sent",
+            "b_next_attempt_at": now,
+            "b_last_error": None,
+            "b_sent_at": now,
+        }
+        try:
+            await self.pool.send(self.build_message(row))
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            dead = is_permanent(e) or attempts >= self.max_attempts
+            outcome.update(
+                b_status="dead" if dead else "pending",
+                b_next_attempt_at=now
+                + timedelta(seconds=0 if dead else self.retry_delay(attempts)),
+                b_last_error=repr(e)[:1000],
+                b_sent_at=None,
+            )
+            if dead:
+                log.error(
+                    f"Email {row.id} to {row.recipient} dead-lettered {e!r}"
+                )
+        return outcome
+
+    async def run_once(self) -> int:
+        """Send one batch of due messages.
+
+        Returns:
+            int: Number of processed messages
+        """
+        rows = await self._claim()
+        if not rows:
+            return 0
+        outcomes = await asyncio.gather(*(self._deliver(row) for row in rows))
+        async with self.session_factory() as session, session.begin():
+            await session.execute(_RECORD_OUTCOME, outcomes)
+        return len(rows)
+
+    async def purge(self) -> int:
+        """Delete sent messages older than the retention.
+
+        Returns:
+            int: Number of deleted messages
+        """
+        async with self.session_factory() as session, session.begin():
+            result = await session.execute(
+                delete(_outbox).where(
+                    _outbox.c.status == "sent",
+                    _outbox.c.sent_at < timezone.now_utc() - self.retention,
+                )
+            )
+        return result.rowcount
+
+    async def _run(self) -> None:
+        """Send batches until cancelled, purging sent messages hourly."""
+        loop = asyncio.get_running_loop()
+        purged_at = 0.0
+        while True:
+            try:
+                processed = await self.run_once()
+                if loop.time() - purged_at >= 3600:
+                    await self.purge()
+                    purged_at = loop.time()
+            except Exception as e:  # pylint: disable=broad-exception-caught
+                # The dispatcher keeps running, the batch is retried once
+                # its lease expires
+                log.error(f"Email outbox dispatch failed {e!r}")
+                processed = 0
+            if processed >= self.batch_size:
+                continue
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            self._wakeup.clear()
+
+    async def start(self) -> None:
+        """Start dispatching in the background."""
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop dispatching and close the SMTP connections."""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self._wakeup = None
+        await self.pool.close()
+
+
+email_outbox = EmailOutboxDispatcher(
+    session_factory=async_db_session,
+    pool=SMTPPool(
+        host=settings.email.SMTP_HOST,
+        port=settings.email.SMTP_PORT,
+        user=settings.email.SMTP_USER,
+        password=settings.email.SMTP_PASSWORD,
+        starttls=settings.email.SMTP_TLS,
+        size=settings.email.SMTP_POOL_SIZE,
+        timeout=settings.email.SMTP_TIMEOUT_SECONDS,
+    ),
+    sender=(settings.email.EMAILS_FROM_NAME, settings.email.EMAILS_FROM_EMAIL),
+    batch_size=settings.email.EMAIL_OUTBOX_BATCH_SIZE,
+    poll_interval=settings.email.EMAIL_OUTBOX_POLL_SECONDS,
+    max_attempts=settings.email.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    backoff=settings.email.EMAIL_OUTBOX_BACKOFF_SECONDS,
+    backoff_max=settings.email.EMAIL_OUTBOX_BACKOFF_MAX_SECONDS,
+    lease=settings.email.EMAIL_OUTBOX_LEASE_SECONDS,
+    retention=timedelta(days=settings.email.EMAIL_OUTBOX_RETENTION_DAYS),
+)
@@ -0,0 +1,131 @@
+"""Pool of persistent SMTP connections.
+
+``smtplib`` is blocking, so every send runs in a worker thread. Open
+connections are kept and reused for the next message, which saves the
+TCP, TLS and authentication handshakes of a fresh connection per mail.
+"""
+
+import asyncio
+import smtplib
+from email.message import EmailMessage
+
+
+class SMTPPool:
+    """Bounded pool of reusable SMTP connections."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: str | None = None,
+        password: str | None = None,
+        starttls: bool = False,
+        size: int = 2,
+        timeout: float = 10,
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            host (str): SMTP server host
+            port (int): SMTP server port
+            user (str | None, optional): Login user. Defaults to None.
+            password (str | None, optional): Login password. Defaults to None.
+            starttls (bool, optional): Upgrade connections with STARTTLS. Defaults to False.
+            size (int, optional): Maximum open connections. Defaults to 2.
+            timeout (float, optional): Socket timeout in seconds. Defaults to 10.
+        """
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.size = size
+        self.timeout = timeout
+        self.connections_opened = 0
+        self._idle: list[smtplib.SMTP] = []
+        self._slots: asyncio.Semaphore | None = None
+
+    def _connect(self) -> smtplib.SMTP:
+        """Open and authenticate a connection.
+
+        Returns:
+            smtplib.SMTP: Connection
+        """
+        connection = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            connection.ehlo()
+            if self.starttls:
+                connection.starttls()
+                connection.ehlo()
+            if self.user:
+                connection.login(self.user, self.password or "")
+        except BaseException:
+            connection.close()
+            raise
+        self.connections_opened += 1
+        return connection
+
+    def _send(
+        self, connection: smtplib.SMTP | None, message: EmailMessage
+    ) -> None:
+        """Send a message and put the connection back if it is still usable.
+
+        An idle connection the server dropped is replaced once.
+
+        Args:
+            connection (smtplib.SMTP | None): Idle connection or None
+            message (EmailMessage): Message
+        """
+        if connection is not None:
+            try:
+                connection.send_message(message)
+            except (
+                smtplib.SMTPResponseException,
+                smtplib.SMTPRecipientsRefused,
+            ):
+                # The server answered and reset the transaction
+                self._idle.append(connection)
+                raise
+            except OSError:
+                # Dropped while idle, smtplib errors are OSError subclasses
+                connection.close()
+                connection = None
+            else:
+                self._idle.append(connection)
+                return
+
+        connection = self._connect()
+        try:
+            connection.send_message(message)
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused):
+            self._idle.append(connection)
+            raise
+        except BaseException:
+            connection.close()
+            raise
+        self._idle.append(connection)
+
+    async def send(self, message: EmailMessage) -> None:
+        """Send a message over a pooled connection.
+
+        Args:
+            message (EmailMessage): Message
+
+        Raises:
+            smtplib.SMTPException: If the server rejects the message
+            OSError: If the server cannot be reached
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            await asyncio.to_thread(self._send, connection, message)
+
+    async def close(self) -> None:
+        """Close the idle connections."""
+        while self._idle:
+            connection = self._idle.pop()
+            try:
+                await asyncio.to_thread(connection.quit)
+            except (smtplib.SMTPException, OSError):
+                connection.close()
@@ -0,0 +1,103 @@
+"""Compiled email templates.
+
+Every template of ``EMAIL_TEMPLATES_DIR`` is parsed and compiled once, at
+startup, into a shared Jinja environment, so rendering a message for a
+recipient does no disk read nor parse. In development the environment
+checks the file modification time on use and recompiles edited templates.
+"""
+
+import os
+import time
+from typing import Any
+
+from jinja2 import Environment, FileSystemLoader, Template
+
+from src.common.log import log
+from src.config import settings
+
+
+class TemplateRegistry:
+    """Shared Jinja environment with per template render timings."""
+
+    def __init__(self, directory: str, auto_reload: bool) -> None:
+        """Class initializer.
+
+        Args:
+            directory (str): Templates directory
+            auto_reload (bool): Recompile templates whose file changed
+        """
+        self.directory = directory
+        self.env = Environment(
+            loader=FileSystemLoader(directory),
+            auto_reload=auto_reload,
+            # Keep every compiled template, the set is small and fixed
+            cache_size=-1,
+        )
+        self._timings: dict[str, list[float]] = {}
+
+    def load(self) -> int:
+        """Compile every template of the directory.
+
+        Returns:
+            int: Number of compiled templates
+        """
+        if not os.path.isdir(self.directory):
+            log.warning(f"Email templates directory {self.directory} not found")
+            return 0
+        names = self.env.list_templates(extensions=["html"])
+        for name in names:
+            self.env.get_template(name)
+        log.info(f"Compiled {len(names)} email templates")
+        return len(names)
+
+    def get(self, name: str) -> Template:
+        """Compiled template, compiled on first use if not loaded.
+
+        Args:
+            name (str): Template file name
+
+        Returns:
+            Template: Template
+        """
+        return self.env.get_template(name)
+
+    def render(self, name: str, context: dict[str, Any]) -> str:
+        """Render a template.
+
+        Args:
+            name (str): Template file name
+            context (dict[str, Any]): Template variables
+
+        Returns:
+            str: Rendered text
+        """
+        template = self.get(name)
+        start = time.perf_counter()
+        rendered = template.render(context)
+        elapsed = time.perf_counter() - start
+        timing = self._timings.setdefault(name, [0, 0.0, 0.0])
+        timing[0] += 1
+        timing[1] += elapsed
+        timing[2] = max(timing[2], elapsed)
+        return rendered
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Render timings per template.
+
+        Returns:
+            dict[str, dict[str, Any]]: Render count, mean and max milliseconds
+        """
+        return {
+            name: {
+                "renders": count,
+                "mean_ms": total * 1000 / count,
+                "max_ms": longest * 1000,
+            }
+            for name, (count, total, longest) in self._timings.items()
+        }
+
+
+email_templates = TemplateRegistry(
+    directory=settings.email.EMAIL_TEMPLATES_DIR,
+    auto_reload=settings.base.ENVIRONMENT == "dev",
+)
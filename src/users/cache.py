@@ -0,0 +1,41 @@
+"""Per worker cache of user snapshots.
+
+A snapshot is found by the user id, ``("username", username)`` or
+``("email", email)``, all three keys lead to the same entry.
+"""
+
+from typing import Hashable
+
+from src.common.cache import IndexedTTLCache
+from src.config import settings
+from src.users.schemas import CurrentUserInfo
+
+
+def user_keys(user: CurrentUserInfo) -> tuple[Hashable, ...]:
+    """Keys of a user snapshot.
+
+    Args:
+        user (CurrentUserInfo): User snapshot
+
+    Returns:
+        tuple[Hashable, ...]: Id, then the username and email keys
+    """
+    return user.id, ("username", user.username), ("email", user.email)
+
+
+current_user_cache: IndexedTTLCache[CurrentUserInfo] = IndexedTTLCache(
+    maxsize=settings.base.CURRENT_USER_CACHE_MAXSIZE,
+    ttl=settings.base.CURRENT_USER_CACHE_TTL_SECONDS,
+    max_bytes=settings.base.CURRENT_USER_CACHE_MAX_BYTES,
+    keys=user_keys,
+)
+
+
+def invalidate_user(user_id: int | None) -> None:
+    """Drop a user snapshot after the user row changed.
+
+    Args:
+        user_id (int | None): User identifier
+    """
+    if user_id is not None:
+        current_user_cache.pop(user_id)
@@ -0,0 +1,182 @@
+"""Write-behind buffer for user login times.
+
+Logins record ``(user_id, timestamp)`` in memory and return without a
+write transaction. A background task writes the buffered times with one
+``executemany`` UPDATE every ``interval`` seconds, or sooner once
+``max_entries`` users are pending. Repeated logins of a user between two
+flushes are coalesced into a single row update.
+"""
+
+import asyncio
+from contextlib import suppress
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import bindparam, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.common.log import log
+from src.config import settings
+from src.db.session import async_db_session
+from src.users.cache import current_user_cache, invalidate_user
+from src.users.model import User
+
+_users = User.__table__
+
+_UPDATE_LOGIN_TIME = (
+    update(_users)
+    .where(_users.c.id == bindparam("user_id"))
+    .values(last_login_time=bindparam("login_time"))
+)
+
+
+class LoginTimeBuffer:
+    """Coalesces login time updates and writes them in batches."""
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        interval: float,
+        max_entries: int,
+    ) -> None:
+        """Class initializer.
+
+        Args:
+            session_factory (async_sessionmaker[AsyncSession]): Sessions used for flushing
+            interval (float): Seconds between flushes
+            max_entries (int): Pending users triggering an early flush
+        """
+        self.session_factory = session_factory
+        self.interval = interval
+        self.max_entries = max_entries
+        self.recorded = 0
+        self.written = 0
+        self.flushes = 0
+        self.failures = 0
+        self._pending: dict[int, datetime] = {}
+        self._full: asyncio.Event | None = None
+        self._lock: asyncio.Lock | None = None
+        self._task: asyncio.Task | None = None
+
+    def record(self, user_id: int, login_time: datetime) -> None:
+        """Buffer the login time of a user and show it in its snapshot.
+
+        Args:
+            user_id (int): User identifier
+            login_time (datetime): Login time
+        """
+        previous = self._pending.get(user_id)
+        if previous is None or previous < login_time:
+            self._pending[user_id] = login_time
+            user = current_user_cache.get(user_id)
+            if user is not None:
+                current_user_cache.set(
+                    user.model_copy(update={"last_login_time": login_time})
+                )
+        self.recorded += 1
+        if self._full is not None and len(self._pending) >= self.max_entries:
+            self._full.set()
+
+    def pending_time(self, user_id: int) -> datetime | None:
+        """Login time of a user not written yet.
+
+        Args:
+            user_id (int): User identifier
+
+        Returns:
+            datetime | None: Buffered login time, None if nothing is pending
+        """
+        return self._pending.get(user_id)
+
+    def _restore(self, pending: dict[int, datetime]) -> None:
+        """Put back entries that could not be written.
+
+        Args:
+            pending (dict[int, datetime]): Entries of the failed flush
+        """
+        for user_id, login_time in pending.items():
+            self._pending.setdefault(user_id, login_time)
+
+    async def flush(self) -> int:
+        """Write the buffered login times.
+
+        On failure the entries are kept for the next flush, unless a newer
+        login of the same user was recorded meanwhile.
+
+        Returns:
+            int: Number of updated users
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return 0
+            rows = [
+                {"user_id": user_id, "login_time": login_time}
+                for user_id, login_time in pending.items()
+            ]
+            try:
+                async with self.session_factory() as session, session.begin():
+                    await session.execute(_UPDATE_LOGIN_TIME, rows)
+            except SQLAlchemyError as e:
+                self.failures += 1
+                log.error(f"Login time flush of {len(rows)} users failed {e}")
+                self._restore(pending)
+                return 0
+            except BaseException:
+                self._restore(pending)
+                raise
+            self.written += len(rows)
+            self.flushes += 1
+            for user_id in pending:
+                invalidate_user(user_id)
+            return len(rows)
+
+    async def _run(self) -> None:
+        """Flush periodically, or early when the buffer fills, until cancelled."""
+        while True:
+            with suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(self._full.wait(), self.interval)
+            self._full.clear()
+            await self.flush()
+
+    async def start(self) -> None:
+        """Start the background flush."""
+        self._full = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Stop the background flush and write what is left."""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        self._full = None
+        await self.flush()
+        log.info(f"Login time buffer stopped {self.stats()}")
+
+    def stats(self) -> dict[str, Any]:
+        """Buffer counters.
+
+        Returns:
+            dict[str, Any]: Recorded logins, written rows, coalesced writes and flushes
+        """
+        return {
+            "pending": len(self._pending),
+            "recorded": self.recorded,
+            "written": self.written,
+            "coalesced": self.recorded - self.written - len(self._pending),
+            "flushes": self.flushes,
+            "failures": self.failures,
+        }
+
+
+login_time_buffer = LoginTimeBuffer(
+    session_factory=async_db_session,
+    interval=settings.base.LOGIN_TIME_FLUSH_INTERVAL_MS / 1000,
+    max_entries=settings.base.LOGIN_TIME_FLUSH_MAX_ENTRIES,
+)
@@ -3,7 +3,7 @@
 
 from datetime import datetime
 
-from sqlalchemy import String
+from sqlalchemy import Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.db.base import Base, id_key
@@ -19,6 +19,11 @@ class User(Base):
     """
 
     __tablename__ = "users"
+    # Keyset pagination scans, see src/db/pagination.py
+    __table_args__ = (
+        Index("ix_users_join_time_id", "join_time", "id"),
+        Index("ix_users_last_login_time_id", "last_login_time", "id"),
+    )
 
     id: Mapped[id_key] = mapped_column(init=False)
     email: Mapped[str] = mapped_column(String(50), unique=True, index=True)
@@ -1,18 +1,25 @@
 """Module."""
 
-from typing import AsyncGenerator, Callable
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Sequence
 
 from pydantic import EmailStr
-from sqlalchemy import func, select
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import defer, load_only, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from src.auth.hashing import password_hasher
+from src.db.pagination import KeysetPage
 from src.db.repository import BaseRepository
+from src.db.transaction import on_commit
+from src.users.cache import current_user_cache, invalidate_user
+from src.users.login_time import login_time_buffer
 from src.users.model import User as UserTable
-from src.users.schemas import UserBase, UserCreate
+from src.users.schemas import CurrentUserInfo, UserBase, UserCreate
 from src.utils.timezone import timezone
 
-func: Callable
-
 
 class UsersRepository(BaseRepository[UserTable]):
     """_summary_.
@@ -21,46 +28,156 @@ class UsersRepository(BaseRepository[UserTable]):
         BaseRepository (_type_): _description_
     """
 
+    keyset_columns = ("id", "join_time", "last_login_time")
+    count_tracked = True
+    update_dto = CurrentUserInfo
+    # Roles take a second query, they are only loaded when asked for
+    default_options = (raiseload(UserTable.roles),)
+    projections = {
+        # Login, checks the password and returns the token owner
+        "auth": (
+            load_only(
+                UserTable.id,
+                UserTable.username,
+                UserTable.email,
+                UserTable.password,
+                UserTable.phone,
+                UserTable.avatar,
+                UserTable.is_active,
+                UserTable.is_superuser,
+                UserTable.join_time,
+                UserTable.last_login_time,
+                raiseload=True,
+            ),
+            raiseload(UserTable.roles),
+        ),
+        # Authenticated user snapshot
+        "profile": (
+            defer(UserTable.password, raiseload=True),
+            raiseload(UserTable.roles),
+        ),
+        # Administration, with the roles
+        "admin": (
+            defer(UserTable.password, raiseload=True),
+            selectinload(UserTable.roles),
+        ),
+    }
+
     def __init__(self) -> None:
         """_summary_."""
         super().__init__(UserTable)
 
-    async def all(self, db: AsyncSession) -> AsyncGenerator[UserBase, None]:
-        """_summary_.
+    async def all(
+        self,
+        db: AsyncSession,
+        yield_per: int | None = None,
+        columns: Sequence[str] | None = None,
+    ) -> AsyncGenerator[UserBase | Row, None]:
+        """Stream every user in constant memory.
 
-        Returns:
-            AsyncGenerator[UserBase, None]: _description_
+        Args:
+            db (AsyncSession): database session
+            yield_per (int | None, optional): Rows per fetched batch. Defaults to None.
+            columns (Sequence[str] | None, optional): Columns to read instead of whole users. Defaults to None.
 
         Yields:
-            Iterator[AsyncGenerator[UserBase, None]]: _description_
+            Iterator[AsyncGenerator[UserBase | Row, None]]: Users, or rows of the selected columns
         """
-        async for instance in self._all(session=db):
-            yield instance
+        async with aclosing(
+            self._all(session=db, yield_per=yield_per, columns=columns)
+        ) as rows:
+            async for row in rows:
+                yield row
+
+    async def get(
+        self, db: AsyncSession, id_: int, projection: str | None = None
+    ) -> UserBase | None:
+        """Find a user by primary key, from the identity map when loaded.
 
-    async def get(self, db: AsyncSession, id_: int) -> UserBase:
-        """_summary_.
+        Args:
+            db (AsyncSession): database session
+            id_ (int): User identifier
+            projection (str | None, optional): Name of a set of ``projections``. Defaults to None.
+
+        Returns:
+            UserBase | None: User
+        """
+        return await db.get(
+            UserTable, id_, options=self._options(projection=projection)
+        )
+
+    async def get_cached(
+        self,
+        db: AsyncSession,
+        id_: int | None = None,
+        *,
+        username: str | None = None,
+        email: str | None = None,
+    ) -> CurrentUserInfo | None:
+        """Find a user snapshot by id, username or email, reading through the cache.
 
         Args:
-            db (AsyncSession): _description_
-            id_ (int): _description_
+            db (AsyncSession): database session
+            id_ (int | None, optional): User identifier. Defaults to None.
+            username (str | None, optional): User name, used without an id. Defaults to None.
+            email (str | None, optional): Email, used without an id or a user name. Defaults to None.
+
+        Raises:
+            ValueError: If no key is given
 
         Returns:
-            UserBase: _description_
+            CurrentUserInfo | None: User snapshot
         """
-        return await self._get(session=db, key="id", value=id_)
+        if id_ is not None:
+            key = id_
+        elif username is not None:
+            key = ("username", username)
+        elif email is not None:
+            key = ("email", email)
+        else:
+            raise ValueError("A user id, username or email is required")
+        user = current_user_cache.get(key)
+        if user is not None:
+            return user
+
+        if id_ is not None:
+            row = await self.get(db, id_, projection="profile")
+        elif username is not None:
+            row = await self.get_by_username(db, username, projection="profile")
+        else:
+            row = await self.get_user_by_email(db, email, projection="profile")
+        if row is None:
+            return None
+        user = CurrentUserInfo.model_validate(row)
+        login_time = login_time_buffer.pending_time(user.id)
+        if login_time is not None:
+            # The row does not have the login time buffered for a batch yet
+            user = user.model_copy(update={"last_login_time": login_time})
+        current_user_cache.set(user)
+        return user
 
     async def create(self, db: AsyncSession, user_data: UserCreate) -> UserBase:
-        """_summary_.
+        """Insert a user, relying on the unique indexes to reject duplicates.
 
         Args:
-            db (AsyncSession): _description_
-            user_data (UserCreate): _description_
+            db (AsyncSession): database session
+            user_data (UserCreate): User data
+
+        Raises:
+            IntegrityError: If the username or email is taken, see ``unique_violation``
 
         Returns:
-            UserBase: _description_
+            UserBase: Created user
         """
         dict_user = user_data.model_dump()
-        return await self._save(session=db, payload=dict_user)
+        dict_user["password"] = await password_hasher.ensure_hashed(
+            dict_user["password"]
+        )
+        try:
+            return await self._save(session=db, payload=dict_user)
+        except IntegrityError:
+            await db.rollback()
+            raise
 
     # async def add(self, db: AsyncSession, obj: AddUserParam) -> None:
     #     """_summary_.
@@ -78,56 +195,212 @@ class UsersRepository(BaseRepository[UserTable]):
     #     new_user.roles.extend(role_list)
     #     db.add(new_user)
 
-    async def update(self, db: AsyncSession, schema: UserBase) -> UserBase:
-        """_summary_.
+    async def update(
+        self, db: AsyncSession, schema: UserBase
+    ) -> CurrentUserInfo | None:
+        """Write the fields set on a user schema in one statement.
 
         Args:
-            db (AsyncSession): _description_
-            schema (UserBase): _description_
+            db (AsyncSession): database session
+            schema (UserBase): User id and the fields to change
 
         Returns:
-            UserBase: _description_
+            CurrentUserInfo | None: Updated user, None if it does not exist
         """
+        payload = schema.model_dump(exclude_unset=True, exclude={"id", "roles"})
+        if "password" in payload:
+            payload["password"] = await password_hasher.ensure_hashed(
+                payload["password"]
+            )
         return await self._update(
-            session=db,
-            key="id",
-            value=schema.id,
-            payload=schema.model_dump(exclude_unset=True),
+            session=db, key="id", value=schema.id, payload=payload
         )
 
+    async def _save(
+        self, session: AsyncSession, payload: dict[str, Any]
+    ) -> UserTable:
+        """Insert a user and drop snapshots reachable by its username or email.
+
+        Args:
+            session (AsyncSession): database session
+            payload (dict[str, Any]): Column values
+
+        Returns:
+            UserTable: Created user
+        """
+        user = await super()._save(session, payload)
+        current_user_cache.pop(("username", user.username))
+        current_user_cache.pop(("email", user.email))
+        return user
+
+    async def _update(
+        self,
+        session: AsyncSession,
+        key: str,
+        value: Any,
+        payload: dict[str, Any],
+    ) -> CurrentUserInfo | None:
+        """Update a user and cache the returned row once it is committed.
+
+        Args:
+            session (AsyncSession): database session
+            key (str): Column matching the user
+            value (Any): Value of the column
+            payload (dict[str, Any]): New column values
+
+        Returns:
+            CurrentUserInfo | None: Updated user
+        """
+        try:
+            user = await super()._update(session, key, value, payload)
+        finally:
+            current_user_cache.pop(value if key == "id" else (key, value))
+        if user is not None:
+            on_commit(session, lambda: current_user_cache.set(user))
+        return user
+
+    async def delete(self, session: AsyncSession, id_: int) -> bool:
+        """Delete a user and drop its cached snapshot.
+
+        Args:
+            session (AsyncSession): database session
+            id_ (int): User identifier
+
+        Returns:
+            bool: True once deleted
+        """
+        deleted = await super().delete(session, id_)
+        invalidate_user(id_)
+        return deleted
+
+    async def upsert_many(
+        self,
+        session: AsyncSession,
+        payloads: Sequence[dict[str, Any]],
+        key: str | Sequence[str],
+        update_columns: Sequence[str] | None = None,
+        chunk_size: int | None = None,
+    ) -> list[int]:
+        """Insert users or update existing ones and drop their cached snapshots.
+
+        Args:
+            session (AsyncSession): database session
+            payloads (Sequence[dict[str, Any]]): Users, all with the same keys
+            key (str | Sequence[str]): Columns of the unique constraint
+            update_columns (Sequence[str] | None, optional): Columns overwritten on conflict. Defaults to None.
+            chunk_size (int | None, optional): Rows per batch. Defaults to None.
+
+        Returns:
+            list[int]: User identifiers in payload order
+        """
+        ids = await super().upsert_many(
+            session, payloads, key, update_columns, chunk_size
+        )
+        self._invalidate_many(ids if ids else None)
+        return ids
+
+    async def update_many(
+        self,
+        session: AsyncSession,
+        payloads: Sequence[dict[str, Any]],
+        key: str = "id",
+        chunk_size: int | None = None,
+    ) -> int:
+        """Update users in batches and drop their cached snapshots.
+
+        Args:
+            session (AsyncSession): database session
+            payloads (Sequence[dict[str, Any]]): Key value and new column values per user
+            key (str, optional): Column matching the users. Defaults to "id".
+            chunk_size (int | None, optional): Rows per batch. Defaults to None.
+
+        Returns:
+            int: Number of updated users
+        """
+        updated = await super().update_many(session, payloads, key, chunk_size)
+        self._invalidate_many(
+            [payload["id"] for payload in payloads] if key == "id" else None
+        )
+        return updated
+
+    async def delete_many(
+        self,
+        session: AsyncSession,
+        values: Sequence[Any],
+        key: str = "id",
+        chunk_size: int | None = None,
+    ) -> int:
+        """Delete users in batches and drop their cached snapshots.
+
+        Args:
+            session (AsyncSession): database session
+            values (Sequence[Any]): Key values of the users
+            key (str, optional): Column matching the users. Defaults to "id".
+            chunk_size (int | None, optional): Key values per statement. Defaults to None.
+
+        Returns:
+            int: Number of deleted users
+        """
+        deleted = await super().delete_many(session, values, key, chunk_size)
+        self._invalidate_many(values if key == "id" else None)
+        return deleted
+
+    @staticmethod
+    def _invalidate_many(user_ids: Sequence[int] | None) -> None:
+        """Drop cached snapshots of changed users.
+
+        Args:
+            user_ids (Sequence[int] | None): User identifiers, None when unknown to drop every snapshot
+        """
+        if user_ids is None:
+            current_user_cache.clear()
+            return
+        for user_id in user_ids:
+            invalidate_user(user_id)
+
     async def get_user_by_email(
-        self, db: AsyncSession, email: EmailStr
+        self, db: AsyncSession, email: EmailStr, projection: str | None = None
     ) -> UserBase | None:
         """_summary_.
 
         Args:
             db (AsyncSession): _description_
             email (EmailStr): _description_
+            projection (str | None, optional): Name of a set of ``projections``. Defaults to None.
 
         Returns:
             UserBase | None: _description_
         """
-        return await self._get(session=db, key="email", value=email)
+        return await self._get(
+            session=db, key="email", value=email, projection=projection
+        )
 
     async def get_by_username(
-        self, db: AsyncSession, username: str
+        self, db: AsyncSession, username: str, projection: str | None = None
     ) -> UserBase | None:
         """_summary_.
 
         Args:
             db (AsyncSession): _description_
             username (str): _description_
+            projection (str | None, optional): Name of a set of ``projections``. Defaults to None.
 
         Returns:
             UserBase | None: _description_
         """
-        return await self._get(session=db, key="username", value=username)
+        return await self._get(
+            session=db, key="username", value=username, projection=projection
+        )
 
     async def update_login_time(
-        self, db: AsyncSession, user_data: UserBase
+        self,
+        db: AsyncSession,  # pylint: disable=unused-argument
+        user_data: UserBase,
     ) -> UserBase:
         """Update user login time.
 
+        The time is set on the loaded user without marking it dirty and
+        written later in a batch by the login time buffer.
 
         Args:
             db (AsyncSession): database session
@@ -136,29 +409,61 @@ class UsersRepository(BaseRepository[UserTable]):
         Returns:
             UserBase: User detail
         """
-        user_data.last_login_time = timezone.now_utc()
+        login_time = timezone.now_utc()
+        set_committed_value(user_data, "last_login_time", login_time)
+        login_time_buffer.record(user_data.id, login_time)
+        return user_data
+
+    async def update_password_hash(
+        self, db: AsyncSession, user_data: UserBase, password_hash: str
+    ) -> UserBase:
+        """Replace the stored password hash, used to upgrade weak hashes.
+
+        Args:
+            db (AsyncSession): database session
+            user_data (UserBase): Current user data
+            password_hash (str): New password hash
+
+        Returns:
+            UserBase: User detail
+        """
+        user_data.password = password_hash
         await db.commit()
-        await db.refresh(user_data)
         return user_data
 
-    async def paginate(self, limit: int, offset: int):
-        """_summary_.
+    async def paginate(
+        self,
+        db: AsyncSession,
+        size: int,
+        sort: str = "id",
+        descending: bool = False,
+        after: tuple | None = None,
+        before: tuple | None = None,
+        projection: str | None = "admin",
+    ) -> KeysetPage:
+        """Page of users following or preceding a key.
 
         Args:
-            limit (int): _description_
-            offset (int): _description_
+            db (AsyncSession): database session
+            size (int): Page size
+            sort (str, optional): Sort column, one of ``keyset_columns``. Defaults to "id".
+            descending (bool, optional): Sort in descending order. Defaults to False.
+            after (tuple | None, optional): Key the page follows. Defaults to None.
+            before (tuple | None, optional): Key the page precedes. Defaults to None.
+            projection (str | None, optional): Name of a set of ``projections``. Defaults to "admin".
 
         Returns:
-            _type_: _description_
+            KeysetPage: Users and the keys of the next and previous pages
         """
-        query = select(func.count()).select_from(self.schema_class)
-        result = await self.execute(query)
-        count = result.scalar()
-        query = (
-            select(self.schema_class).limit(limit).offset(offset).order_by("id")
+        return await self.keyset_page(
+            db,
+            size=size,
+            sort=sort,
+            descending=descending,
+            after=after,
+            before=before,
+            projection=projection,
         )
-        data = await self.execute(query)
-        return data.scalars().ALL(), count
 
 
 UsersCRUD = UsersRepository()
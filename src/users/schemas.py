@@ -3,9 +3,8 @@
 from datetime import datetime
 from typing import Optional
 
-from pydantic import ConfigDict, EmailStr, Field, field_validator
+from pydantic import ConfigDict, EmailStr, Field
 
-from src.auth.utils import get_password_hash, is_password_hashed
 from src.common.enums import StatusType
 from src.common.schema import CustomPhoneNumber, SchemaBase
 from src.role.schemas import GetRoleListDetails
@@ -50,20 +49,6 @@ class UserCreate(SchemaBase):
     first_name: str = None
     last_name: str = None
 
-    @field_validator("password")
-    def hash_password(cls, pw: str) -> str:
-        """_summary_.
-
-        Args:
-            pw (str): _description_
-
-        Returns:
-            str: _description_
-        """
-        if is_password_hashed(pw):
-            return pw
-        return get_password_hash(pw)
-
 
 class UserCreateOpen(UserCreate):
     """_summary_.
@@ -88,23 +73,6 @@ class UserUpdate(UserBase):
 
     password: Optional[str] = None
 
-    @field_validator("password")
-    def hash_password(cls, pw: str) -> str:
-        """_summary_.
-
-        Args:
-            pw (str): _description_
-
-        Returns:
-            str: _description_
-        """
-        if not pw:
-            return pw
-
-        if is_password_hashed(pw):
-            return pw
-        return get_password_hash(pw)
-
 
 class UserOut(UserBase):
     """_summary_.
@@ -207,10 +175,36 @@ class GetUserInfoNoRelationDetail(UserInfoSchemaBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class CurrentUserInfo(SchemaBase):
+    """Immutable snapshot of the authenticated user, safe to share between
+    requests.
+    """
+
+    model_config = ConfigDict(from_attributes=True, frozen=True)
+
+    id: int
+    email: EmailStr
+    username: str
+    first_name: str | None = None
+    last_name: str | None = None
+    is_superuser: bool = False
+    is_active: bool = True
+    avatar: str | None = None
+    phone: str | None = None
+    join_time: datetime | None = None
+    last_login_time: datetime | None = None
+
+
 class TokenPayload(SchemaBase):
     """Token Schema."""
 
     sub: int | None = None
+    exp: int | None = None
+    iat: float | None = None
+    jti: str | None = None
+    # Refresh token family and generation
+    fam: str | None = None
+    gen: int | None = None
 
 
 class AuthSchemaBase(SchemaBase):
@@ -1,10 +1,15 @@
 """Module."""
 
+from fastapi_pagination.cursor import CursorPage, CursorParams
+from sqlalchemy.exc import IntegrityError
+
 from src.common.exception import errors
 from src.config import settings
+from src.db.counts import CountMode
+from src.db.pagination import paginate_keyset
 from src.db.session import CurrentSession
 from src.users.repository import UsersCRUD
-from src.users.schemas import UserCreateOpen, UserOut
+from src.users.schemas import CurrentUserInfo, UserCreateOpen, UserOut
 
 
 class UserService:
@@ -42,15 +47,68 @@ class UserService:
                 msg="Open user registration is forbidden on this server",
             )
 
-        username = await UsersCRUD.get_by_username(db, user_data.username)
-        if username:
-            raise errors.RequestError(msg="This username is already registered")
+        # The unique indexes reject duplicates, checking beforehand would
+        # cost two queries and still race with concurrent signups
+        try:
+            return await UsersCRUD.create(db, user_data)
+        except IntegrityError as e:
+            column = UsersCRUD.unique_violation(e)
+            if column == "username":
+                raise errors.RequestError(
+                    msg="This username is already registered"
+                ) from e
+            if column == "email":
+                raise errors.RequestError(
+                    msg="The email has been registered"
+                ) from e
+            raise
+
+    @staticmethod
+    async def list_users(
+        *,
+        current_user: CurrentUserInfo,
+        db: CurrentSession,
+        params: CursorParams,
+        sort: str,
+        descending: bool,
+        total: CountMode | None,
+        total_max_age: float | None,
+    ) -> CursorPage[UserOut]:
+        """Page of users, for superusers.
+
+        Args:
+            current_user (CurrentUserInfo): Authenticated user
+            db (CurrentSession): database session
+            params (CursorParams): Cursor and page size
+            sort (str): Sort column
+            descending (bool): Sort in descending order
+            total (CountMode | None): How to count every user, not counted if None
+            total_max_age (float | None): Accepted age in seconds of a cached total
 
-        email = await UsersCRUD.get_user_by_email(db, email=user_data.email)
+        Raises:
+            errors.ForbiddenError: If the user is not a superuser
 
-        if email:
-            raise errors.RequestError(msg="The email has been registered")
-        return await UsersCRUD.create(db, user_data)
+        Returns:
+            CursorPage[UserOut]: Users
+        """
+        if not current_user.is_superuser:
+            raise errors.ForbiddenError(
+                msg="The user doesn't have enough privileges"
+            )
+        return await paginate_keyset(
+            db,
+            UsersCRUD,
+            params,
+            sort=sort,
+            descending=descending,
+            total=total,
+            total_max_age=total_max_age,
+            projection="admin",
+            transformer=lambda users: [
+                UserOut.model_validate(user, from_attributes=True)
+                for user in users
+            ],
+        )
 
 
 user_service = UserService()
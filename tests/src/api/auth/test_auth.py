@@ -2,7 +2,13 @@
 
 from unittest.mock import AsyncMock
 
+from src.auth.security import (
+    create_access_token,
+    create_refresh_token,
+    decode_token,
+)
 from src.config import settings
+from src.users.cache import current_user_cache, invalidate_user
 
 PYTEST_USERNAME = "admin"
 PYTEST_PASSWORD = "string"
@@ -68,3 +74,109 @@ def test_token_invalid(mocker, client, admin_user):
 
     data = response.json()
     assert data["code"] == 401
+
+
+def test_token_current_user_cached(mocker, client, admin_user):
+    """Test the current user is loaded once and then served from cache."""
+    token, _ = create_access_token(str(admin_user.id))
+    headers = {"Authorization": f"Bearer {token}"}
+    session_get = mocker.patch(
+        "sqlalchemy.ext.asyncio.AsyncSession.get",
+        side_effect=AsyncMock(return_value=admin_user),
+    )
+    current_user_cache.pop(admin_user.id)
+
+    for _ in range(2):
+        response = client.post(
+            f"{settings.base.API_V1_STR}/login/test-token", headers=headers
+        )
+        data = response.json()
+        assert data["code"] == 200
+        assert data["data"]["username"] == admin_user.username
+        assert "password" not in data["data"]
+
+    assert session_get.call_count == 1
+
+    invalidate_user(admin_user.id)
+    client.post(f"{settings.base.API_V1_STR}/login/test-token", headers=headers)
+    assert session_get.call_count == 2
+
+
+def test_logout_revokes_token(mocker, client, admin_user):
+    """Test a token is rejected after logout."""
+    token, _ = create_access_token(str(admin_user.id))
+    headers = {"Authorization": f"Bearer {token}"}
+    mocker.patch(
+        "sqlalchemy.ext.asyncio.AsyncSession.get",
+        side_effect=AsyncMock(return_value=admin_user),
+    )
+
+    response = client.post(
+        f"{settings.base.API_V1_STR}/logout", headers=headers
+    )
+    assert response.json()["code"] == 200
+
+    response = client.post(
+        f"{settings.base.API_V1_STR}/login/test-token", headers=headers
+    )
+    data = response.json()
+    assert data["code"] == 401
+    assert data["msg"] == "Token has been revoked"
+
+
+def test_login_throttled_before_hashing(
+    mocker, client, admin_user, login_throttle
+):
+    """Test repeated failures are rejected without loading the user."""
+    mocker.patch("src.auth.service.login_throttle", login_throttle)
+    get_by_username = mocker.patch(
+        "src.auth.service.UsersCRUD.get_by_username",
+        side_effect=AsyncMock(return_value=admin_user),
+    )
+    verify = mocker.patch(
+        "src.auth.service.password_hasher.verify_and_update",
+        side_effect=AsyncMock(return_value=(False, None)),
+    )
+    data = {"username": PYTEST_USERNAME, "password": "wrong"}
+
+    codes = [
+        client.post(f"{settings.base.API_V1_STR}/login", data=data).json()[
+            "code"
+        ]
+        for _ in range(4)
+    ]
+
+    assert codes == [401, 401, 401, 429]
+    assert get_by_username.call_count == verify.call_count == 3
+
+
+def test_new_token_rotates_family(mocker, client, admin_user):
+    """Test a refresh rotates its family and refresh tokens cannot authenticate."""
+    access_token, expire = create_access_token(str(admin_user.id))
+    refresh_token, _ = create_refresh_token(
+        str(admin_user.id), expire, fam="family", gen=0
+    )
+    mocker.patch(
+        "sqlalchemy.ext.asyncio.AsyncSession.get",
+        side_effect=AsyncMock(return_value=admin_user),
+    )
+    rotate = mocker.patch(
+        "src.auth.service.refresh_families.rotate",
+        side_effect=AsyncMock(return_value=1),
+    )
+
+    response = client.post(
+        f"{settings.base.API_V1_STR}/token/new",
+        params={"refresh_token": refresh_token},
+        headers={"Authorization": f"Bearer {access_token}"},
+    )
+    data = response.json()
+    assert data["code"] == 200
+    assert rotate.call_args.args[1].gen == 0
+    assert decode_token(data["data"]["refresh_token"]).gen == 1
+
+    response = client.post(
+        f"{settings.base.API_V1_STR}/login/test-token",
+        headers={"Authorization": f"Bearer {refresh_token}"},
+    )
+    assert response.json()["code"] == 401
@@ -4,8 +4,12 @@ import json
 from unittest.mock import AsyncMock
 
 import pytest
+from sqlalchemy.exc import IntegrityError
 
+from src.auth.security import create_access_token
 from src.config import settings
+from src.db.pagination import KeysetPage
+from src.users.cache import invalidate_user
 
 
 def test_register(mocker, client, admin_user):
@@ -21,13 +25,6 @@ def test_register(mocker, client, admin_user):
     payload = json.dumps(data)
     headers = {"Content-Type": "application/json"}
 
-    async_mock = AsyncMock(return_value=None)
-    mocker.patch(
-        "src.users.service.UsersCRUD.get_by_username", side_effect=async_mock
-    )
-    mocker.patch(
-        "src.users.service.UsersCRUD.get_user_by_email", side_effect=async_mock
-    )
     mocker.patch(
         "src.users.service.UsersCRUD.create",
         side_effect=AsyncMock(return_value=admin_user),
@@ -55,13 +52,6 @@ def test_register_missing_data(mocker, client, admin_user):
     payload = json.dumps(data)
     headers = {"Content-Type": "application/json"}
 
-    async_mock = AsyncMock(return_value=None)
-    mocker.patch(
-        "src.users.service.UsersCRUD.get_by_username", side_effect=async_mock
-    )
-    mocker.patch(
-        "src.users.service.UsersCRUD.get_user_by_email", side_effect=async_mock
-    )
     mocker.patch(
         "src.users.service.UsersCRUD.create",
         side_effect=AsyncMock(return_value=admin_user),
@@ -77,14 +67,14 @@ def test_register_missing_data(mocker, client, admin_user):
 
 
 @pytest.mark.parametrize(
-    ("email_exist", "username_exist", "expected_message"),
+    ("violation", "expected_message"),
     [
-        pytest.param(True, False, "The email has been registered"),
-        pytest.param(False, True, "This username is already registered"),
+        pytest.param("users.email", "The email has been registered"),
+        pytest.param("users.username", "This username is already registered"),
     ],
 )
 def test_register_with_existing_user(
-    mocker, client, admin_user, email_exist, username_exist, expected_message
+    mocker, client, admin_user, violation, expected_message
 ):
     """Test user registration."""
     data = {
@@ -98,18 +88,14 @@ def test_register_with_existing_user(
     payload = json.dumps(data)
     headers = {"Content-Type": "application/json"}
 
-    async_mock = AsyncMock(return_value=admin_user if username_exist else None)
-    mocker.patch(
-        "src.users.service.UsersCRUD.get_by_username", side_effect=async_mock
+    error = IntegrityError(
+        "INSERT INTO users",
+        {},
+        Exception(f"UNIQUE constraint failed: {violation}"),
     )
-
-    async_mock = AsyncMock(return_value=admin_user if email_exist else None)
-    mocker.patch(
-        "src.users.service.UsersCRUD.get_user_by_email", side_effect=async_mock
-    )
-    mocker.patch(
+    create = mocker.patch(
         "src.users.service.UsersCRUD.create",
-        side_effect=AsyncMock(return_value=admin_user),
+        side_effect=AsyncMock(side_effect=error),
     )
 
     response = client.post(
@@ -119,3 +105,54 @@ def test_register_with_existing_user(
     data = response.json()
     assert data["code"] == 400
     assert data["msg"] == expected_message
+    assert create.call_count == 1
+
+
+def test_list_users_pages_with_cursor(mocker, client, admin_user):
+    """Test users are listed with signed cursors for superusers only."""
+    token, _ = create_access_token(str(admin_user.id))
+    headers = {"Authorization": f"Bearer {token}"}
+    invalidate_user(admin_user.id)
+    mocker.patch(
+        "sqlalchemy.ext.asyncio.AsyncSession.get",
+        side_effect=AsyncMock(return_value=admin_user),
+    )
+    keyset_page = mocker.patch(
+        "src.users.service.UsersCRUD.keyset_page",
+        side_effect=AsyncMock(
+            return_value=KeysetPage(
+                items=[admin_user], next_key=(admin_user.id,), previous_key=None
+            )
+        ),
+    )
+    count = mocker.patch(
+        "src.users.service.UsersCRUD.count", side_effect=AsyncMock()
+    )
+    url = f"{settings.base.API_V1_STR}/users"
+
+    data = client.get(url, params={"size": 1}, headers=headers).json()
+    assert data["code"] == 200
+    assert [user["username"] for user in data["data"]["items"]] == ["admin"]
+    assert data["data"]["total"] is None
+    assert data["data"]["previous_page"] is None
+    count.assert_not_called()
+
+    next_page = data["data"]["next_page"]
+    data = client.get(
+        url, params={"size": 1, "cursor": next_page}, headers=headers
+    ).json()
+    assert data["code"] == 200
+    assert keyset_page.call_args.kwargs["after"] == (admin_user.id,)
+
+    data = client.get(
+        url,
+        params={"size": 1, "cursor": next_page, "sort": "join_time"},
+        headers=headers,
+    ).json()
+    assert data["code"] == 400
+
+    admin_user.is_superuser = False
+    invalidate_user(admin_user.id)
+    data = client.get(url, headers=headers).json()
+    assert data["code"] == 403
+    invalidate_user(admin_user.id)
@@ -0,0 +1,76 @@
+"""Module to test refresh token rotation."""
+
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert, select
+
+from src.auth.families import RefreshTokenFamilies
+from src.auth.model import RefreshTokenFamily
+from src.common.exception.errors import TokenError
+from src.users.model import User
+from src.users.schemas import TokenPayload
+
+
+def test_rotation_and_reuse(sqlite_db):
+    """Test rotation advances the family and a replay revokes it."""
+    session_factory = sqlite_db.session_factory
+    expires_at = datetime(2030, 1, 1)
+    family = RefreshTokenFamilies.new_family()
+
+    def token(generation: int) -> TokenPayload:
+        return TokenPayload(sub=1, fam=family, gen=generation)
+
+    async def run():
+        async with sqlite_db.engine.begin() as conn:
+            await conn.execute(
+                insert(User.__table__).values(
+                    id=1,
+                    email="user@example.com",
+                    username="user",
+                    first_name="User",
+                    last_name="One",
+                    is_superuser=False,
+                    is_active=True,
+                    join_time=expires_at,
+                    created_time=expires_at,
+                )
+            )
+        worker = RefreshTokenFamilies(session_factory, 100, 60, 60)
+        other_worker = RefreshTokenFamilies(session_factory, 100, 60, 60)
+        async with session_factory() as session:
+            generations = [
+                await worker.rotate(session, token(0), expires_at),
+                await worker.rotate(session, token(1), expires_at),
+            ]
+            # Replay of the first token on a worker without the family cached
+            with pytest.raises(TokenError, match="reuse"):
+                await other_worker.rotate(session, token(0), expires_at)
+            # Even the newest token is rejected once the family is revoked
+            with pytest.raises(TokenError, match="reuse"):
+                await worker.rotate(session, token(2), expires_at)
+            row = (
+                await session.execute(select(RefreshTokenFamily))
+            ).scalar_one()
+            purged = await worker.purge()
+        return generations, row, purged
+
+    generations, row, purged = sqlite_db.run(run)
+    assert generations == [1, 2]
+    assert (row.generation, row.revoked) == (2, True)
+    assert purged == 0
+
+
+def test_cached_replay_skips_database():
+    """Test a replay of a hot family is rejected from the cache."""
+    families = RefreshTokenFamilies(None, 100, 60, 60)
+    families.cache.set("family", (3, True))
+
+    with pytest.raises(TokenError, match="reuse"):
+        asyncio.run(
+            families.rotate(
+                None, TokenPayload(sub=1, fam="family", gen=3), datetime.now()
+            )
+        )
+    assert families.cache.get("family") == (3, True)
@@ -0,0 +1,136 @@
+"""Module to test the password hashing service."""
+
+import asyncio
+import time
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.auth.hashing import PasswordHasher
+from src.auth.policy import build_crypt_context
+from src.common.exception.errors import CustomError
+from src.config import settings
+
+
+def test_hash_and_verify():
+    """Test hashing round trip through the worker pool."""
+    hasher = PasswordHasher(pool_size=0, max_pending=4, timeout=5)
+
+    async def run():
+        hashed = await hasher.hash("string")
+        return (
+            hashed,
+            await hasher.verify("string", hashed),
+            await hasher.verify("wrong", hashed),
+            await hasher.ensure_hashed(hashed),
+        )
+
+    hashed, valid, invalid, rehashed = asyncio.run(run())
+    assert valid
+    assert not invalid
+    assert rehashed == hashed
+    assert hasher.pending == 0
+
+
+def test_queue_depth_limit():
+    """Test jobs are rejected once the queue is full."""
+    hasher = PasswordHasher(pool_size=0, max_pending=0, timeout=5)
+
+    try:
+        asyncio.run(hasher.hash("string"))
+    except CustomError as e:
+        assert e.code == 503
+    else:
+        pytest.fail("Hashing job was not rejected")
+
+
+def test_weak_hash_is_upgraded():
+    """Test hashes below the configured cost are rehashed on verify."""
+    weak_hash = build_crypt_context(["bcrypt"], bcrypt_rounds=4).hash("string")
+    hasher = PasswordHasher(pool_size=0, max_pending=4, timeout=5)
+
+    valid, new_hash = asyncio.run(hasher.verify_and_update("string", weak_hash))
+
+    assert valid
+    assert new_hash.startswith(f"$2b${settings.base.PASSWORD_BCRYPT_ROUNDS}$")
+
+
+class _BrokenPool(Executor):
+    """Pool whose worker processes died."""
+
+    def __init__(self):
+        self.closed = False
+
+    def submit(self, fn, /, *args, **kwargs):
+        future = Future()
+        future.set_exception(BrokenProcessPool("worker died"))
+        return future
+
+    def shutdown(self, wait=True, *, cancel_futures=False):
+        self.closed = True
+
+
+def test_timed_out_job_stays_pending():
+    """Test a timed out job counts against the limit until it ends."""
+    hasher = PasswordHasher(pool_size=0, max_pending=1, timeout=0.05)
+
+    async def run():
+        codes = []
+        for _ in range(2):
+            try:
+                await hasher._run(time.sleep, 0.3)
+            except CustomError as e:
+                codes.append(e.code)
+        pending = hasher.pending
+        await asyncio.sleep(0.4)
+        return codes, pending
+
+    codes, pending = asyncio.run(run())
+
+    assert codes == [503, 503]
+    assert pending == 1
+    assert hasher.pending == 0
+
+
+def test_broken_pool_is_replaced():
+    """Test a job is retried on a new pool after a worker died."""
+    hasher = PasswordHasher(pool_size=1, max_pending=4, timeout=30)
+    broken = hasher._executor = _BrokenPool()
+
+    try:
+        result = asyncio.run(hasher._run(abs, -3))
+    finally:
+        hasher.shutdown()
+
+    assert result == 3
+    assert broken.closed
+    assert hasher.pending == 0
+
+
+def test_pool_broken_without_waiter_is_replaced():
+    """Test a worker dying under a timed out job does not break later jobs."""
+    hasher = PasswordHasher(pool_size=1, max_pending=4, timeout=0.05)
+
+    async def run():
+        try:
+            await hasher._run(time.sleep, 30)
+        except CustomError as e:
+            timed_out = e.code
+        for process in list(hasher._executor._processes.values()):
+            process.kill()
+        for _ in range(500):
+            if hasher.pending == 0:
+                break
+            await asyncio.sleep(0.01)
+        hasher.timeout = 30
+        return timed_out, await hasher._run(abs, -3)
+
+    try:
+        timed_out, result = asyncio.run(run())
+    finally:
+        hasher.shutdown()
+
+    assert timed_out == 503
+    assert result == 3
+    assert hasher.pending == 0
@@ -0,0 +1,100 @@
+"""Module to test the signing key ring."""
+
+import json
+import os
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+
+from src.auth.keys import KeyRing
+
+
+def _ed25519_pem() -> str:
+    """Generate a private key in PEM format."""
+    return (
+        Ed25519PrivateKey.generate()
+        .private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption(),
+        )
+        .decode()
+    )
+
+
+def _write_keys(path, active_kid, keys) -> None:
+    """Write a keys file and move its mtime forward."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"active_kid": active_kid, "keys": keys}, f)
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+
+@pytest.fixture
+def keys_file(tmp_path):
+    """Keys file with an EdDSA key and a legacy HMAC key."""
+    path = tmp_path / "keys.json"
+    _write_keys(
+        path,
+        "ed-1",
+        [
+            {"kid": "ed-1", "alg": "EdDSA", "private_key": _ed25519_pem()},
+            {"kid": "legacy", "alg": "HS256", "secret": "legacy-secret"},
+        ],
+    )
+    return path
+
+
+def test_sign_and_verify_by_kid(keys_file):
+    """Test tokens are signed by the active key and verified by kid."""
+    ring = KeyRing(str(keys_file), None, "HS256", reload_interval=0)
+
+    token = ring.encode({"sub": "1"})
+    legacy = jwt.encode(
+        {"sub": "2"}, "legacy-secret", "HS256", headers={"kid": "legacy"}
+    )
+
+    assert jwt.get_unverified_header(token)["kid"] == "ed-1"
+    assert ring.decode(token)["sub"] == "1"
+    assert ring.decode(legacy)["sub"] == "2"
+
+    published = json.loads(ring.jwks)["keys"]
+    assert [key["kid"] for key in published] == ["ed-1"]
+    assert "d" not in published[0]
+
+
+def test_rotation_without_restart(keys_file):
+    """Test a new active key is picked up and retired keys stop verifying."""
+    ring = KeyRing(str(keys_file), None, "HS256", reload_interval=0)
+    evicted = []
+    ring.add_listener(lambda: evicted.append(True))
+    old_token = ring.encode({"sub": "1"})
+
+    _write_keys(
+        keys_file,
+        "ed-2",
+        [{"kid": "ed-2", "alg": "EdDSA", "private_key": _ed25519_pem()}],
+    )
+
+    new_token = ring.encode({"sub": "1"})
+    assert jwt.get_unverified_header(new_token)["kid"] == "ed-2"
+    assert evicted
+    with pytest.raises(jwt.InvalidTokenError, match="Unknown signing key"):
+        ring.decode(old_token)
+
+
+def test_jwks_endpoint(client):
+    """Test the key set is served with caching headers."""
+    response = client.get("/.well-known/jwks.json")
+
+    assert response.status_code == 200
+    assert "keys" in response.json()
+    assert "max-age" in response.headers["cache-control"]
+
+    cached = client.get(
+        "/.well-known/jwks.json",
+        headers={"If-None-Match": response.headers["etag"]},
+    )
+    assert cached.status_code == 304
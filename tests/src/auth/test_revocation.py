@@ -0,0 +1,73 @@
+"""Module to test the token revocation store."""
+
+import asyncio
+import time
+
+from src.auth.keys import key_ring
+from src.auth.revocation import RevocationStore
+from src.auth.security import create_access_token
+from src.users.schemas import TokenPayload
+
+
+def _store(path) -> RevocationStore:
+    """Store writing to a temporary database."""
+    return RevocationStore(
+        path=str(path),
+        capacity=100,
+        error_rate=0.01,
+        refresh_interval=60,
+        user_ttl=3600,
+    )
+
+
+def test_revoke_token_and_user(tmp_path):
+    """Test single token and user wide revocation."""
+    store = _store(tmp_path / "revocations.db")
+    now = int(time.time())
+    token = TokenPayload(sub=1, exp=now + 60, iat=now, jti="a")
+    other = TokenPayload(sub=1, exp=now + 60, iat=now, jti="b")
+
+    async def run():
+        await store.revoke_token("a", now + 60)
+        revoked = store.is_revoked(token), store.is_revoked(other)
+        await store.revoke_user(1, before=now)
+        newer = TokenPayload(sub=1, exp=now + 60, iat=now + 1, jti="c")
+        return (*revoked, store.is_revoked(other), store.is_revoked(newer))
+
+    assert asyncio.run(run()) == (True, False, True, False)
+    asyncio.run(store.stop())
+
+
+def test_refresh_shares_and_purges(tmp_path):
+    """Test revocations of another worker are loaded and expired ones purged."""
+    path = tmp_path / "revocations.db"
+    worker, other_worker = _store(path), _store(path)
+    now = int(time.time())
+
+    async def run():
+        await other_worker.revoke_token("live", now + 60)
+        await other_worker.revoke_token("expired", now - 1)
+        before = worker.is_revoked(TokenPayload(sub=1, jti="live"))
+        await worker.refresh()
+        return before, worker._execute("SELECT jti FROM revoked_tokens")
+
+    before, rows = asyncio.run(run())
+    assert not before
+    assert worker.is_revoked(TokenPayload(sub=1, jti="live"))
+    assert rows == [("live",)]
+    asyncio.run(worker.stop())
+    asyncio.run(other_worker.stop())
+
+
+def test_login_right_after_user_revocation(tmp_path):
+    """Test a token issued in the same second as a revocation stays valid."""
+    store = _store(tmp_path / "revocations.db")
+
+    async def run():
+        stale = TokenPayload(**key_ring.decode(create_access_token("1")[0]))
+        await store.revoke_user(1)
+        fresh = TokenPayload(**key_ring.decode(create_access_token("1")[0]))
+        return store.is_revoked(stale), store.is_revoked(fresh)
+
+    assert asyncio.run(run()) == (True, False)
+    asyncio.run(store.stop())
@@ -0,0 +1,24 @@
+"""Module to test token helpers."""
+
+from src.auth.security import (
+    create_access_token,
+    decode_token,
+    evict_token,
+    token_cache,
+)
+
+
+def test_decode_token_is_cached(mocker):
+    """Test a token is verified once and then served from the cache."""
+    token, _ = create_access_token("7")
+    spy = mocker.spy(token_cache, "set")
+
+    first = decode_token(token)
+    second = decode_token(token)
+
+    assert first.sub == second.sub == 7
+    assert spy.call_count == 1
+
+    evict_token(token)
+    decode_token(token)
+    assert spy.call_count == 2
@@ -0,0 +1,42 @@
+"""Module to test login session tracking."""
+
+import asyncio
+import time
+from uuid import uuid4
+
+from src.auth.revocation import RevocationStore
+from src.auth.sessions import add_session, end_sessions, list_sessions
+from src.users.schemas import TokenPayload
+
+
+def test_end_other_sessions(mocker, tmp_path):
+    """Test every session but the kept one is listed and revoked."""
+    revocation_store = RevocationStore(
+        path=str(tmp_path / "revocations.db"),
+        capacity=100,
+        error_rate=0.01,
+        refresh_interval=60,
+        user_ttl=3600,
+    )
+    mocker.patch("src.auth.sessions.revocation_store", revocation_store)
+    user_id = 1
+    expires_at = int(time.time()) + 60
+    jtis = [uuid4().hex for _ in range(3)]
+
+    async def run():
+        for jti in jtis:
+            await add_session(user_id, jti, expires_at)
+        listed = await list_sessions(user_id)
+        ended = await end_sessions(user_id, keep=jtis[0])
+        return listed, ended, await list_sessions(user_id)
+
+    listed, ended, remaining = asyncio.run(run())
+    assert listed == dict.fromkeys(jtis, expires_at)
+    assert ended == 2
+    assert remaining == {jtis[0]: expires_at}
+    revoked = [
+        revocation_store.is_revoked(TokenPayload(sub=user_id, jti=jti))
+        for jti in jtis
+    ]
+    assert revoked == [False, True, True]
+    asyncio.run(revocation_store.stop())
@@ -0,0 +1,37 @@
+"""Module to test failed login throttling."""
+
+import asyncio
+
+from src.common.exception.errors import CustomError
+
+
+def test_progressive_block(login_throttle):
+    """Test delays double past the free attempts up to the lockout."""
+    throttle = login_throttle
+    rule = throttle.account
+
+    delays = [throttle.block_for(rule, n) for n in range(1, 7)]
+
+    assert delays == [0, 0, 1, 2, 300, 300]
+
+
+def test_failures_block_account_and_ip(login_throttle):
+    """Test the account is blocked and a success clears it."""
+    throttle = login_throttle
+
+    async def run():
+        for _ in range(2):
+            await throttle.failure("Admin", "10.0.0.1")
+        await throttle.check("admin", "10.0.0.1")
+        await throttle.failure("admin ", "10.0.0.2")
+        blocked = []
+        for username, ip in [("admin", "10.0.0.3"), ("other", "10.0.0.1")]:
+            try:
+                await throttle.check(username, ip)
+            except CustomError as e:
+                blocked.append((e.code, e.data["retry_after"]))
+        await throttle.success("admin")
+        await throttle.check("admin", "10.0.0.3")
+        return blocked
+
+    assert asyncio.run(run()) == [(429, 1)]
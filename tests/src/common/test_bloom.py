@@ -0,0 +1,15 @@
+"""Module to test the Bloom filter."""
+
+from src.common.bloom import BloomFilter
+
+
+def test_bloom_membership():
+    """Test added items are always found and others rarely are."""
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"added-{i}")
+
+    assert all(f"added-{i}" in bloom for i in range(1000))
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
+    assert bloom.count == 1000
@@ -0,0 +1,87 @@
+"""Module to test the in-process cache."""
+
+from src.common.cache import IndexedTTLCache, TTLCache
+
+
+def test_lru_eviction():
+    """Test the least recently used entry is evicted first."""
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_entry_expiry(mocker):
+    """Test entries are dropped once their ttl has passed."""
+    clock = mocker.patch("src.common.cache.time.monotonic", return_value=100)
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("short", 1, ttl=5)
+    cache.set("long", 2, ttl=600)
+
+    clock.return_value = 110
+
+    assert cache.get("short") is None
+    assert cache.get("long") == 2
+    clock.return_value = 161
+    assert cache.get("long") is None
+
+
+def test_stats():
+    """Test hit and miss counters."""
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.get("a")
+    cache.get("b")
+
+    stats = cache.stats()
+
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["hit_ratio"] == 0.5
+
+
+def _indexed(**kwargs) -> IndexedTTLCache:
+    options = {"maxsize": 10, "ttl": 60, "max_bytes": 10_000, **kwargs}
+    return IndexedTTLCache(
+        keys=lambda value: (value[0], ("name", value[1])),
+        sizeof=lambda value: 100,
+        **options,
+    )
+
+
+def test_indexed_keys_share_one_entry():
+    """Test every key of an entry finds it and removing one drops them all."""
+    cache = _indexed()
+    cache.set((1, "alice"))
+    assert cache.get(1) == cache.get(("name", "alice")) == (1, "alice")
+
+    # A renamed value replaces the entry and its old key
+    cache.set((1, "alicia"))
+    assert cache.get(("name", "alice")) is None
+    assert cache.get(("name", "alicia")) == (1, "alicia")
+
+    cache.pop(("name", "alicia"))
+    assert cache.get(1) is None
+    assert len(cache) == 0
+    assert cache.stats()["bytes"] == 0
+
+
+def test_indexed_memory_budget():
+    """Test least recently used entries are evicted beyond the memory budget."""
+    cache = _indexed(max_bytes=250)
+    for id_ in (1, 2):
+        cache.set((id_, f"user{id_}"))
+    cache.get(1)
+    cache.set((3, "user3"))
+
+    assert cache.get(2) is None
+    assert cache.get(("name", "user2")) is None
+    assert cache.get(1) == (1, "user1")
+    stats = cache.stats()
+    assert (stats["size"], stats["bytes"], stats["evictions"]) == (2, 200, 1)
@@ -0,0 +1,229 @@
+"""Module to test the key-value store backends."""
+
+import asyncio
+import fnmatch
+import time
+
+import pytest
+
+from src.common.kv import KVError, MemoryStore, RESPStore, SQLiteStore
+from src.common.kv.resp import encode_command, read_reply
+
+
+class FakeRESPServer:
+    """Minimal in-process server for the commands the client sends."""
+
+    def __init__(self) -> None:
+        """Class initializer."""
+        self.data: dict[str, tuple[str, float | None]] = {}
+        self.batches: list[int] = []
+        self.server: asyncio.Server | None = None
+
+    @property
+    def port(self) -> int:
+        """Listening port."""
+        return self.server.sockets[0].getsockname()[1]
+
+    def _live(self, key):
+        item = self.data.get(key)
+        if item and item[1] is not None and item[1] <= time.monotonic():
+            del self.data[key]
+            return None
+        return item
+
+    def _reply(self, value) -> bytes:
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, bytes):
+            return value
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(map(self._reply, value))
+        data = value.encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    def _command(self, name, *args):
+        now = time.monotonic()
+        if name == "GET":
+            item = self._live(args[0])
+            return item[0] if item else None
+        if name == "SET":
+            key, value, *options = args
+            if "NX" in options and self._live(key):
+                return None
+            deadline = None
+            if "PX" in options:
+                deadline = now + int(options[options.index("PX") + 1]) / 1000
+            self.data[key] = (value, deadline)
+            return b"+OK\r\n"
+        if name == "DEL":
+            return sum(self.data.pop(k, None) is not None for k in args)
+        if name == "INCRBY":
+            value, deadline = self._live(args[0]) or ("0", None)
+            if not value.lstrip("-").isdigit():
+                return b"-ERR value is not an integer\r\n"
+            self.data[args[0]] = (str(int(value) + int(args[1])), deadline)
+            return int(value) + int(args[1])
+        if name == "PTTL":
+            item = self._live(args[0])
+            if item is None:
+                return -2
+            return -1 if item[1] is None else int((item[1] - now) * 1000)
+        if name == "PEXPIRE":
+            item = self._live(args[0])
+            if item is None:
+                return 0
+            self.data[args[0]] = (item[0], now + int(args[1]) / 1000)
+            return 1
+        if name == "SCAN":
+            # Pages of two keys to exercise the cursor
+            keys = sorted(
+                k
+                for k in list(self.data)
+                if fnmatch.fnmatchcase(k, args[2]) and self._live(k)
+            )
+            start = int(args[0])
+            cursor = start + 2 if start + 2 < len(keys) else 0
+            return [str(cursor), keys[start : start + 2]]
+        return b"-ERR unknown command\r\n"
+
+    async def _handle(self, reader, writer) -> None:
+        try:
+            while True:
+                request = await read_reply(reader)
+                replies = [self._reply(self._command(*request))]
+                # Replies to pipelined commands are sent together
+                while reader._buffer:  # noqa: SLF001
+                    request = await read_reply(reader)
+                    replies.append(self._reply(self._command(*request)))
+                self.batches.append(len(replies))
+                writer.write(b"".join(replies))
+                await writer.drain()
+        except (KVError, ConnectionError, asyncio.CancelledError):
+            writer.close()
+
+    async def __aenter__(self) -> "FakeRESPServer":
+        """Start listening on a free port."""
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        """Stop listening."""
+        self.server.close()
+
+
+def _run_with_store(backend, tmp_path, test):
+    """Run an async test against a fresh store of the given backend."""
+
+    async def run():
+        if backend == "resp":
+            async with FakeRESPServer() as server:
+                store = RESPStore(port=server.port, pool_size=2)
+                try:
+                    return await test(store)
+                finally:
+                    await store.close()
+        if backend == "sqlite":
+            store = SQLiteStore(str(tmp_path / "kv.db"))
+        else:
+            store = MemoryStore()
+        try:
+            return await test(store)
+        finally:
+            await store.close()
+
+    return asyncio.run(run())
+
+
+BACKENDS = ["memory", "sqlite", "resp"]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_basic_operations(backend, tmp_path):
+    """Test get, set, delete and prefix operations."""
+
+    async def test(store):
+        await store.set("token:1:a", "x")
+        await store.set("token:1:b", "y", ttl=60)
+        await store.set("token:2:a", "z")
+        await store.set("token:1*", "literal")
+        assert await store.get("token:1:a") == "x"
+        assert await store.get("missing") is None
+        assert sorted(await store.keys("token:1:")) == [
+            "token:1:a",
+            "token:1:b",
+        ]
+        assert await store.ttl("token:1:a") is None
+        assert 0 < await store.ttl("token:1:b") <= 60
+        assert await store.expire("token:1:a", 30)
+        assert not await store.expire("missing", 30)
+        assert await store.delete("token:2:a", "missing") == 1
+        assert await store.delete_prefix("token:1:") == 2
+        assert await store.keys("token:") == ["token:1*"]
+
+    _run_with_store(backend, tmp_path, test)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_expiry_and_counters(backend, tmp_path):
+    """Test keys expire and counters keep the expiry of their creation."""
+
+    async def test(store):
+        await store.set("short", "x", ttl=0.05)
+        assert await store.incr("counter", ttl=0.05) == 1
+        assert await store.incr("counter", 4, ttl=60) == 5
+        assert await store.ttl("counter") <= 0.05
+        await asyncio.sleep(0.1)
+        assert await store.get("short") is None
+        assert await store.incr("counter") == 1
+        await store.set("text", "x")
+        with pytest.raises(KVError, match="integer"):
+            await store.incr("text")
+
+    _run_with_store(backend, tmp_path, test)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_pipeline(backend, tmp_path):
+    """Test a pipeline returns one result per command in order."""
+
+    async def test(store):
+        pipe = store.pipeline()
+        pipe.set("a", "1").incr("a", 2).get("a").keys("a").delete_prefix("a")
+        pipe.get("a")
+        assert len(pipe) == 6
+        return await pipe.execute()
+
+    assert _run_with_store(backend, tmp_path, test) == [
+        None,
+        3,
+        "3",
+        ["a"],
+        1,
+        None,
+    ]
+
+
+def test_resp_pipeline_single_round_trip():
+    """Test a pipeline of plain commands is sent as one batch."""
+
+    async def run():
+        async with FakeRESPServer() as server:
+            store = RESPStore(port=server.port)
+            pipe = store.pipeline()
+            for i in range(50):
+                pipe.set(f"k{i}", str(i), ttl=60)
+            await pipe.execute()
+            await store.close()
+            return server.batches
+
+    assert asyncio.run(run()) == [50]
+
+
+def test_resp_encoding():
+    """Test commands are serialized as arrays of bulk strings."""
+    assert (
+        encode_command("GET", "clé")
+        == b"*2\r\n$3\r\nGET\r\n$4\r\ncl\xc3\xa9\r\n"
+    )
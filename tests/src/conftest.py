@@ -1,13 +1,18 @@
 """Fixture for test cases."""
 
+from pathlib import Path
+
 import pytest
 from starlette.testclient import TestClient
 
+from src.auth.throttle import LoginThrottle, ThrottleRule
+from src.common.kv import MemoryStore
 from src.db.session import get_db
 from src.main import app
 from src.users.model import User
 
 from tests.src.utils.db_mysql import override_get_db
+from tests.src.utils.db_sqlite import SQLiteDatabase
 
 app.dependency_overrides[get_db] = override_get_db
 
@@ -46,3 +51,34 @@ def admin_user() -> User:
     )
     admin_user.id = 3
     return admin_user
+
+
+@pytest.fixture
+def login_throttle() -> LoginThrottle:
+    """Create a login throttle with low limits.
+
+    Returns:
+        LoginThrottle: Throttle keeping its counters in memory
+    """
+    return LoginThrottle(
+        store=MemoryStore(),
+        window=60,
+        account=ThrottleRule("account", free_attempts=2, lockout_attempts=5),
+        ip=ThrottleRule("ip", free_attempts=3, lockout_attempts=10),
+        base_delay=1,
+        max_delay=8,
+        lockout=300,
+    )
+
+
+@pytest.fixture
+def sqlite_db(tmp_path: Path) -> SQLiteDatabase:
+    """Create a database file for the test.
+
+    Args:
+        tmp_path (Path): Temporary directory of the test
+
+    Returns:
+        SQLiteDatabase: Database with its engine and session factory
+    """
+    return SQLiteDatabase(tmp_path / "test.db")
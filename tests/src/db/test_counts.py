@@ -0,0 +1,89 @@
+"""Module to test the row count modes."""
+
+
+from sqlalchemy import func, insert, select, text
+
+from src.db.counts import RowCount
+from src.users.model import User
+from src.users.repository import UsersRepository
+from src.utils.timezone import timezone
+
+repository = UsersRepository()
+
+
+def _user(i: int) -> dict:
+    return {
+        "email": f"user{i}@example.com",
+        "username": f"user{i}",
+        "password": "hashed",
+        "first_name": "User",
+        "last_name": str(i),
+    }
+
+
+async def _counter(session) -> int | None:
+    return await session.scalar(
+        select(RowCount.row_count).where(RowCount.table_name == "users")
+    )
+
+
+def test_exact_count_follows_repository_writes(sqlite_db):
+    """Test the counter is seeded once and adjusted by inserts and deletes."""
+
+    async def scenario(session):
+        ids = await repository.save_many(session, [_user(i) for i in range(5)])
+        seeded = (await repository.count(session), await _counter(session))
+        await repository.delete_many(session, ids[:2] + [999])
+        await repository.delete(session, ids[2])
+        await repository.save_many(session, [_user(i) for i in range(5, 8)])
+        adjusted = (await repository.count(session), await _counter(session))
+        await repository.upsert_many(session, [_user(9)], key="username")
+        dropped = await _counter(session)
+        reseeded = await repository.count(session)
+        return seeded, adjusted, dropped, reseeded
+
+    seeded, adjusted, dropped, reseeded = sqlite_db.run_in_session(scenario)
+    assert seeded == (5, 5)
+    assert adjusted == (5, 5)
+    assert dropped is None
+    assert reseeded == 6
+
+
+def test_cached_and_estimated_counts(sqlite_db):
+    """Test snapshots serve stale counts and estimates read the statistics."""
+
+    async def scenario(session):
+        await repository.save_many(session, [_user(i) for i in range(4)])
+        first = await repository.count(session, "cached", max_age=60)
+        # Rows written behind the repository are not seen by the snapshot
+        now = timezone.now_utc()
+        await session.execute(
+            insert(User),
+            [
+                {**_user(i), "created_time": now, "join_time": now}
+                for i in range(4, 10)
+            ],
+        )
+        await session.commit()
+        stale = await repository.count(session, "cached", max_age=60)
+        await session.execute(text("ANALYZE"))
+        await session.commit()
+        estimated = await repository.count(session, "estimated")
+        return first, stale, estimated
+
+    first, stale, estimated = sqlite_db.run_in_session(scenario)
+    assert (first, stale) == (4, 4)
+    assert estimated == 10
+
+
+def test_seeding_leaves_the_session_transaction_alone(sqlite_db):
+    """Test seeding a counter does not commit pending work of the session."""
+
+    async def scenario(session):
+        session.add(User(**_user(1)))
+        count = await repository.count(session)
+        await session.rollback()
+        stored = await session.scalar(select(func.count()).select_from(User))
+        return count, stored
+
+    assert sqlite_db.run_in_session(scenario) == (0, 0)
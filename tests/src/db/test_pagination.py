@@ -0,0 +1,113 @@
+"""Module to test keyset pagination and signed cursors."""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from src.db.pagination import CursorCodec
+from src.users.model import User
+from src.users.repository import UsersCRUD
+
+START = datetime(2024, 1, 1)
+
+
+def _users() -> list[dict]:
+    """Users sharing join times, some of them never logged in."""
+    return [
+        {
+            "id": i,
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "first_name": "User",
+            "last_name": str(i),
+            "is_superuser": False,
+            "is_active": True,
+            "join_time": START + timedelta(days=i % 4),
+            "last_login_time": None
+            if i % 3 == 0
+            else START - timedelta(hours=i % 5),
+            "created_time": START,
+        }
+        for i in range(1, 24)
+    ]
+
+
+def _expected(sort: str, descending: bool) -> list[int]:
+    """Ids in page order, NULLs sorting first."""
+
+    def key(user):
+        value = user[sort]
+        return (value is not None, value or START, user["id"])
+
+    return [
+        user["id"] for user in sorted(_users(), key=key, reverse=descending)
+    ]
+
+
+def _walk(sqlite_db, sort: str, descending: bool):
+    """Read every page forwards, then backwards from the last one."""
+
+    async def run():
+        async with sqlite_db.engine.begin() as conn:
+            await conn.execute(insert(User.__table__), _users())
+        forward, backward = [], []
+        async with sqlite_db.session_factory() as session:
+            page = await UsersCRUD.paginate(
+                session, size=5, sort=sort, descending=descending
+            )
+            assert page.previous_key is None
+            forward.append([user.id for user in page.items])
+            while page.next_key is not None:
+                page = await UsersCRUD.paginate(
+                    session,
+                    size=5,
+                    sort=sort,
+                    descending=descending,
+                    after=page.next_key,
+                )
+                forward.append([user.id for user in page.items])
+            backward.append([user.id for user in page.items])
+            while page.previous_key is not None:
+                page = await UsersCRUD.paginate(
+                    session,
+                    size=5,
+                    sort=sort,
+                    descending=descending,
+                    before=page.previous_key,
+                )
+                backward.append([user.id for user in page.items])
+        return forward, backward
+
+    return sqlite_db.run(run)
+
+
+@pytest.mark.parametrize("descending", [False, True])
+@pytest.mark.parametrize("sort", ["id", "join_time", "last_login_time"])
+def test_keyset_pages_cover_every_row_once(sqlite_db, sort, descending):
+    """Test pages follow the sort order across ties and NULLs both ways."""
+    forward, backward = _walk(sqlite_db, sort, descending)
+    expected = _expected(sort, descending)
+    assert [id_ for page in forward for id_ in page] == expected
+    assert [len(page) for page in forward] == [5, 5, 5, 5, 3]
+    assert backward == list(reversed(forward))
+
+
+def test_cursor_roundtrip_and_tampering():
+    """Test cursors keep their key and reject edits or another secret."""
+    codec = CursorCodec("secret")
+    cursor = codec.encode(
+        {"s": "join_time", "d": True, "p": False, "k": (START, 7)}
+    )
+    assert codec.decode(cursor) == {
+        "s": "join_time",
+        "d": True,
+        "p": False,
+        "k": (START, 7),
+    }
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        codec.decode(cursor.replace("7", "8"))
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        CursorCodec("other").decode(cursor)
+    with pytest.raises(ValueError, match="Invalid cursor"):
+        codec.decode("garbage")
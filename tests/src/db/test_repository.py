@@ -0,0 +1,159 @@
+"""Module to test the bulk and streaming repository primitives."""
+
+from contextlib import aclosing
+
+from sqlalchemy import event, select
+
+from src.db.repository import BaseRepository
+from src.users.model import User
+
+repository = BaseRepository(User)
+
+
+def _user(i: int, **extra) -> dict:
+    return {
+        "email": f"user{i}@example.com",
+        "username": f"user{i}",
+        "password": "hashed",
+        "first_name": "User",
+        "last_name": str(i),
+        **extra,
+    }
+
+
+async def _users(session) -> list[tuple]:
+    result = await session.execute(
+        select(User.id, User.username, User.last_name, User.is_active).order_by(
+            User.id
+        )
+    )
+    return result.all()
+
+
+def test_save_many_returns_ids_and_applies_defaults(sqlite_db):
+    """Test chunked inserts fill model defaults and return ids in order."""
+
+    async def scenario(session):
+        ids = await repository.save_many(
+            session, [_user(i) for i in range(10)], chunk_size=3
+        )
+        users = (await session.scalars(select(User).order_by(User.id))).all()
+        return ids, users
+
+    ids, users = sqlite_db.run_in_session(scenario)
+    assert ids == [user.id for user in users]
+    assert [user.username for user in users] == [f"user{i}" for i in range(10)]
+    assert all(user.is_active and not user.is_superuser for user in users)
+    assert all(user.created_time and user.join_time for user in users)
+
+
+def test_upsert_many_updates_conflicting_rows(sqlite_db):
+    """Test rows conflicting on the key are updated instead of inserted."""
+
+    async def scenario(session):
+        first = await repository.save_many(session, [_user(1), _user(2)])
+        ids = await repository.upsert_many(
+            session,
+            [_user(2, last_name="changed"), _user(3)],
+            key="username",
+            chunk_size=1,
+        )
+        updated = (
+            await session.scalars(select(User).where(User.username == "user2"))
+        ).one()
+        return first, ids, updated, await _users(session)
+
+    first, ids, updated, users = sqlite_db.run_in_session(scenario)
+    assert ids[0] == first[1]
+    assert ids[1] not in first
+    assert updated.updated_time is not None
+    assert [(username, last_name) for _, username, last_name, _ in users] == [
+        ("user1", "1"),
+        ("user2", "changed"),
+        ("user3", "3"),
+    ]
+
+
+def test_update_and_delete_many(sqlite_db):
+    """Test batched updates and deletes report the affected rows."""
+
+    async def scenario(session):
+        ids = await repository.save_many(session, [_user(i) for i in range(5)])
+        updated = await repository.update_many(
+            session,
+            [{"id": id_, "is_active": False} for id_ in ids[:3]],
+            chunk_size=2,
+        )
+        renamed = await repository.update_many(
+            session,
+            [{"username": "user4", "last_name": "renamed"}],
+            key="username",
+        )
+        deleted = await repository.delete_many(
+            session, [ids[0], ids[1], 999], chunk_size=2
+        )
+        return ids, updated, renamed, deleted, await _users(session)
+
+    ids, updated, renamed, deleted, users = sqlite_db.run_in_session(scenario)
+    assert (updated, renamed, deleted) == (3, 1, 2)
+    assert users == [
+        (ids[2], "user2", "2", False),
+        (ids[3], "user3", "3", True),
+        (ids[4], "user4", "renamed", True),
+    ]
+
+
+def test_all_streams_instances_and_projections(sqlite_db):
+    """Test streamed reads in small batches, projected and stopped early."""
+
+    async def scenario(session):
+        ids = await repository.save_many(session, [_user(i) for i in range(7)])
+        users = [user async for user in repository._all(session, yield_per=2)]
+        rows = [
+            tuple(row)
+            async for row in repository._all(
+                session, yield_per=3, columns=("id", "username")
+            )
+        ]
+        async with aclosing(repository._all(session, yield_per=2)) as stream:
+            async for user in stream:
+                first = user
+                break
+        # The closed cursor does not block writes on the same session
+        deleted = await repository.delete_many(session, ids[:1])
+        return ids, users, rows, first, deleted
+
+    ids, users, rows, first, deleted = sqlite_db.run_in_session(scenario)
+    assert [user.id for user in users] == ids
+    assert rows == [(id_, f"user{i}") for i, id_ in enumerate(ids)]
+    assert first.id == ids[0]
+    assert deleted == 1
+
+
+def test_update_returns_row_in_one_statement(sqlite_db):
+    """Test updates return the row through RETURNING without reading it back."""
+    statements = []
+
+    async def scenario(session):
+        [id_] = await repository.save_many(session, [_user(1)])
+        loaded = await repository._get(session, "id", id_)
+        event.listen(
+            session.bind.sync_engine,
+            "before_cursor_execute",
+            lambda conn, cursor, statement, *args: statements.append(statement),
+        )
+        row = await repository._update(
+            session, "id", id_, {"last_name": "changed"}
+        )
+        missing = await repository._update(
+            session, "id", 999, {"last_name": "x"}
+        )
+        return row, missing, loaded.last_name
+
+    row, missing, loaded_last_name = sqlite_db.run_in_session(scenario)
+    assert row["last_name"] == "changed"
+    assert row["updated_time"] is not None
+    assert missing is None
+    assert loaded_last_name == "changed"
+    assert len(statements) == 2
+    assert all(statement.startswith("UPDATE") for statement in statements)
@@ -0,0 +1,148 @@
+"""Module to test the read/write split with SQLite files as replicas."""
+
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+
+from src.db.base import Base
+from src.db.counts import RowCount
+from src.db.repository import BaseRepository
+from src.db.session import create_routed_session
+from src.users.model import User
+
+repository = BaseRepository(User)
+
+
+def _user(id_: int, username: str) -> dict:
+    now = datetime(2024, 1, 1)
+    return {
+        "id": id_,
+        "email": f"{username}@example.com",
+        "username": username,
+        "first_name": "User",
+        "last_name": username,
+        "is_superuser": False,
+        "is_active": True,
+        "join_time": now,
+        "created_time": now,
+    }
+
+
+def _run_routed(tmp_path, scenario, window: float = 60):
+    """Run a scenario with a writer and two replicas holding distinct rows.
+
+    Replication is not simulated, so the database a row is read from tells
+    which engine served the read.
+    """
+    router, session_factory = create_routed_session(
+        f"sqlite+aiosqlite:///{tmp_path / 'writer.db'}",
+        [
+            f"sqlite+aiosqlite:///{tmp_path / 'reader1.db'}",
+            f"sqlite+aiosqlite:///{tmp_path / 'reader2.db'}",
+        ],
+        window,
+    )
+
+    async def run():
+        for engine, username in zip(
+            (router.writer, *router.readers), ("writer", "reader1", "reader2")
+        ):
+            async with engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+                await conn.execute(insert(User.__table__), [_user(1, username)])
+                # Replicated row counter, seeding it would write
+                await conn.execute(
+                    insert(RowCount.__table__),
+                    [
+                        {
+                            "table_name": "users",
+                            "row_count": 1,
+                            "created_time": datetime(2024, 1, 1),
+                        }
+                    ],
+                )
+        try:
+            return await scenario(session_factory)
+        finally:
+            await router.dispose()
+
+    return asyncio.run(run())
+
+
+async def _read_username(session) -> str:
+    return (await repository._get(session, "id", 1)).username
+
+
+def test_reads_are_spread_over_replicas(tmp_path):
+    """Test plain reads never reach the writer."""
+
+    async def scenario(session_factory):
+        usernames = []
+        for _ in range(4):
+            async with session_factory(info={"rw_key": "alice"}) as session:
+                usernames.append(await _read_username(session))
+                assert await repository.count(session) == 1
+        return usernames
+
+    assert _run_routed(tmp_path, scenario) == [
+        "reader1",
+        "reader2",
+        "reader1",
+        "reader2",
+    ]
+
+
+def test_writes_go_to_writer_and_are_read_back(tmp_path):
+    """Test a session reads from the writer once it wrote."""
+
+    async def scenario(session_factory):
+        async with session_factory(info={"rw_key": "alice"}) as session:
+            before = await _read_username(session)
+            payload = _user(2, "bob")
+            for generated in ("id", "join_time", "created_time"):
+                del payload[generated]
+            payload["password"] = "hashed"
+            await repository._save(session, payload)
+            after = await _read_username(session)
+            bob = await repository._get(session, "username", "bob")
+        return before, after, bob.id
+
+    assert _run_routed(tmp_path, scenario) == ("reader1", "writer", 2)
+
+
+def test_read_your_writes_window(tmp_path):
+    """Test a caller that wrote reads from the writer until the window ends."""
+
+    async def scenario(session_factory):
+        async with session_factory(info={"rw_key": "alice"}) as session:
+            await repository.delete(session, 5)
+        async with session_factory(info={"rw_key": "alice"}) as session:
+            alice = await _read_username(session)
+        async with session_factory(info={"rw_key": "bob"}) as session:
+            bob = await _read_username(session)
+        time.sleep(0.3)
+        async with session_factory(info={"rw_key": "alice"}) as session:
+            alice_later = await _read_username(session)
+        return alice, bob, alice_later
+
+    alice, bob, alice_later = _run_routed(tmp_path, scenario, window=0.2)
+    assert alice == "writer"
+    assert bob.startswith("reader")
+    assert alice_later.startswith("reader")
+
+
+def test_session_keeps_its_replica_and_dialect_checks_do_not_write(tmp_path):
+    """Test a session reads one replica and inspecting the dialect is no write."""
+
+    async def scenario(session_factory):
+        async with session_factory(info={"rw_key": "alice"}) as session:
+            names = [await _read_username(session) for _ in range(3)]
+            await repository.count(session, mode="estimated")
+            names.append(await _read_username(session))
+        async with session_factory(info={"rw_key": "alice"}) as session:
+            names.append(await _read_username(session))
+        return names
+
+    assert _run_routed(tmp_path, scenario) == ["reader1"] * 4 + ["reader2"]
@@ -0,0 +1,44 @@
+"""Module to test the prebuilt lookup statements."""
+
+from src.db.statements import statement_registry
+from src.users.repository import UsersRepository
+
+repository = UsersRepository()
+
+
+def test_lookups_reuse_statements_and_compiled_forms(sqlite_db):
+    """Test repeated lookups reuse one statement and hit the compiled cache."""
+
+    async def scenario(session):
+        await repository.save_many(
+            session,
+            [
+                {
+                    "email": f"user{i}@example.com",
+                    "username": f"user{i}",
+                    "password": "hashed",
+                    "first_name": "User",
+                    "last_name": str(i),
+                }
+                for i in range(3)
+            ],
+        )
+        before = statement_registry.stats()
+        users = [
+            await repository.get_user_by_email(
+                session, f"user{i}@example.com", projection="auth"
+            )
+            for i in (0, 1, 2, 5)
+        ]
+        return before, statement_registry.stats(), users
+
+    before, after, users = sqlite_db.run_in_session(scenario)
+    assert [user.username if user else None for user in users] == [
+        "user0",
+        "user1",
+        "user2",
+        None,
+    ]
+    assert after["reuses"] - before["reuses"] >= 3
+    assert after["cache_hits"] - before["cache_hits"] >= 3
+    assert after["statements"] >= 1
@@ -0,0 +1,193 @@
+"""Module to test the unit of work."""
+
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+
+from src.db.pool import pool_monitor
+from src.db.transaction import (
+    RolledBackError,
+    on_commit,
+    transaction,
+    transaction_stats,
+    unit_of_work,
+)
+from src.users.model import User
+from src.users.repository import UsersRepository
+from src.users.schemas import UserCreateOpen
+
+repository = UsersRepository()
+
+
+def _user(name: str) -> dict:
+    return {
+        "email": f"{name}@example.com",
+        "username": name,
+        "password": "hashed",
+        "first_name": "User",
+        "last_name": name,
+    }
+
+
+def _run(sqlite_db, scenario):
+    async def run():
+        async with sqlite_db.session_factory() as session:
+            result = await scenario(session)
+        async with sqlite_db.session_factory() as session:
+            names = await session.scalars(
+                select(User.username).order_by(User.username)
+            )
+            return result, list(names)
+
+    return sqlite_db.run(run)
+
+
+def test_repository_commits_are_deferred(sqlite_db):
+    """Test the writes of a unit of work are committed once."""
+
+    async def scenario(session):
+        async with unit_of_work(session):
+            await repository._save(session, _user("alice"))
+            async with unit_of_work(session):
+                await repository._save(session, _user("bob"))
+        return transaction_stats(session)
+
+    stats, names = _run(sqlite_db, scenario)
+
+    assert names == ["alice", "bob"]
+    assert stats.commits == 1
+    assert stats.deferred_commits == 2
+
+
+def test_error_rolls_back_every_write(sqlite_db):
+    """Test a failing unit of work keeps none of its writes."""
+
+    async def register(session):
+        async with unit_of_work(session):
+            await repository._save(session, _user("alice"))
+            await repository._save(session, _user("bob"))
+            raise RuntimeError("failed")
+
+    async def scenario(session):
+        with pytest.raises(RuntimeError, match="failed"):
+            await register(session)
+        return transaction_stats(session)
+
+    stats, names = _run(sqlite_db, scenario)
+
+    assert names == []
+    assert (stats.commits, stats.rollbacks) == (0, 1)
+
+
+def test_failed_savepoint_keeps_other_writes(sqlite_db):
+    """Test a duplicate in a batch only undoes its own savepoint."""
+
+    async def scenario(session):
+        skipped = []
+        async with unit_of_work(session) as uow:
+            for name in ["alice", "bob", "alice", "carol"]:
+                try:
+                    async with uow.savepoint():
+                        await repository.create(
+                            session, UserCreateOpen(**_user(name))
+                        )
+                except IntegrityError:
+                    skipped.append(name)
+        return skipped, transaction_stats(session)
+
+    (skipped, stats), names = _run(sqlite_db, scenario)
+
+    assert skipped == ["alice"]
+    assert names == ["alice", "bob", "carol"]
+    assert (stats.savepoints, stats.savepoint_rollbacks) == (4, 1)
+    assert stats.commits == 1
+
+
+def test_transaction_decorator_needs_session():
+    """Test the decorator rejects endpoints without a session."""
+
+    @transaction
+    async def endpoint(value: int) -> int:
+        return value
+
+    with pytest.raises(TypeError, match="no database session"):
+        asyncio.run(endpoint(1))
+
+
+def test_release_returns_connection_after_reads(sqlite_db):
+    """Test a session holds no connection until read and frees it on release."""
+
+    async def scenario(session):
+        await repository._save(session, _user("alice"))
+        await session.close()
+        checkouts, in_use = pool_monitor.checkouts, pool_monitor.in_use
+        async with unit_of_work(session):
+            unused = pool_monitor.checkouts - checkouts
+            user = await repository.get_by_username(session, "alice")
+            held = pool_monitor.in_use - in_use
+            await session.release()
+            released = pool_monitor.in_use - in_use
+            await repository._save(session, _user("bob"))
+            await session.release()
+            kept = pool_monitor.in_use - in_use
+        return (unused, held, released, kept), user.username
+
+    (usage, username), names = _run(sqlite_db, scenario)
+
+    assert usage == (0, 1, 0, 1)
+    assert username == "alice"
+    assert names == ["alice", "bob"]
+
+
+def test_on_commit_waits_for_the_final_commit(sqlite_db):
+    """Test callbacks run after the commit and are dropped on rollback."""
+    calls = []
+
+    async def duplicate(session, uow):
+        async with uow.savepoint():
+            on_commit(session, lambda: calls.append("rolled back"))
+            await repository._save(session, _user("alice"))
+            await repository._save(session, _user("alice"))
+
+    async def failed(session):
+        async with unit_of_work(session):
+            on_commit(session, lambda: calls.append("failed"))
+            raise RuntimeError("failed")
+
+    async def scenario(session):
+        async with unit_of_work(session) as uow:
+            on_commit(session, lambda: calls.append("unit"))
+            async with uow.savepoint():
+                on_commit(session, lambda: calls.append("released"))
+            with pytest.raises(IntegrityError, match="UNIQUE"):
+                await duplicate(session, uow)
+            pending = list(calls)
+        with pytest.raises(RuntimeError, match="failed"):
+            await failed(session)
+        return pending
+
+    pending, names = _run(sqlite_db, scenario)
+
+    assert pending == []
+    assert calls == ["unit", "released"]
+    assert names == []
+
+
+def test_full_rollback_fails_the_unit(sqlite_db):
+    """Test a unit rolled back from inside refuses to commit later writes."""
+
+    async def rolled_back(session):
+        async with unit_of_work(session):
+            await repository._save(session, _user("alice"))
+            await session.rollback()
+            await repository._save(session, _user("bob"))
+
+    async def scenario(session):
+        with pytest.raises(RolledBackError, match="rolled back"):
+            await rolled_back(session)
+
+    _, names = _run(sqlite_db, scenario)
+
+    assert names == []
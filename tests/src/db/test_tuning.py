@@ -0,0 +1,42 @@
+"""Module to test the database tuning profiles."""
+
+import asyncio
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, StaticPool
+
+from src.db.session import create_engine_and_session
+from src.db.tuning import PROFILES, tuning_report
+
+
+def test_file_sqlite_gets_pool_and_pragmas(sqlite_db):
+    """Test every pooled connection runs with the profile pragmas."""
+    sqlite_db.tune("balanced")
+
+    report = sqlite_db.run(lambda: tuning_report(sqlite_db.engine, "balanced"))
+    profile = PROFILES["balanced"]
+    assert isinstance(sqlite_db.engine.pool, AsyncAdaptedQueuePool)
+    assert report["pool_size"] == profile.pool_size
+    assert report["max_overflow"] == profile.max_overflow
+    assert report["pool_pre_ping"] is True
+    assert report["journal_mode"] == "wal"
+    # NORMAL and MEMORY
+    assert report["synchronous"] == 1
+    assert report["temp_store"] == 2
+    assert report["cache_size"] == profile.cache_size
+    assert report["mmap_size"] == profile.mmap_size
+    assert report["busy_timeout"] == profile.busy_timeout
+
+
+def test_memory_sqlite_keeps_static_pool():
+    """Test in-memory databases keep their single shared connection."""
+    engine, _ = create_engine_and_session("sqlite+aiosqlite:///", "safe")
+
+    async def run():
+        report = await tuning_report(engine, "safe")
+        await engine.dispose()
+        return report
+
+    report = asyncio.run(run())
+    assert isinstance(engine.pool, StaticPool)
+    assert report["synchronous"] == 2
+    assert report["busy_timeout"] == PROFILES["safe"].busy_timeout
@@ -0,0 +1,358 @@
+"""Module to test the email outbox dispatcher against a local SMTP server."""
+
+import asyncio
+import smtplib
+from datetime import timedelta
+
+from sqlalchemy import select, update
+
+from src.mail.model import EmailOutbox
+from src.mail.outbox import EmailOutboxDispatcher, is_permanent
+from src.mail.smtp import SMTPPool
+from src.utils.timezone import timezone
+
+
+class FakeSMTPServer:
+    """Minimal SMTP server recording delivered messages.
+
+    ``failures`` maps a recipient to the replies given to its ``RCPT``
+    commands, one per attempt, before it is accepted.
+    """
+
+    def __init__(self) -> None:
+        """Class initializer."""
+        self.messages: list[tuple[str, str]] = []
+        self.connections = 0
+        self.failures: dict[str, list[str]] = {}
+        self._server: asyncio.base_events.Server | None = None
+
+    @property
+    def port(self) -> int:
+        """Listening port."""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.connections += 1
+        writer.write(b"220 localhost fake ESMTP\r\n")
+        recipients: list[str] = []
+        while line := await reader.readline():
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                writer.write(b"250 localhost\r\n")
+            elif verb == "MAIL":
+                recipients = []
+                writer.write(b"250 OK\r\n")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                replies = self.failures.get(address)
+                if replies:
+                    writer.write(f"{replies.pop(0)}\r\n".encode())
+                else:
+                    recipients.append(address)
+                    writer.write(b"250 OK\r\n")
+            elif verb == "DATA":
+                if not recipients:
+                    writer.write(b"503 No valid recipients\r\n")
+                    continue
+                writer.write(b"354 End data with <CR><LF>.<CR><LF>\r\n")
+                await writer.drain()
+                data = []
+                while (chunk := await reader.readline()) != b".\r\n":
+                    data.append(chunk.decode())
+                for recipient in recipients:
+                    self.messages.append((recipient, "".join(data)))
+                writer.write(b"250 OK queued\r\n")
+            elif verb in ("RSET", "NOOP"):
+                writer.write(b"250 OK\r\n")
+            elif verb == "QUIT":
+                writer.write(b"221 Bye\r\n")
+                await writer.drain()
+                break
+            else:
+                writer.write(b"502 Command not implemented\r\n")
+            await writer.drain()
+        writer.close()
+
+    async def start(self) -> None:
+        """Listen on a free local port."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        """Stop listening."""
+        self._server.close()
+
+
+def _dispatcher(session_factory, port: int, **kwargs) -> EmailOutboxDispatcher:
+    options = {
+        "batch_size": 50,
+        "poll_interval": 60,
+        "max_attempts": 3,
+        "backoff": 30,
+        "backoff_max": 600,
+        "lease": 120,
+        "retention": timedelta(days=7),
+        **kwargs,
+    }
+    return EmailOutboxDispatcher(
+        session_factory,
+        SMTPPool("127.0.0.1", port, size=2),
+        sender=("Users management", "noreply@example.com"),
+        **options,
+    )
+
+
+def _run_with_outbox(sqlite_db, scenario):
+    """Run a scenario with a fresh outbox database and SMTP server."""
+    server = FakeSMTPServer()
+
+    async def run():
+        await server.start()
+        try:
+            return await scenario(sqlite_db.session_factory, server)
+        finally:
+            await server.stop()
+
+    return sqlite_db.run(run), server
+
+
+async def _rows(session_factory) -> list[EmailOutbox]:
+    async with session_factory() as session:
+        result = await session.scalars(
+            select(EmailOutbox).order_by(EmailOutbox.id)
+        )
+        return list(result)
+
+
+async def _make_due(session_factory) -> None:
+    async with session_factory() as session, session.begin():
+        await session.execute(
+            update(EmailOutbox).values(
+                next_attempt_at=timezone.now_utc() - timedelta(seconds=1)
+            )
+        )
+
+
+def test_enqueued_emails_are_sent_over_reused_connections(sqlite_db):
+    """Test a batch is delivered without a connection per message."""
+
+    async def scenario(session_factory, server):
+        dispatcher = _dispatcher(session_factory, server.port)
+        async with session_factory() as session:
+            for i in range(10):
+                await dispatcher.enqueue(
+                    session,
+                    email_to=f"user{i}@example.com",
+                    subject=f"Welcome {i}",
+                    html=f"<p>Hello {i}</p>",
+                )
+        sent = await dispatcher.run_once()
+        again = await dispatcher.run_once()
+        opened = dispatcher.pool.connections_opened
+        await dispatcher.stop()
+        return sent, again, opened, await _rows(session_factory)
+
+    (sent, again, opened, rows), server = _run_with_outbox(sqlite_db, scenario)
+    assert sent == 10
+    assert again == 0
+    assert opened <= 2
+    assert server.connections == opened
+    assert sorted(recipient for recipient, _ in server.messages) == sorted(
+        f"user{i}@example.com" for i in range(10)
+    )
+    assert "Subject: Welcome 0" in dict(server.messages)["user0@example.com"]
+    assert all(row.status == "sent" and row.attempts == 1 for row in rows)
+    assert all(row.sent_at is not None for row in rows)
+    assert all(row.html == "" for row in rows)
+
+
+def test_transient_failure_is_retried_with_backoff(sqlite_db):
+    """Test a 4xx reply postpones the message instead of losing it."""
+
+    async def scenario(session_factory, server):
+        server.failures["busy@example.com"] = ["451 Try again later"] * 2
+        dispatcher = _dispatcher(session_factory, server.port)
+        async with session_factory() as session:
+            await dispatcher.enqueue(
+                session, email_to="busy@example.com", subject="Hi", html="<p/>"
+            )
+        first_at = timezone.now_utc()
+        await dispatcher.run_once()
+        first = (await _rows(session_factory))[0]
+        # Not due yet
+        skipped = await dispatcher.run_once()
+        await _make_due(session_factory)
+        second_at = timezone.now_utc()
+        await dispatcher.run_once()
+        second = (await _rows(session_factory))[0]
+        await _make_due(session_factory)
+        await dispatcher.run_once()
+        await dispatcher.stop()
+        delays = (
+            first.next_attempt_at - first_at.replace(tzinfo=None),
+            second.next_attempt_at - second_at.replace(tzinfo=None),
+        )
+        return first, skipped, second, delays, (await _rows(session_factory))[0]
+
+    (first, skipped, second, delays, final), server = _run_with_outbox(
+        sqlite_db, scenario
+    )
+    assert first.status == "pending"
+    assert first.attempts == 1
+    assert "451" in first.last_error
+    assert first.html == "<p/>"
+    assert skipped == 0
+    assert second.status == "pending"
+    assert second.attempts == 2
+    # The delay doubles per attempt, within the jitter
+    assert timedelta(seconds=24) <= delays[0] <= timedelta(seconds=37)
+    assert timedelta(seconds=48) <= delays[1] <= timedelta(seconds=73)
+    assert final.status == "sent"
+    assert final.attempts == 3
+    assert final.html == ""
+    assert [recipient for recipient, _ in server.messages] == [
+        "busy@example.com"
+    ]
+
+
+def test_permanent_failure_and_exhausted_attempts_are_dead_lettered(sqlite_db):
+    """Test 5xx rejections and repeated failures stop being retried."""
+
+    async def scenario(session_factory, server):
+        server.failures["unknown@example.com"] = ["550 No such user"]
+        server.failures["flaky@example.com"] = ["421 Service not available"] * 5
+        dispatcher = _dispatcher(session_factory, server.port, max_attempts=2)
+        async with session_factory() as session:
+            for address in ("unknown@example.com", "flaky@example.com"):
+                await dispatcher.enqueue(
+                    session, email_to=address, subject="Hi", html="<p/>"
+                )
+        await dispatcher.run_once()
+        await _make_due(session_factory)
+        await dispatcher.run_once()
+        await _make_due(session_factory)
+        leftover = await dispatcher.run_once()
+        await dispatcher.stop()
+        return leftover, await _rows(session_factory)
+
+    (leftover, (unknown, flaky)), server = _run_with_outbox(sqlite_db, scenario)
+    assert leftover == 0
+    assert (unknown.status, unknown.attempts) == ("dead", 1)
+    assert "550" in unknown.last_error
+    assert (flaky.status, flaky.attempts) == ("dead", 2)
+    assert "421" in flaky.last_error
+    assert unknown.html == flaky.html == ""
+    assert server.messages == []
+
+
+def test_dispatcher_wakes_up_on_enqueue(sqlite_db):
+    """Test the background dispatcher sends without waiting for a poll."""
+
+    async def scenario(session_factory, server):
+        dispatcher = _dispatcher(session_factory, server.port)
+        await dispatcher.start()
+        async with session_factory() as session:
+            await dispatcher.enqueue(
+                session, email_to="fast@example.com", subject="Hi", html="<p/>"
+            )
+        for _ in range(100):
+            if server.messages:
+                break
+            await asyncio.sleep(0.02)
+        await dispatcher.stop()
+        return await _rows(session_factory)
+
+    (row,), server = _run_with_outbox(sqlite_db, scenario)
+    assert row.status == "sent"
+    assert [recipient for recipient, _ in server.messages] == [
+        "fast@example.com"
+    ]
+
+
+def test_claim_without_returning(mocker, sqlite_db):
+    """Test batches are claimed on dialects without UPDATE RETURNING."""
+    mocker.patch.object(sqlite_db.engine.dialect, "update_returning", False)
+
+    async def scenario(session_factory, server):
+        dispatcher = _dispatcher(session_factory, server.port, batch_size=2)
+        async with session_factory() as session:
+            for i in range(3):
+                await dispatcher.enqueue(
+                    session,
+                    email_to=f"user{i}@example.com",
+                    subject="Hi",
+                    html="<p/>",
+                )
+        sent = [await dispatcher.run_once(), await dispatcher.run_once()]
+        await dispatcher.stop()
+        return sent, await _rows(session_factory)
+
+    (sent, rows), server = _run_with_outbox(sqlite_db, scenario)
+    assert sent == [2, 1]
+    assert all(row.status == "sent" and row.attempts == 1 for row in rows)
+    assert len(server.messages) == 3
+
+
+def test_dispatcher_survives_unexpected_errors(sqlite_db):
+    """Test a failed batch or a message that cannot be built stop nothing."""
+
+    async def scenario(session_factory, server):
+        dispatcher = _dispatcher(
+            session_factory, server.port, poll_interval=0.05
+        )
+        run_once = dispatcher.run_once
+        calls = []
+
+        async def failing_once():
+            calls.append(len(calls))
+            if len(calls) == 1:
+                raise RuntimeError("failed")
+            return await run_once()
+
+        dispatcher.run_once = failing_once
+        await dispatcher.start()
+        async with session_factory() as session:
+            await dispatcher.enqueue(
+                session,
+                email_to="evil@example.com",
+                subject="Hi\r\nBcc: spam@example.com",
+                html="<p/>",
+            )
+            await dispatcher.enqueue(
+                session, email_to="fine@example.com", subject="Hi", html="<p/>"
+            )
+        for _ in range(100):
+            rows = await _rows(session_factory)
+            if all(row.status != "pending" for row in rows):
+                break
+            await asyncio.sleep(0.02)
+        await dispatcher.stop()
+        return len(calls), rows
+
+    (calls, (evil, fine)), server = _run_with_outbox(sqlite_db, scenario)
+    assert calls > 1
+    assert (evil.status, evil.attempts) == ("dead", 1)
+    assert "ValueError" in evil.last_error
+    assert fine.status == "sent"
+    assert [recipient for recipient, _ in server.messages] == [
+        "fine@example.com"
+    ]
+
+
+def test_is_permanent():
+    """Test only 5xx replies are permanent."""
+    assert is_permanent(smtplib.SMTPResponseException(550, b"No such user"))
+    assert not is_permanent(smtplib.SMTPResponseException(451, b"Later"))
+    assert not is_permanent(smtplib.SMTPServerDisconnected("closed"))
+    assert not is_permanent(ConnectionResetError())
+    assert is_permanent(ValueError("Header values may not contain linefeed"))
+    assert is_permanent(
+        smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"No")})
+    )
+    assert not is_permanent(
+        smtplib.SMTPRecipientsRefused(
+            {"a@example.com": (550, b"No"), "b@example.com": (452, b"Full")}
+        )
+    )
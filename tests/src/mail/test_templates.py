@@ -0,0 +1,50 @@
+"""Module to test the compiled email template registry."""
+
+import os
+
+from src.mail.templates import TemplateRegistry
+
+
+def _write(path, content: str, mtime: int) -> None:
+    path.write_text(content)
+    os.utime(path, (mtime, mtime))
+
+
+def test_load_compiles_templates_once(tmp_path, monkeypatch):
+    """Test rendering after load does not read template files."""
+    _write(tmp_path / "welcome.html", "<p>Hi {{ username }}</p>", 1_000)
+    _write(tmp_path / "bye.html", "<p>Bye {{ username }}</p>", 1_000)
+    registry = TemplateRegistry(str(tmp_path), auto_reload=False)
+    assert registry.load() == 2
+
+    def no_read(*args, **kwargs):
+        raise AssertionError("template read from disk")
+
+    monkeypatch.setattr(registry.env.loader, "get_source", no_read)
+    for i in range(3):
+        assert (
+            registry.render("welcome.html", {"username": i}) == f"<p>Hi {i}</p>"
+        )
+    stats = registry.stats()
+    assert list(stats) == ["welcome.html"]
+    assert stats["welcome.html"]["renders"] == 3
+    assert stats["welcome.html"]["max_ms"] >= stats["welcome.html"]["mean_ms"]
+
+
+def test_auto_reload_follows_file_changes(tmp_path):
+    """Test edited templates are recompiled only with auto reload."""
+    path = tmp_path / "welcome.html"
+    _write(path, "old {{ name }}", 1_000)
+    dev = TemplateRegistry(str(tmp_path), auto_reload=True)
+    prod = TemplateRegistry(str(tmp_path), auto_reload=False)
+    dev.load()
+    prod.load()
+    _write(path, "new {{ name }}", 2_000)
+    assert dev.render("welcome.html", {"name": "x"}) == "new x"
+    assert prod.render("welcome.html", {"name": "x"}) == "old x"
+
+
+def test_load_without_directory(tmp_path):
+    """Test a missing templates directory does not prevent startup."""
+    registry = TemplateRegistry(str(tmp_path / "missing"), auto_reload=False)
+    assert registry.load() == 0
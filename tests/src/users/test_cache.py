@@ -0,0 +1,91 @@
+"""Module to test the read-through user snapshot cache."""
+
+import pytest
+from sqlalchemy import event
+
+from src.db.transaction import unit_of_work
+from src.users.cache import current_user_cache
+from src.users.repository import UsersRepository
+from src.users.schemas import UserUpdate
+
+repository = UsersRepository()
+
+
+def test_snapshots_are_shared_by_keys_and_invalidated(sqlite_db):
+    """Test any key hits the snapshot and user writes drop it."""
+    statements = []
+    event.listen(
+        sqlite_db.engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    current_user_cache.clear()
+
+    async def run():
+        async with sqlite_db.session_factory() as session:
+            user = await repository._save(
+                session,
+                {
+                    "email": "alice@example.com",
+                    "username": "alice",
+                    "password": "hashed",
+                    "first_name": "Alice",
+                    "last_name": "Doe",
+                },
+            )
+        async with sqlite_db.session_factory() as session:
+            statements.clear()
+            by_name = await repository.get_cached(session, username="alice")
+            by_id = await repository.get_cached(session, user.id)
+            by_email = await repository.get_cached(
+                session, email="alice@example.com"
+            )
+            reads = len(statements)
+            updated = await repository.update(
+                session,
+                UserUpdate(id=user.id, first_name="Alicia", roles=[]),
+            )
+            cached = await repository.get_cached(session, username="alice")
+            await repository.delete(session, user.id)
+            gone = await repository.get_cached(session, username="alice")
+        return by_name, by_id, by_email, reads, updated, cached, gone
+
+    by_name, by_id, by_email, reads, updated, cached, gone = sqlite_db.run(run)
+    assert by_name is by_id is by_email
+    assert by_name.username == "alice"
+    assert reads == 1
+    # The row returned by the update replaces the snapshot
+    assert updated.first_name == "Alicia"
+    assert cached is updated
+    assert gone is None
+
+
+def test_rolled_back_update_is_not_cached(sqlite_db):
+    """Test the snapshot of an update waits for the commit of its unit."""
+    current_user_cache.clear()
+
+    async def update_then_fail(session, user_id):
+        async with unit_of_work(session):
+            await repository.update(
+                session, UserUpdate(id=user_id, first_name="Alicia", roles=[])
+            )
+            raise RuntimeError("failed")
+
+    async def run():
+        async with sqlite_db.session_factory() as session:
+            user = await repository._save(
+                session,
+                {
+                    "email": "alice@example.com",
+                    "username": "alice",
+                    "password": "hashed",
+                    "first_name": "Alice",
+                    "last_name": "Doe",
+                },
+            )
+        async with sqlite_db.session_factory() as session:
+            with pytest.raises(RuntimeError, match="failed"):
+                await update_then_fail(session, user.id)
+            return await repository.get_cached(session, user.id)
+
+    assert sqlite_db.run(run).first_name == "Alice"
@@ -0,0 +1,111 @@
+"""Module to test the login time write-behind buffer."""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+
+from src.users.cache import current_user_cache
+from src.users.login_time import LoginTimeBuffer
+from src.users.model import User
+from src.users.repository import UsersRepository
+
+
+def test_flush_coalesces_logins(sqlite_db):
+    """Test logins are written in one batch keeping the latest time."""
+    buffer = LoginTimeBuffer(
+        sqlite_db.session_factory, interval=60, max_entries=100
+    )
+    now = datetime(2024, 1, 1, 12, 0)
+
+    async def run():
+        async with sqlite_db.engine.begin() as conn:
+            await conn.execute(
+                insert(User.__table__),
+                [
+                    {
+                        "id": i,
+                        "email": f"user{i}@example.com",
+                        "username": f"user{i}",
+                        "first_name": "User",
+                        "last_name": str(i),
+                        "is_superuser": False,
+                        "is_active": True,
+                        "join_time": now,
+                        "created_time": now,
+                    }
+                    for i in (1, 2, 3)
+                ],
+            )
+        buffer.record(1, now)
+        buffer.record(1, now + timedelta(minutes=5))
+        buffer.record(1, now + timedelta(minutes=1))
+        buffer.record(2, now)
+        written = await buffer.flush()
+        async with sqlite_db.session_factory() as session:
+            rows = await session.execute(
+                select(User.id, User.last_login_time).order_by(User.id)
+            )
+        return written, rows.all()
+
+    written, rows = sqlite_db.run(run)
+    assert written == 2
+    assert rows == [(1, now + timedelta(minutes=5)), (2, now), (3, None)]
+    assert buffer.stats() == {
+        "pending": 0,
+        "recorded": 4,
+        "written": 2,
+        "coalesced": 2,
+        "flushes": 1,
+        "failures": 0,
+    }
+
+
+def test_failed_flush_keeps_entries(sqlite_db):
+    """Test entries are kept for the next flush when the write fails."""
+    buffer = LoginTimeBuffer(
+        sqlite_db.session_factory, interval=60, max_entries=100
+    )
+    buffer.record(1, datetime(2024, 1, 1))
+
+    async def run():
+        # No tables were created
+        written = await buffer.flush()
+        await sqlite_db.engine.dispose()
+        return written
+
+    assert asyncio.run(run()) == 0
+    assert buffer.stats()["pending"] == 1
+    assert buffer.failures == 1
+
+
+def test_snapshots_show_buffered_login_time(mocker, sqlite_db):
+    """Test user snapshots include login times not written yet."""
+    buffer = LoginTimeBuffer(
+        sqlite_db.session_factory, interval=60, max_entries=100
+    )
+    mocker.patch("src.users.repository.login_time_buffer", buffer)
+    current_user_cache.clear()
+    repository = UsersRepository()
+
+    async def scenario(session):
+        user = await repository._save(
+            session,
+            {
+                "email": "alice@example.com",
+                "username": "alice",
+                "password": "hashed",
+                "first_name": "Alice",
+                "last_name": "Doe",
+            },
+        )
+        await repository.update_login_time(session, user)
+        loaded = await repository.get_cached(session, user.id)
+        await repository.update_login_time(session, user)
+        cached = await repository.get_cached(session, user.id)
+        return loaded, cached, buffer.pending_time(user.id)
+
+    loaded, cached, latest = sqlite_db.run_in_session(scenario)
+    assert loaded.last_login_time is not None
+    assert cached.last_login_time == latest
+    assert latest > loaded.last_login_time
@@ -0,0 +1,79 @@
+"""Module to test the loader options of user reads."""
+
+from sqlalchemy import event
+from sqlalchemy.exc import InvalidRequestError
+
+from src.users.repository import UsersRepository
+
+repository = UsersRepository()
+
+
+def _unloaded(user) -> set[str]:
+    """Attributes refusing to load on access."""
+    unloaded = set()
+    for name in ("password", "roles"):
+        try:
+            getattr(user, name)
+        except InvalidRequestError:
+            unloaded.add(name)
+    return unloaded
+
+
+def test_projections_issue_one_narrow_query(sqlite_db):
+    """Test login and current user reads skip roles and unused columns."""
+    statements = []
+    event.listen(
+        sqlite_db.engine.sync_engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+
+    async def run():
+        async with sqlite_db.session_factory() as session:
+            [id_] = await repository.save_many(
+                session,
+                [
+                    {
+                        "email": "alice@example.com",
+                        "username": "alice",
+                        "password": "hashed",
+                        "first_name": "Alice",
+                        "last_name": "Doe",
+                    }
+                ],
+            )
+        reads = {}
+        for name in ("auth", "profile", "admin"):
+            async with sqlite_db.session_factory() as session:
+                statements.clear()
+                user = await repository.get_by_username(
+                    session, "alice", projection=name
+                )
+                reads[name] = (user, list(statements), _unloaded(user))
+        async with sqlite_db.session_factory() as session:
+            statements.clear()
+            user = await repository.get(session, id_, projection="profile")
+            reads["get"] = (user, list(statements), _unloaded(user))
+        return reads
+
+    reads = sqlite_db.run(run)
+
+    auth, [query], unloaded = reads["auth"]
+    assert auth.password == "hashed"
+    assert "first_name" not in query
+    assert "user_role" not in query
+    assert unloaded == {"roles"}
+
+    profile, [query], unloaded = reads["profile"]
+    assert profile.first_name == "Alice"
+    assert "password" not in query
+    assert unloaded == {"password", "roles"}
+
+    admin, queries, unloaded = reads["admin"]
+    assert admin.roles == []
+    assert len(queries) == 2
+    assert unloaded == {"password"}
+
+    user, [query], unloaded = reads["get"]
+    assert user.username == "alice"
+    assert unloaded == {"password", "roles"}
@@ -0,0 +1,41 @@
+"""Module to test user registration against the unique indexes."""
+
+from src.common.exception import errors
+from src.users.schemas import UserCreateOpen
+from src.users.service import user_service
+
+
+def _signup(username: str, email: str) -> UserCreateOpen:
+    return UserCreateOpen(
+        username=username,
+        email=email,
+        password="abcd1234",
+        first_name="User",
+        last_name="Name",
+    )
+
+
+def test_register_maps_unique_violations(sqlite_db):
+    """Test duplicates are rejected by the insert with the usual messages."""
+
+    async def attempt(session, signup) -> str:
+        try:
+            user = await user_service.register(user_data=signup, db=session)
+        except errors.RequestError as e:
+            return e.msg
+        return user.username
+
+    async def scenario(session):
+        return [
+            await attempt(session, _signup("alice", "a@example.com")),
+            await attempt(session, _signup("alice", "b@example.com")),
+            await attempt(session, _signup("bob", "a@example.com")),
+            await attempt(session, _signup("bob", "b@example.com")),
+        ]
+
+    assert sqlite_db.run_in_session(scenario) == [
+        "alice",
+        "This username is already registered",
+        "The email has been registered",
+        "bob",
+    ]
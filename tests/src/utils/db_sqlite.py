@@ -0,0 +1,73 @@
+"""File backed SQLite database of a test."""
+
+import asyncio
+from pathlib import Path
+from typing import Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.base import Base
+from src.db.session import create_engine_and_session
+
+_T = TypeVar("_T")
+
+
+class SQLiteDatabase:
+    """Database file with its engine and session factory."""
+
+    def __init__(self, path: Path) -> None:
+        """Class initializer.
+
+        Args:
+            path (Path): Database file
+        """
+        self.url = f"sqlite+aiosqlite:///{path}"
+        self.engine, self.session_factory = create_engine_and_session(self.url)
+
+    def tune(self, profile: str) -> None:
+        """Recreate the engine with a tuning profile.
+
+        Args:
+            profile (str): Tuning profile name
+        """
+        self.engine, self.session_factory = create_engine_and_session(
+            self.url, profile
+        )
+
+    def run(self, main: Callable[[], Awaitable[_T]]) -> _T:
+        """Create the tables, run a coroutine and dispose the engine.
+
+        Args:
+            main (Callable[[], Awaitable[_T]]): Coroutine function using the database
+
+        Returns:
+            _T: Result of the coroutine
+        """
+
+        async def run() -> _T:
+            async with self.engine.begin() as conn:
+                await conn.run_sync(Base.metadata.create_all)
+            try:
+                return await main()
+            finally:
+                await self.engine.dispose()
+
+        return asyncio.run(run())
+
+    def run_in_session(
+        self, scenario: Callable[[AsyncSession], Awaitable[_T]]
+    ) -> _T:
+        """Run a coroutine in a single session.
+
+        Args:
+            scenario (Callable[[AsyncSession], Awaitable[_T]]): Coroutine function taking the session
+
+        Returns:
+            _T: Result of the coroutine
+        """
+
+        async def main() -> _T:
+            async with self.session_factory() as session:
+                return await scenario(session)
+
+        return self.run(main)